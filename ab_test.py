@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+MonkFish A/B Test
+Plays paired games between two configurations and stops as soon as a
+sequential probability ratio test has decided both strength and move time
+"""
+
+import argparse
+import math
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from engine_pool import EnginePool
+from monkfish import NoLegalMovesError
+
+# Short, balanced opening lines; each is played twice with colours reversed
+DEFAULT_OPENINGS = [
+    [],
+    ["e2e4", "e7e5"],
+    ["d2d4", "d7d5"],
+    ["e2e4", "c7c5"],
+    ["c2c4", "e7e5"],
+    ["d2d4", "g8f6", "c2c4", "e7e6"],
+    ["e2e4", "e7e6", "d2d4", "d7d5"],
+    ["g1f3", "d7d5", "g2g3"],
+]
+
+def elo_to_score(elo):
+    """Expected score for an Elo difference"""
+    return 1.0 / (1.0 + 10 ** (-elo / 400.0))
+
+def score_to_elo(score):
+    score = min(max(score, 1e-3), 1 - 1e-3)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+class SPRT:
+    """Sequential probability ratio test on the mean of a stream of samples.
+
+    Uses the normal approximation fishtest applies to paired games: with
+    sample mean m and variance v over n samples,
+    LLR = n * (h1 - h0) * (2m - h0 - h1) / (2v).
+
+    The verdict is final once a bound is crossed: later samples are ignored,
+    so it can't drift back to undecided. The variance is floored at
+    `min_variance`: a run of identical samples (all draws, say) has none,
+    and would otherwise never reach a verdict.
+    """
+
+    def __init__(self, h0, h1, alpha=0.05, beta=0.05, min_variance=1e-3):
+        self.h0 = h0
+        self.h1 = h1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.min_variance = min_variance
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.verdict = None
+
+    def add(self, sample):
+        if self.verdict is not None:
+            return
+        self.n += 1
+        self.total += sample
+        self.total_sq += sample * sample
+        llr = self.llr()
+        if llr >= self.upper:
+            self.verdict = "H1"
+        elif llr <= self.lower:
+            self.verdict = "H0"
+
+    def mean(self):
+        return self.total / self.n if self.n else 0.0
+
+    def llr(self):
+        if self.n < 2:
+            return 0.0
+        mean = self.mean()
+        variance = max(self.total_sq / self.n - mean * mean, self.min_variance)
+        return self.n * (self.h1 - self.h0) * (2 * mean - self.h0 - self.h1) / (2 * variance)
+
+    def status(self):
+        """'H1' or 'H0' once a bound has been crossed, None while undecided"""
+        return self.verdict
+
+def _is_repetition(moves, cycle=4, repeats=3):
+    """Adjudicate the same move cycle played three times in a row as a draw"""
+    if len(moves) < cycle * repeats:
+        return False
+    tail = moves[-cycle:]
+    return all(moves[-cycle * (i + 1):len(moves) - cycle * i] == tail for i in range(1, repeats))
+
+def play_game(white, black, opening, max_plies=200, stop_event=None):
+    """Play one game from an opening line.
+
+    Returns (white's score, move times per side) or None if stopped early.
+    """
+    moves = list(opening)
+    times = {"white": [], "black": []}
+    white.new_game()
+    black.new_game()
+
+    while len(moves) < max_plies:
+        if stop_event is not None and stop_event.is_set():
+            return None
+        side = "white" if len(moves) % 2 == 0 else "black"
+        parser = white if side == "white" else black
+        position = "position startpos moves " + " ".join(moves) if moves else "position startpos"
+
+        start = time.perf_counter()
+        try:
+            move, _ = parser.get_drawing_move(position)
+        except NoLegalMovesError as e:
+            if not e.checkmated:
+                return 0.5, times
+            return (0.0 if side == "white" else 1.0), times
+        times[side].append(time.perf_counter() - start)
+
+        moves.append(move)
+        if _is_repetition(moves):
+            return 0.5, times
+    return 0.5, times
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+def play_pair(pool_a, pool_b, opening, max_plies=200, stop_event=None):
+    """Play an opening twice with colours reversed, scored from B's point of view"""
+    with pool_a.engine() as engine_a, pool_b.engine() as engine_b:
+        first = play_game(engine_a, engine_b, opening, max_plies, stop_event)
+        if first is None:
+            return None
+        second = play_game(engine_b, engine_a, opening, max_plies, stop_event)
+        if second is None:
+            return None
+
+    results_b = [1.0 - first[0], second[0]]
+    time_a = _mean(first[1]["white"] + second[1]["black"])
+    time_b = _mean(first[1]["black"] + second[1]["white"])
+    return {
+        "results": results_b,
+        "score": sum(results_b) / 2,
+        "time_a": time_a,
+        "time_b": time_b,
+        "time_saving": (time_a - time_b) / time_a if time_a > 0 else 0.0,
+    }
+
+class ABTest:
+    """Paired-game comparison of config B against config A"""
+
+    def __init__(self, config_a, config_b, concurrency=2, openings=None, max_pairs=1000,
+                 max_plies=200, elo0=-10.0, elo1=0.0, time0=0.0, time1=0.1,
+                 alpha=0.05, beta=0.05):
+        self.config_a = config_a
+        self.config_b = config_b
+        self.concurrency = concurrency
+        self.openings = openings or DEFAULT_OPENINGS
+        self.max_pairs = max_pairs
+        self.max_plies = max_plies
+        self.elo0, self.elo1 = elo0, elo1
+        self.time0, self.time1 = time0, time1
+        self.score_test = SPRT(elo_to_score(elo0), elo_to_score(elo1), alpha, beta)
+        self.time_test = SPRT(time0, time1, alpha, beta)
+        self.pairs = 0
+        self.wins = self.draws = self.losses = 0
+        self.move_times_a = []
+        self.move_times_b = []
+        self.elapsed = 0.0
+
+    def decided(self):
+        return self.score_test.status() is not None and self.time_test.status() is not None
+
+    def _record(self, pair):
+        self.pairs += 1
+        for result in pair["results"]:
+            if result == 1.0:
+                self.wins += 1
+            elif result == 0.0:
+                self.losses += 1
+            else:
+                self.draws += 1
+        self.score_test.add(pair["score"])
+        self.time_test.add(pair["time_saving"])
+        self.move_times_a.append(pair["time_a"])
+        self.move_times_b.append(pair["time_b"])
+
+    def run(self, progress=None):
+        """Play pairs until both tests are decided or max_pairs is reached"""
+        start = time.time()
+        stop_event = threading.Event()
+        with EnginePool(self.concurrency, self.config_a) as pool_a, \
+                EnginePool(self.concurrency, self.config_b) as pool_b, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = set()
+            submitted = 0
+            try:
+                while True:
+                    while not stop_event.is_set() and len(pending) < self.concurrency \
+                            and submitted < self.max_pairs:
+                        opening = self.openings[submitted % len(self.openings)]
+                        pending.add(executor.submit(
+                            play_pair, pool_a, pool_b, opening, self.max_plies, stop_event))
+                        submitted += 1
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pair = future.result()
+                        if pair is None or stop_event.is_set():
+                            continue
+                        self._record(pair)
+                        if progress:
+                            progress(self)
+                        if self.decided():
+                            stop_event.set()
+            finally:
+                stop_event.set()
+        self.elapsed = time.time() - start
+        return self.summary()
+
+    def summary(self):
+        games = self.wins + self.draws + self.losses
+        score = (self.wins + 0.5 * self.draws) / games if games else 0.5
+        return {
+            "pairs": self.pairs,
+            "games": games,
+            "wins": self.wins,
+            "draws": self.draws,
+            "losses": self.losses,
+            "score": score,
+            "elo": score_to_elo(score),
+            "score_llr": self.score_test.llr(),
+            "score_verdict": self.score_test.status(),
+            "time_llr": self.time_test.llr(),
+            "time_verdict": self.time_test.status(),
+            "time_saving": self.time_test.mean(),
+            "avg_move_time_a": _mean(self.move_times_a),
+            "avg_move_time_b": _mean(self.move_times_b),
+            "bounds": (self.score_test.lower, self.score_test.upper),
+            "elapsed": self.elapsed,
+        }
+
+def load_openings(path):
+    """One opening per line as space-separated UCI moves; '#' starts a comment"""
+    openings = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                openings.append(line.split())
+    return openings
+
+def _print_progress(test):
+    s = test.summary()
+    print(f"   Pairs {s['pairs']:4d} | B score {s['score']:.3f} "
+          f"(W {s['wins']} D {s['draws']} L {s['losses']}) | "
+          f"LLR score {s['score_llr']:+.2f} | LLR time {s['time_llr']:+.2f} | "
+          f"move time A {s['avg_move_time_a'] * 1000:.0f}ms B {s['avg_move_time_b'] * 1000:.0f}ms",
+          flush=True)
+
+def _describe(verdict, accepted, rejected):
+    if verdict == "H1":
+        return accepted
+    if verdict == "H0":
+        return rejected
+    return "undecided (max pairs reached)"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SPRT A/B test between two MonkFish configs")
+    parser.add_argument("config_a", help="baseline config file")
+    parser.add_argument("config_b", help="candidate config file")
+    parser.add_argument("--concurrency", type=int, default=2, help="game pairs played in parallel")
+    parser.add_argument("--max-pairs", type=int, default=1000)
+    parser.add_argument("--max-plies", type=int, default=200, help="adjudicate a draw after this many plies")
+    parser.add_argument("--openings", help="file with one opening move list per line")
+    parser.add_argument("--elo0", type=float, default=-10.0, help="H0: B is this many Elo weaker")
+    parser.add_argument("--elo1", type=float, default=0.0, help="H1: B is at least this strong")
+    parser.add_argument("--time0", type=float, default=0.0, help="H0: relative move time saved by B")
+    parser.add_argument("--time1", type=float, default=0.1, help="H1: relative move time saved by B")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    print("🐟 MonkFish A/B Test")
+    print("=" * 50)
+    print(f"A: {args.config_a}")
+    print(f"B: {args.config_b}")
+
+    test = ABTest(
+        args.config_a, args.config_b,
+        concurrency=args.concurrency,
+        openings=load_openings(args.openings) if args.openings else None,
+        max_pairs=args.max_pairs, max_plies=args.max_plies,
+        elo0=args.elo0, elo1=args.elo1, time0=args.time0, time1=args.time1,
+        alpha=args.alpha, beta=args.beta,
+    )
+    s = test.run(progress=_print_progress)
+
+    print("\n" + "=" * 50)
+    print("📊 Result")
+    print(f"Games: {s['games']} in {s['elapsed']:.1f}s, B score {s['score']:.3f} ({s['elo']:+.1f} Elo)")
+    print("Strength: " + _describe(
+        s["score_verdict"],
+        f"B is not weaker than {args.elo1:+.0f} Elo",
+        f"B is weaker than {args.elo0:+.0f} Elo"))
+    print("Move time: " + _describe(
+        s["time_verdict"],
+        f"B saves at least {args.time1:.0%} move time",
+        f"B saves no more than {args.time0:.0%} move time"))
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nA/B test cancelled")
+        sys.exit(1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+MonkFish Affinity Benchmark
+Runs the same positions through an engine pool left to the OS scheduler and
+through one pinned to disjoint, NUMA-local CPU sets, and reports where each
+worker ran and the NPS it reached
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from engine_pool import EnginePool
+from monkfish import NoLegalMovesError
+from profile_benchmark import self_play_positions
+from resources import format_cpulist
+
+def measure(config_file, workers, positions, pin, repeat=1):
+    """Search every position `repeat` times over a pool; placement, NPS and latency spread"""
+    jobs = list(positions) * repeat
+    lock = threading.Lock()
+    latencies = []
+
+    def run(pool):
+        while True:
+            with lock:
+                if not jobs:
+                    return
+                position = jobs.pop()
+            with pool.engine() as engine:
+                started = time.perf_counter()
+                try:
+                    engine.get_drawing_move(position)
+                except NoLegalMovesError:
+                    pass
+                elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    with EnginePool(workers, config_file, pin=pin) as pool:
+        wall_start = time.perf_counter()
+        threads = [threading.Thread(target=run, args=(pool,)) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - wall_start
+        placement = pool.placement()
+    latencies.sort()
+    return {
+        "pinned": pool.affinity is not None,
+        "wall": wall,
+        "searches": len(latencies),
+        "total_nps": sum(w["nps"] for w in placement),
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+        "workers": placement,
+    }
+
+def compare(config_file, workers, positions, repeat=1):
+    free = measure(config_file, workers, positions, pin=False, repeat=repeat)
+    pinned = measure(config_file, workers, positions, pin=True, repeat=repeat)
+    gain = 0.0
+    if free["total_nps"]:
+        gain = (pinned["total_nps"] - free["total_nps"]) / free["total_nps"]
+    return {"unpinned": free, "pinned": pinned, "nps_gain": gain}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare engine pool NPS with and without CPU pinning")
+    parser.add_argument("--config", default="monkfish_config.json")
+    parser.add_argument("--workers", type=int, default=2, help="Stockfish processes in the pool")
+    parser.add_argument("--plies", type=int, default=40, help="length of the self-played game")
+    parser.add_argument("--repeat", type=int, default=3, help="times each position is searched")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    print("🐟 MonkFish Affinity Benchmark")
+    print("=" * 50)
+    positions = self_play_positions(args.config, args.plies)
+    print(f"   {len(positions)} positions x {args.repeat} on {args.workers} workers")
+    report = compare(args.config, args.workers, positions, args.repeat)
+
+    for name in ("unpinned", "pinned"):
+        r = report[name]
+        print(f"\n   {name}: {r['total_nps']:,} nps  wall {r['wall']:.2f}s  "
+              f"p50 {r['p50_ms']:.1f}ms  p95 {r['p95_ms']:.1f}ms")
+        for w in r["workers"]:
+            cpus = format_cpulist(w["cpus"]) if w["cpus"] else "?"
+            nodes = ",".join(map(str, w["numa_nodes"])) or "?"
+            print(f"      worker {w['slot']}: pid {w['pid']}  cpus {cpus}  node {nodes}  "
+                  f"{w['threads']} threads  {w['nps']:,} nps")
+    if not report["pinned"]["pinned"]:
+        print("\n   ⚠️  Pinning was not possible on this host; both runs used the OS scheduler")
+    print(f"\n📊 NPS change with pinning: {report['nps_gain'] * 100:+.1f}%")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nBenchmark cancelled")
+        sys.exit(1)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+MonkFish Autotuner
+Sweeps MonkFish's UCI options over a position corpus, measures per-move
+latency and equality accuracy, and suggests a config per time control
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from engine_pool import EnginePool
+from uci_options import option_to_config
+
+DEFAULT_GRID = {
+    "MonkFish_Skill": [3],
+    "Drawing_Threshold": [1, 5, 10],
+    "Search_Depth": [2, 3, 4],
+    "MultiPV": [10, 20, 40],
+}
+
+# Per-move latency budget (seconds) that the 90th percentile must stay under
+TIME_CONTROLS = {
+    "bullet": 0.1,
+    "blitz": 0.5,
+    "rapid": 2.0,
+    "classical": 5.0,
+}
+
+DEFAULT_CORPUS = [
+    "position startpos",
+    "position startpos moves e2e4",
+    "position startpos moves e2e4 e7e5 g1f3 b8c6 f1b5",
+    "position startpos moves d2d4 d7d5 c2c4 e7e6 b1c3 g8f6",
+    "position startpos moves e2e4 c7c5 g1f3 d7d6 d2d4 c5d4 f3d4 g8f6 b1c3 a7a6",
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 9",
+    "8/5pk1/6p1/3R4/5P2/6PK/r7/8 w - - 0 45",
+    "8/8/4k3/3p4/3P4/4K3/8/8 w - - 0 60",
+]
+
+def load_corpus(path):
+    """One position per line: a FEN or 'startpos [moves ...]'; '#' starts a comment"""
+    positions = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith("startpos"):
+                line = "position " + line
+            positions.append(line)
+    return positions
+
+def parameter_grid(grid):
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def pareto_frontier(results):
+    """Results not beaten on both p90 latency and equality error by any other result"""
+    frontier = []
+    for r in results:
+        dominated = any(
+            o["latency_p90"] <= r["latency_p90"] and o["equality_error"] <= r["equality_error"]
+            and (o["latency_p90"] < r["latency_p90"] or o["equality_error"] < r["equality_error"])
+            for o in results
+        )
+        if not dominated:
+            frontier.append(r)
+    return sorted(frontier, key=lambda r: r["latency_p90"])
+
+def suggest_configs(frontier, time_controls=TIME_CONTROLS):
+    """Most accurate frontier point whose p90 latency fits each time control"""
+    suggestions = {}
+    for name, budget in time_controls.items():
+        fitting = [r for r in frontier if r["latency_p90"] <= budget]
+        if fitting:
+            choice = min(fitting, key=lambda r: r["equality_error"])
+        else:
+            choice = min(frontier, key=lambda r: r["latency_p90"])
+        suggestions[name] = dict(choice["params"])
+    return suggestions
+
+def to_config_sections(params):
+    """Turn tuned option values into monkfish_config.json sections"""
+    sections = {}
+    for name, value in params.items():
+        section, key, value = option_to_config(name, value)
+        sections.setdefault(section, {})[key] = value
+    return sections
+
+class Autotuner:
+    """Runs a parameter sweep on one engine pool and scores it with a reference pool"""
+
+    def __init__(self, config_file="monkfish_config.json", grid=None, positions=None,
+                 workers=2, reference_depth=12, chunk_size=4):
+        self.config_file = config_file
+        self.grid = grid or DEFAULT_GRID
+        self.positions = positions or DEFAULT_CORPUS
+        self.workers = workers
+        self.reference_depth = reference_depth
+        self.chunk_size = chunk_size
+
+    def _run_chunk(self, pool, params, positions):
+        samples = []
+        with pool.engine() as engine:
+            for name, value in params.items():
+                if not engine.uci_options.set_option(name, str(value)):
+                    raise ValueError(f"Invalid option or value: {name} = {value}")
+            engine.update_options()
+            for position in positions:
+                start = time.perf_counter()
+                move, _ = engine.get_drawing_move(position)
+                samples.append((position, move, time.perf_counter() - start))
+        return params, samples
+
+    def _reference_score(self, pool, position, move):
+        with pool.engine() as engine:
+            return engine.evaluate_move(position, move, self.reference_depth)
+
+    def run(self, progress=None):
+        combos = parameter_grid(self.grid)
+        jobs = [(params, chunk) for params in combos
+                for chunk in _chunks(self.positions, self.chunk_size)]
+        measured = {}
+
+        with EnginePool(self.workers, self.config_file) as pool, \
+                ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._run_chunk, pool, params, chunk) for params, chunk in jobs]
+            for done, future in enumerate(futures, 1):
+                params, samples = future.result()
+                measured.setdefault(tuple(sorted(params.items())), []).extend(samples)
+                if progress:
+                    progress(done, len(jobs))
+
+        # Deep-evaluate each distinct chosen move once, however many combos picked it
+        chosen = sorted({(position, move) for samples in measured.values() for position, move, _ in samples})
+        reference = {"MultiPV": 1, "MonkFish_Skill": 20}
+        with EnginePool(self.workers, self.config_file, option_overrides=reference) as pool, \
+                ThreadPoolExecutor(max_workers=self.workers) as executor:
+            scores = dict(zip(chosen, executor.map(lambda pm: self._reference_score(pool, *pm), chosen)))
+
+        results = []
+        for key, samples in measured.items():
+            latencies = [latency for _, _, latency in samples]
+            errors = [abs(scores[(position, move)]) for position, move, _ in samples]
+            results.append({
+                "params": dict(key),
+                "latency_mean": sum(latencies) / len(latencies),
+                "latency_p90": _percentile(latencies, 0.9),
+                "equality_error": sum(errors) / len(errors),
+            })
+        frontier = pareto_frontier(results)
+        suggestions = suggest_configs(frontier)
+        return {
+            "results": sorted(results, key=lambda r: r["latency_p90"]),
+            "frontier": frontier,
+            "suggestions": suggestions,
+            "suggested_configs": {name: to_config_sections(p) for name, p in suggestions.items()},
+            "positions": len(self.positions),
+            "reference_depth": self.reference_depth,
+        }
+
+def _format_params(params):
+    return " ".join(f"{name}={value}" for name, value in sorted(params.items()))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep MonkFish options for the latency/equality trade-off")
+    parser.add_argument("--config", default="monkfish_config.json")
+    parser.add_argument("--corpus", help="file with one FEN or 'startpos moves ...' per line")
+    parser.add_argument("--grid", help="JSON file mapping option names to lists of values")
+    parser.add_argument("--workers", type=int, default=2, help="engines per pool")
+    parser.add_argument("--reference-depth", type=int, default=12, help="depth of the equality reference search")
+    parser.add_argument("--output", help="write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    grid = None
+    if args.grid:
+        with open(args.grid, "r") as f:
+            grid = json.load(f)
+
+    print("🐟 MonkFish Autotuner")
+    print("=" * 50)
+    tuner = Autotuner(
+        args.config, grid=grid,
+        positions=load_corpus(args.corpus) if args.corpus else None,
+        workers=args.workers, reference_depth=args.reference_depth,
+    )
+    report = tuner.run(progress=lambda done, total: print(f"\r   Jobs: {done}/{total}", end="", flush=True))
+
+    print("\n\n📊 Pareto frontier (p90 latency vs equality error)")
+    for r in report["frontier"]:
+        print(f"   {r['latency_p90'] * 1000:8.1f}ms  ±{r['equality_error']:.3f}  {_format_params(r['params'])}")
+    print("\n⏱️  Suggested settings")
+    for name, params in report["suggestions"].items():
+        print(f"   {name:10s} {_format_params(params)}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAutotune cancelled")
+        sys.exit(1)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+MonkFish Build Selection
+Picks the fastest Stockfish build in a local directory: builds the CPU
+can't run are skipped using /proc/cpuinfo flags, the rest run a short
+`bench`, and the winner becomes engine.stockfish_path with its NPS kept
+in the config's "build" section. Nothing is downloaded.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Stockfish build names and the CPU flags each needs, fastest first
+BUILD_REQUIREMENTS = [
+    ("x86-64-vnni512", {"avx512vnni", "avx512dq", "avx512f", "avx512bw", "avx512vl", "bmi2", "popcnt"}),
+    ("x86-64-vnni256", {"avx512vnni", "avx512dq", "avx512f", "avx512bw", "avx512vl", "bmi2", "popcnt"}),
+    ("x86-64-avx512", {"avx512f", "avx512bw", "bmi2", "popcnt"}),
+    ("x86-64-avxvnni", {"avx_vnni", "avx2", "bmi2", "popcnt"}),
+    ("x86-64-bmi2", {"avx2", "bmi2", "popcnt"}),
+    ("x86-64-avx2", {"avx2", "popcnt"}),
+    ("x86-64-sse41-popcnt", {"sse4_1", "popcnt"}),
+    ("x86-64-modern", {"sse4_1", "popcnt"}),
+    ("x86-64-ssse3", {"ssse3"}),
+    ("x86-64-sse3-popcnt", {"pni", "popcnt"}),
+    ("x86-64", set()),
+    ("armv8-dotprod", {"asimddp"}),
+    ("armv8", set()),
+    ("apple-silicon", set()),
+]
+
+ARCH_FAMILIES = {"x86_64": "x86-64", "amd64": "x86-64", "aarch64": "arm", "arm64": "arm"}
+
+BENCH_NPS_PATTERN = re.compile(r"Nodes/second\s*:\s*(\d+)")
+
+# bench arguments: hash MB, threads, depth; small enough to finish in seconds on any build
+DEFAULT_BENCH_ARGS = ("16", "1", "10")
+
+def cpu_flags(root="/"):
+    """CPU feature flags from /proc/cpuinfo ("flags" on x86, "Features" on ARM)"""
+    try:
+        with open(os.path.join(root, "proc/cpuinfo")) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name.strip() in ("flags", "Features"):
+                    return set(value.split())
+    except OSError:
+        pass
+    return set()
+
+def build_name(filename):
+    """The Stockfish build a binary's file name names, or None for plain names like "stockfish" """
+    name = os.path.basename(filename).lower()
+    # Longest match first so "x86-64-avx2" isn't taken for "x86-64"
+    for build, _ in sorted(BUILD_REQUIREMENTS, key=lambda b: -len(b[0])):
+        if build in name:
+            return build
+    return None
+
+def is_compatible(build, flags, machine):
+    """Whether a build can run here; unknown builds are left for the bench to find out"""
+    if build is None:
+        return True
+    family = ARCH_FAMILIES.get(machine.lower())
+    if family is not None and build.startswith("x86-64") != (family == "x86-64"):
+        return False
+    required = dict(BUILD_REQUIREMENTS)[build]
+    return required <= flags
+
+def find_candidates(directory):
+    """Executable files named stockfish* in `directory`"""
+    candidates = []
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return candidates
+    for name in names:
+        path = os.path.join(directory, name)
+        if name.lower().startswith("stockfish") and os.path.isfile(path) and os.access(path, os.X_OK):
+            candidates.append(path)
+    return candidates
+
+def run_bench(path, bench_args=DEFAULT_BENCH_ARGS, timeout=300):
+    """Nodes per second from `<path> bench ...`; raises RuntimeError when it doesn't run"""
+    try:
+        result = subprocess.run([path, "bench", *bench_args], capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise RuntimeError(f"bench did not complete: {e}")
+    if result.returncode != 0:
+        # An illegal instruction shows up as a negative return code (SIGILL)
+        raise RuntimeError(f"bench exited with code {result.returncode}")
+    match = BENCH_NPS_PATTERN.search(result.stderr) or BENCH_NPS_PATTERN.search(result.stdout)
+    if not match:
+        raise RuntimeError("bench printed no Nodes/second")
+    return int(match.group(1))
+
+def select_build(directory, root="/", machine=None, bench_args=DEFAULT_BENCH_ARGS, progress=None):
+    """Bench every compatible build; returns (results, best result or None)"""
+    flags = cpu_flags(root)
+    machine = machine or os.uname().machine
+    results = []
+    for path in find_candidates(directory):
+        build = build_name(path)
+        result = {"path": os.path.abspath(path), "build": build, "nps": None, "error": None}
+        if flags and not is_compatible(build, flags, machine):
+            result["error"] = "CPU lacks the instructions this build needs"
+        else:
+            try:
+                result["nps"] = run_bench(path, bench_args)
+            except RuntimeError as e:
+                result["error"] = str(e)
+        results.append(result)
+        if progress:
+            progress(result)
+    measured = [r for r in results if r["nps"]]
+    best = max(measured, key=lambda r: r["nps"]) if measured else None
+    return results, best
+
+def record_selection(config_file, results, best):
+    """Point engine.stockfish_path at the winner and keep every build's NPS in the "build" section.
+
+    The rest of the file is left as it is.
+
+    Raises RuntimeError, without writing anything, when the existing file can't be parsed.
+    """
+    sections = {}
+    if os.path.exists(config_file):
+        try:
+            with open(config_file) as f:
+                sections = json.load(f)
+            if not isinstance(sections, dict) or not isinstance(sections.get("engine", {}), dict):
+                raise ValueError("config must be an object of sections")
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"Could not read {config_file} ({e}); leaving it unchanged")
+    sections.setdefault("engine", {})["stockfish_path"] = best["path"]
+    sections["build"] = {
+        "selected": best["build"] or os.path.basename(best["path"]),
+        "nps": best["nps"],
+        "measured_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": {r["path"]: r["nps"] for r in results if r["nps"]},
+    }
+    with open(config_file, "w") as f:
+        json.dump(sections, f, indent=2)
+    return sections
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pick the fastest local Stockfish build for this CPU")
+    parser.add_argument("directory", nargs="?", default="stockfish_builds",
+                        help="directory holding stockfish* binaries")
+    parser.add_argument("--config", default="monkfish_config.json")
+    parser.add_argument("--depth", default=DEFAULT_BENCH_ARGS[2], help="bench depth")
+    parser.add_argument("--dry-run", action="store_true", help="only report, leave the config alone")
+    args = parser.parse_args(argv)
+
+    print("🐟 MonkFish Build Selection")
+    print("=" * 50)
+
+    def progress(r):
+        name = r["build"] or os.path.basename(r["path"])
+        if r["nps"]:
+            print(f"   ✅ {name:22s} {r['nps']:>14,} nps")
+        else:
+            print(f"   ⏭️  {name:22s} {r['error']}")
+
+    results, best = select_build(args.directory, bench_args=(*DEFAULT_BENCH_ARGS[:2], str(args.depth)),
+                                 progress=progress)
+    if not results:
+        print(f"❌ No stockfish* binaries in {args.directory}")
+        return 1
+    if best is None:
+        print("❌ None of the builds ran on this machine")
+        return 1
+    print(f"\n🏆 Fastest: {best['path']} ({best['nps']:,} nps)")
+    if not args.dry_run:
+        try:
+            record_selection(args.config, results, best)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"   Saved to {args.config}")
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nBuild selection cancelled")
+        sys.exit(1)
@@ -0,0 +1,65 @@
+"""
+Capitalize mode
+
+MonkFish holds equality until the opponent errs. After that, searching
+dozens of lines for an equal move is wasted work, since no such move exists.
+Once MonkFish's own eval has stayed at or above `margin` for
+`confirm_moves` searches in a row, it switches to one full-strength line
+with a movetime or depth limit to convert the win. It switches back when
+the eval drops below `exit_margin`. Entering and leaving at different
+margins keeps eval noise near the margin from flipping the mode every move.
+"""
+
+class CapitalizeMode:
+    """Eval trend with hysteresis, plus the search cost spent in each mode"""
+
+    def __init__(self):
+        self.active = False
+        self.streak = 0
+        self.switches = 0
+        # mode: [searches, nodes, seconds]
+        self.stats = {"equal": [0, 0, 0.0], "capitalize": [0, 0, 0.0]}
+
+    def reset(self):
+        """Back to equal play for a new game; the cost totals are kept"""
+        self.active = False
+        self.streak = 0
+
+    def record(self, nodes, seconds):
+        """Count a finished search against the mode it ran in"""
+        stats = self.stats["capitalize" if self.active else "equal"]
+        stats[0] += 1
+        stats[1] += nodes
+        stats[2] += seconds
+
+    def update(self, score, margin, exit_margin, confirm_moves=1):
+        """Feed the eval (pawns, side to move) of the search just finished; True when the mode switched"""
+        if self.active:
+            if score >= exit_margin:
+                return False
+            self.active = False
+            self.streak = 0
+        else:
+            self.streak = self.streak + 1 if score >= margin else 0
+            if self.streak < confirm_moves:
+                return False
+            self.active = True
+        self.switches += 1
+        return True
+
+    def savings(self):
+        """Search cost capitalize mode avoided.
+
+        Each capitalize search is compared with the average equal-mode search
+        of this engine, the cost that move would otherwise have had.
+        """
+        equal_searches, equal_nodes, equal_seconds = self.stats["equal"]
+        searches, nodes, seconds = self.stats["capitalize"]
+        if not equal_searches or not searches:
+            return {"moves": searches, "nodes_saved": 0, "seconds_saved": 0.0, "switches": self.switches}
+        return {
+            "moves": searches,
+            "nodes_saved": int(searches * equal_nodes / equal_searches - nodes),
+            "seconds_saved": searches * equal_seconds / equal_searches - seconds,
+            "switches": self.switches,
+        }
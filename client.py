@@ -0,0 +1,208 @@
+"""
+MonkFish client library
+
+    from client import MonkFish, MonkFishOptions
+
+    options = MonkFishOptions(stockfish_path="/usr/local/bin/stockfish", engines=4, depth=3)
+    async with MonkFish(options) as mf:
+        result = await mf.drawing_move(fen)
+        async for result in mf.analyse_many(fens, concurrency=4):
+            print(result.index, result.move, result.score)
+
+Settings come only from the MonkFishOptions object: monkfish_config.json
+is neither read nor created. Stockfish processes are started once and
+reused across calls. Cancelling a call (or leaving an analyse_many loop
+early) stops the search it was waiting on.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import MonkFishConfig
+from engine_pool import EnginePool
+from monkfish import NoLegalMovesError
+
+class MonkFishOptions:
+    """Everything a MonkFish client is configured with.
+
+    `threads` and `hash_mb` default to an even split of the host between
+    `engines`; `engine_options` passes raw Stockfish options through.
+    """
+
+    def __init__(self, stockfish_path="./stockfish", engines=1, depth=2, multipv=40, skill_level=3,
+                 drawing_threshold=0.01, use_nnue=False, nodes=0, deterministic=False,
+                 threads=None, hash_mb=None, syzygy_path="", engine_options=None):
+        self.stockfish_path = stockfish_path
+        self.engines = engines
+        self.depth = depth
+        self.multipv = multipv
+        self.skill_level = skill_level
+        self.drawing_threshold = drawing_threshold
+        self.use_nnue = use_nnue
+        self.nodes = nodes
+        self.deterministic = deterministic
+        self.threads = threads
+        self.hash_mb = hash_mb
+        self.syzygy_path = syzygy_path
+        self.engine_options = dict(engine_options or {})
+
+    def to_config(self):
+        """The equivalent in-memory MonkFishConfig"""
+        return MonkFishConfig.from_dict({
+            "engine": {"stockfish_path": self.stockfish_path, "skill_level": self.skill_level,
+                       "multipv": self.multipv, "use_nnue": self.use_nnue},
+            "search": {"default_depth": self.depth, "drawing_threshold": self.drawing_threshold,
+                       "search_nodes": self.nodes, "deterministic": self.deterministic},
+            "tablebase": {"syzygy_path": self.syzygy_path},
+            # Nothing is written to disk on the caller's behalf
+            "decision_log": {"enabled": False},
+        })
+
+    def option_overrides(self):
+        overrides = dict(self.engine_options)
+        if self.threads is not None:
+            overrides["Threads"] = self.threads
+        if self.hash_mb is not None:
+            overrides["Hash"] = self.hash_mb
+        return overrides
+
+class Analysis:
+    """One searched position; `move` is None (and `error` set) when it couldn't be searched"""
+
+    def __init__(self, position, move=None, score=None, seconds=0.0, index=None, error=None):
+        self.position = position
+        self.move = move
+        self.score = score
+        self.seconds = seconds
+        self.index = index
+        self.error = error
+
+    def __repr__(self):
+        if self.error:
+            return f"Analysis({self.position!r}, error={self.error!r})"
+        return f"Analysis({self.position!r}, move={self.move!r}, score={self.score!r})"
+
+class _Search:
+    """A search running on an executor thread that another task may cancel"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.engine = None
+        self.cancelled = False
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            engine = self.engine
+        if engine is not None:
+            engine.stop()
+
+class MonkFish:
+    """Asynchronous MonkFish over a reusable pool of Stockfish processes"""
+
+    def __init__(self, options=None, **settings):
+        self.options = options or MonkFishOptions(**settings)
+        self.pool = None
+        self._executor = None
+
+    async def start(self):
+        if self.pool is not None:
+            return self
+        pool = EnginePool(self.options.engines, config_file=None, config=self.options.to_config(),
+                          option_overrides=self.options.option_overrides())
+        self._executor = ThreadPoolExecutor(max_workers=self.options.engines,
+                                            thread_name_prefix="monkfish-client")
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, pool.start)
+        except BaseException:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            raise
+        self.pool = pool
+        return self
+
+    async def close(self):
+        if self.pool is None:
+            return
+        pool, self.pool = self.pool, None
+        executor, self._executor = self._executor, None
+        await asyncio.get_running_loop().run_in_executor(None, pool.close)
+        executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _run(self, search, position, depth, nodes):
+        with self.pool.engine() as engine:
+            with search.lock:
+                if search.cancelled:
+                    return None
+                search.engine = engine
+            try:
+                return engine.get_drawing_move(position, depth, nodes=nodes)
+            finally:
+                with search.lock:
+                    search.engine = None
+
+    async def drawing_move(self, position, depth=None, nodes=None):
+        """Search one FEN (or "position startpos moves ..." string) and return its Analysis.
+
+        Raises NoLegalMovesError for checkmate/stalemate and RuntimeError for engine failures.
+        """
+        if self.pool is None:
+            raise RuntimeError("MonkFish client is not started")
+        search = _Search()
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._run, search, position, depth, nodes)
+        try:
+            move, score = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            search.cancel()
+            raise
+        return Analysis(position, move, score, time.perf_counter() - started)
+
+    async def analyse_many(self, positions, concurrency=None, depth=None, nodes=None):
+        """Yield an Analysis per position in completion order; `index` says which one it was.
+
+        Positions that fail come back with `error` set instead of ending the stream.
+        """
+        concurrency = max(1, concurrency or self.options.engines)
+        positions = iter(enumerate(positions))
+        running = set()
+
+        async def analyse(index, position):
+            try:
+                result = await self.drawing_move(position, depth, nodes)
+            except NoLegalMovesError as e:
+                return Analysis(position, index=index, error=str(e))
+            except RuntimeError as e:
+                return Analysis(position, index=index, error=str(e))
+            result.index = index
+            return result
+
+        def fill():
+            for index, position in positions:
+                running.add(asyncio.ensure_future(analyse(index, position)))
+                if len(running) >= concurrency:
+                    return
+
+        try:
+            fill()
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    running.discard(task)
+                fill()
+                for task in done:
+                    yield task.result()
+        finally:
+            # Leaving the loop early (break, cancellation) stops what is still searching
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
@@ -6,9 +6,54 @@ class MonkFishConfig:
         self.config_file = config_file
         self.config = self._load_config()
     
+    @classmethod
+    def from_dict(cls, sections):
+        """In-memory config: defaults overlaid with `sections`, with no file read or written"""
+        config = cls.__new__(cls)
+        config.config_file = None
+        config.config = config._merge(config._default_config(), sections)
+        return config
+    
+    @staticmethod
+    def _merge(default_config, loaded_config):
+        for section in loaded_config:
+            if section in default_config:
+                default_config[section].update(loaded_config[section])
+            else:
+                default_config[section] = loaded_config[section]
+        return default_config
+    
+    def load_file(self):
+        """Defaults merged with the file as it is now; raises OSError/ValueError instead of falling back"""
+        with open(self.config_file, 'r') as f:
+            loaded_config = json.load(f)
+        if not isinstance(loaded_config, dict) or not all(isinstance(v, dict) for v in loaded_config.values()):
+            raise ValueError("config must be an object of sections")
+        return self._merge(self._default_config(), loaded_config)
+    
+    def replace(self, sections):
+        """Swap in a new set of sections; everyone sharing this object sees them at once"""
+        self.config = sections
+    
     def _load_config(self):
+        default_config = self._default_config()
+        if os.path.exists(self.config_file):
+            try:
+                with open(self.config_file, 'r') as f:
+                    loaded_config = json.load(f)
+                # Merge with defaults (in case new options are added later)
+                return self._merge(default_config, loaded_config)
+            except:
+                print(f"info string Warning: Could not load {self.config_file}, using defaults")
+                return self._default_config()
+        else:
+            # Create config file with defaults
+            self._save_config(default_config)
+            return default_config
+    
+    def _default_config(self):
         # Default configuration if file doesn't exist
-        default_config = {
+        return {
             "engine": {
                 "stockfish_path": "./stockfish",
                 "skill_level": 3,
@@ -17,32 +62,61 @@ class MonkFishConfig:
             },
             "search": {
                 "default_depth": 2,
-                "drawing_threshold": 0.01
+                "drawing_threshold": 0.01,
+                "info_interval_ms": 100,
+                "search_nodes": 0,
+                "deterministic": False
             },
             "info": {
                 "name": "MonkFish",
                 "author": "Raghav Ojha"
+            },
+            "resources": {
+                "max_threads": None,
+                "max_hash_mb": None,
+                "memory_fraction": 0.5,
+                "pin_workers": False
+            },
+            "profiles": {
+                "enabled": False,
+                "opening": {"depth": 2, "multipv": 15, "drawing_threshold": 0.05, "use_nnue": False},
+                "middlegame": {"depth": 3, "multipv": 30, "drawing_threshold": 0.02, "use_nnue": False},
+                "endgame": {"depth": 5, "multipv": 8, "drawing_threshold": 0.01, "use_nnue": True}
+            },
+            "tablebase": {
+                "syzygy_path": "",
+                "probe_before_search": True
+            },
+            "supervisor": {
+                "hang_timeout": 10.0,
+                "heartbeat_interval": 5.0,
+                "retry_depth_reduction": 1
+            },
+            "decision_log": {
+                "enabled": False,
+                "path": "monkfish_decisions.log",
+                "max_bytes": 5 * 1024 * 1024,
+                "backup_count": 3
+            },
+            "debug": {
+                "profile": False,
+                "trace": False,
+                "output_dir": "monkfish_debug"
+            },
+            "hot_reload": {
+                "enabled": False,
+                "interval": 2.0
+            },
+            "capitalize": {
+                "enabled": False,
+                "margin": 2.0,
+                "exit_margin": 1.0,
+                "confirm_moves": 2,
+                "skill_level": 20,
+                "movetime_ms": 300,
+                "depth": None
             }
         }
-        
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    loaded_config = json.load(f)
-                # Merge with defaults (in case new options are added later)
-                for section in default_config:
-                    if section in loaded_config:
-                        default_config[section].update(loaded_config[section])
-                    elif section not in default_config:
-                        default_config[section] = loaded_config[section]
-                return default_config
-            except:
-                print(f"info string Warning: Could not load {self.config_file}, using defaults")
-                return default_config
-        else:
-            # Create config file with defaults
-            self._save_config(default_config)
-            return default_config
     
     def _save_config(self, config):
         try:
@@ -72,8 +146,100 @@ class MonkFishConfig:
     def get_drawing_threshold(self):
         return self.get("search", "drawing_threshold")
     
+    def get_search_nodes(self):
+        return self.get("search", "search_nodes")
+    
+    def get_deterministic(self):
+        return self.get("search", "deterministic")
+    
+    def get_info_interval_ms(self):
+        return self.get("search", "info_interval_ms")
+    
     def get_engine_name(self):
         return self.get("info", "name")
     
     def get_author(self):
-        return self.get("info", "author")
\ No newline at end of file
+        return self.get("info", "author")
+    
+    def get_max_threads(self):
+        return self.get("resources", "max_threads")
+    
+    def get_max_hash_mb(self):
+        return self.get("resources", "max_hash_mb")
+    
+    def get_memory_fraction(self):
+        return self.get("resources", "memory_fraction")
+    
+    def get_pin_workers(self):
+        return bool(self.get("resources", "pin_workers"))
+    
+    def get_hang_timeout(self):
+        return self.get("supervisor", "hang_timeout")
+    
+    def get_heartbeat_interval(self):
+        return self.get("supervisor", "heartbeat_interval")
+    
+    def get_retry_depth_reduction(self):
+        return self.get("supervisor", "retry_depth_reduction")
+    
+    def get_profiles_enabled(self):
+        return self.get("profiles", "enabled")
+    
+    def get_profile(self, phase):
+        """Compute profile for a game phase; missing keys fall back to the base settings"""
+        return self.get("profiles", phase) or {}
+    
+    def get_syzygy_path(self):
+        return self.get("tablebase", "syzygy_path")
+    
+    def get_tablebase_probing(self):
+        return self.get("tablebase", "probe_before_search")
+    
+    def get_decision_log_enabled(self):
+        return self.get("decision_log", "enabled")
+    
+    def get_decision_log_path(self):
+        return self.get("decision_log", "path")
+    
+    def get_decision_log_max_bytes(self):
+        return self.get("decision_log", "max_bytes")
+    
+    def get_decision_log_backup_count(self):
+        return self.get("decision_log", "backup_count")
+    
+    def get_debug_profile(self):
+        return self.get("debug", "profile")
+    
+    def get_debug_trace(self):
+        return self.get("debug", "trace")
+    
+    def get_debug_output_dir(self):
+        return self.get("debug", "output_dir")
+    
+    def get_hot_reload_enabled(self):
+        return bool(self.get("hot_reload", "enabled"))
+    
+    def get_hot_reload_interval(self):
+        return self.get("hot_reload", "interval")
+    
+    def get_capitalize_enabled(self):
+        return bool(self.get("capitalize", "enabled"))
+    
+    def get_capitalize_margin(self):
+        return self.get("capitalize", "margin")
+    
+    def get_capitalize_exit_margin(self):
+        return self.get("capitalize", "exit_margin")
+    
+    def get_capitalize_confirm_moves(self):
+        return self.get("capitalize", "confirm_moves")
+    
+    def get_capitalize_skill_level(self):
+        return self.get("capitalize", "skill_level")
+    
+    def get_capitalize_movetime_ms(self):
+        return self.get("capitalize", "movetime_ms")
+    
+    def get_capitalize_depth(self):
+        """Depth for capitalize searches; None uses movetime_ms instead"""
+        return self.get("capitalize", "depth")
\ No newline at end of file
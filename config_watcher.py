@@ -0,0 +1,145 @@
+"""
+Hot reload of monkfish_config.json
+
+A ConfigWatcher polls the config file. When it changes, the new file is
+validated and diffed against the live config. The live MonkFishConfig is
+then updated in place, and each registered target's apply_config(changes)
+is handed just the (section, key, old, new) entries that changed.
+"""
+
+import os
+import sys
+import threading
+from config import MonkFishConfig
+from uci_options import UCIOptions, CONFIG_OPTION_KEYS, config_to_option
+
+# Settings only read when an engine, pool or log starts; None stands for the whole section
+RESTART_KEYS = {
+    ("engine", "stockfish_path"), ("tablebase", "syzygy_path"), ("tablebase", "probe_before_search"),
+    ("info", None), ("decision_log", None), ("supervisor", None), ("debug", "output_dir"), ("hot_reload", None),
+}
+
+def needs_restart(section, key):
+    return (section, key) in RESTART_KEYS or (section, None) in RESTART_KEYS
+
+def config_diff(old, new):
+    """(section, key, old value, new value) for every setting that differs"""
+    changes = []
+    for section in sorted(set(old) | set(new)):
+        before, after = old.get(section, {}), new.get(section, {})
+        for key in sorted(set(before) | set(after)):
+            if before.get(key) != after.get(key):
+                changes.append((section, key, before.get(key), after.get(key)))
+    return changes
+
+def _positive_or_none(value):
+    return value is None or (isinstance(value, int) and not isinstance(value, bool) and value > 0)
+
+def validate(sections):
+    """Problems with a loaded config, as messages; empty when it is safe to apply"""
+    errors = []
+    try:
+        options = UCIOptions(MonkFishConfig.from_dict(sections))
+    except (TypeError, ValueError) as e:
+        return [f"config values have the wrong type: {e}"]
+    for name, (section, key) in CONFIG_OPTION_KEYS.items():
+        value = sections.get(section, {}).get(key)
+        try:
+            ok = options.set_option(name, config_to_option(name, value))
+        except (TypeError, ValueError):
+            ok = False
+        if not ok:
+            errors.append(f"{section}.{key} = {value!r} is not a valid {name}")
+
+    resources = sections.get("resources", {})
+    for key in ("max_threads", "max_hash_mb"):
+        if not _positive_or_none(resources.get(key)):
+            errors.append(f"resources.{key} must be a positive integer or null")
+    fraction = resources.get("memory_fraction")
+    if not isinstance(fraction, (int, float)) or not 0 < fraction <= 1:
+        errors.append("resources.memory_fraction must be in (0, 1]")
+    interval = sections.get("search", {}).get("info_interval_ms")
+    if not isinstance(interval, (int, float)) or interval < 0:
+        errors.append("search.info_interval_ms must be a non-negative number")
+    capitalize = sections.get("capitalize", {})
+    margin, exit_margin = capitalize.get("margin"), capitalize.get("exit_margin")
+    if not all(isinstance(m, (int, float)) for m in (margin, exit_margin)) or exit_margin > margin:
+        errors.append("capitalize.exit_margin must be a number no higher than capitalize.margin")
+    for phase in ("opening", "middlegame", "endgame"):
+        if not isinstance(sections.get("profiles", {}).get(phase, {}), dict):
+            errors.append(f"profiles.{phase} must be an object")
+    return errors
+
+class ConfigWatcher:
+    """Polls a MonkFishConfig's file every `interval` seconds and applies valid edits to `targets`"""
+
+    def __init__(self, config, targets=(), interval=None):
+        if not config.config_file:
+            raise ValueError("Config has no file to watch")
+        self.config = config
+        self.targets = list(targets)
+        self.interval = interval or config.get_hot_reload_interval() or 2.0
+        self.reloads = 0
+        self.rejected = 0
+        self.last_changes = []
+        self._stamp = self._file_stamp()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _file_stamp(self):
+        try:
+            info = os.stat(self.config.config_file)
+        except OSError:
+            return None
+        return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+    def check(self):
+        """Reload if the file changed; returns the changes applied, [] if none were"""
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return []
+        self._stamp = stamp
+        try:
+            sections = self.config.load_file()
+        except (OSError, ValueError) as e:
+            # Editors often save in two steps; the next poll sees the finished file
+            self.rejected += 1
+            print(f"info string Warning: Ignoring unreadable {self.config.config_file}: {e}", file=sys.stderr)
+            return []
+        errors = validate(sections)
+        if errors:
+            self.rejected += 1
+            for error in errors:
+                print(f"info string Warning: Config reload rejected: {error}", file=sys.stderr)
+            return []
+
+        changes = config_diff(self.config.config, sections)
+        if not changes:
+            return []
+        self.config.replace(sections)
+        later = [f"{section}.{key}" for section, key, _, _ in changes if needs_restart(section, key)]
+        if later:
+            print(f"info string Config changes needing a restart: {', '.join(later)}", file=sys.stderr)
+        for target in self.targets:
+            try:
+                target.apply_config(changes)
+            except Exception as e:
+                print(f"info string Warning: Could not apply config change: {e}", file=sys.stderr)
+        self.reloads += 1
+        self.last_changes = changes
+        return changes
+
+    def _poll(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._poll, name="monkfish-config-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,93 @@
+import cProfile
+import json
+import os
+import sys
+import time
+
+# Trace marks in the order a move goes through them
+TRACE_MARKS = ("go", "options_synced", "position_sent", "go_sent", "first_info", "last_info",
+               "bestmove", "done")
+
+class MoveTrace:
+    """perf_counter timestamps for the stages of one move.
+
+    Output from Stockfish is read in batches, so first_info and last_info
+    are the times the batches holding them arrived.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.start = clock()
+        self.marks = {"go": 0.0}
+
+    def mark(self, name):
+        self.marks[name] = self.clock() - self.start
+
+    def output(self):
+        """A batch of engine output arrived"""
+        now = self.clock() - self.start
+        self.marks.setdefault("first_info", now)
+        self.marks["last_info"] = now
+
+    def breakdown(self):
+        """Milliseconds per mark, plus engine think time and the Python time around it"""
+        marks = {name: round(self.marks[name] * 1000, 3) for name in TRACE_MARKS if name in self.marks}
+        result = {"marks_ms": marks}
+        if "go_sent" in marks and "bestmove" in marks:
+            engine = marks["bestmove"] - marks["go_sent"]
+            total = marks.get("done", marks["bestmove"])
+            result["engine_ms"] = round(engine, 3)
+            result["python_ms"] = round(total - engine, 3)
+        return result
+
+class DebugSession:
+    """Per-move cProfile stats and stage traces for the Debug_Profile/Debug_Trace options.
+
+    Nothing is created while both options are off; handle_go then pays one
+    attribute check.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.moves = 0
+        self.profiler = None
+        self.trace = None
+        self.position = None
+
+    def begin(self, position, profile=False, trace=False):
+        """Start instrumenting one move; returns its MoveTrace (or None when not tracing)"""
+        self.moves += 1
+        self.position = position
+        self.trace = MoveTrace() if trace else None
+        if profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self.trace
+
+    def end(self):
+        """Stop instrumenting and write the move's files; returns their paths"""
+        written = []
+        if self.profiler is None and self.trace is None:
+            return written
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stem = os.path.join(self.output_dir, f"move-{self.moves:04d}")
+            if self.profiler is not None:
+                self.profiler.disable()
+                self.profiler.dump_stats(stem + ".pstats")
+                written.append(stem + ".pstats")
+            if self.trace is not None:
+                self.trace.mark("done")
+                record = {"move": self.moves, "position": self.position}
+                record.update(self.trace.breakdown())
+                with open(stem + ".trace.json", "w") as f:
+                    json.dump(record, f, indent=2)
+                written.append(stem + ".trace.json")
+        except OSError as e:
+            print(f"info string Warning: Could not write debug output: {e}", file=sys.stderr)
+        finally:
+            if self.profiler is not None:
+                self.profiler.disable()
+            self.profiler = None
+            self.trace = None
+        return written
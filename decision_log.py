@@ -0,0 +1,205 @@
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+# Raw Stockfish info lines are only parsed on the writer thread, never during search
+INFO_FIELDS = re.compile(r"info depth (\d+)(?:.* multipv (\d+))?.* score (cp|mate) (-?\d+).* pv (\S+)")
+
+# Why a searched move isn't the drawing candidate: nothing scored within the
+# threshold, or the last candidate within it wasn't Stockfish's best move
+FALLBACK_REASONS = ("no_candidate", "candidate_differs")
+
+def position_hash(position):
+    """Short stable hash of a MonkFish position string or FEN"""
+    return hashlib.blake2b(position.encode(), digest_size=8).hexdigest()
+
+def candidate_table(lines):
+    """{first pv move: [[depth, multipv, score], ...]} from raw info lines; mates score as "M<n>" """
+    table = {}
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", "replace")
+        match = INFO_FIELDS.match(line)
+        if not match:
+            continue
+        depth, multipv, kind, value, move = match.groups()
+        score = int(value) if kind == "cp" else f"M{value}"
+        table.setdefault(move, []).append([int(depth), int(multipv or 1), score])
+    return table
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records untouched; the stock QueueHandler would format them on the searching thread"""
+
+    def prepare(self, record):
+        return record
+
+class _DecisionFormatter(logging.Formatter):
+    """One compact JSON object per line, built on the listener thread"""
+
+    def format(self, record):
+        fields = dict(record.decision)
+        lines = fields.pop("lines", None)
+        fields["pos"] = position_hash(fields.pop("position"))
+        if lines is not None:
+            fields["cands"] = candidate_table(lines)
+        return json.dumps(fields, separators=(",", ":"))
+
+# Logs opened through from_config, by absolute path: [log, parsers using it]
+_shared_logs = {}
+_shared_lock = threading.Lock()
+
+class DecisionLog:
+    """Appends one record per move to a size-rotated file from a background thread.
+
+    The searching thread only builds a dict and puts it on a queue; hashing,
+    parsing the candidate lines, JSON encoding and the file write all happen
+    on a logging QueueListener thread, so search latency doesn't change.
+    Parsers in one process share the log of a path (see from_config): separate
+    rotating handlers on one file would rename it under each other.
+    """
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backup_count=3):
+        self.path = path
+        self.queue = queue.SimpleQueue()
+        self.file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.file_handler.setFormatter(_DecisionFormatter())
+        self.handler = _DeferredQueueHandler(self.queue)
+        self.listener = logging.handlers.QueueListener(self.queue, self.file_handler)
+        self.listener.start()
+        self.records = 0
+        self._shared_key = None
+
+    @classmethod
+    def from_config(cls, config):
+        """The process's log for the configured file, or None when decision logging is off.
+
+        Every call for the same path returns the same log; it is released when the last user closes it.
+        """
+        if not config.get_decision_log_enabled():
+            return None
+        key = os.path.abspath(config.get_decision_log_path())
+        with _shared_lock:
+            entry = _shared_logs.get(key)
+            if entry:
+                entry[1] += 1
+                return entry[0]
+            try:
+                log = cls(key, config.get_decision_log_max_bytes(), config.get_decision_log_backup_count())
+            except OSError as e:
+                print(f"info string Warning: Could not open decision log: {e}", file=sys.stderr)
+                return None
+            log._shared_key = key
+            _shared_logs[key] = [log, 1]
+            return log
+
+    def record(self, position, move, score, source="search", candidate=None, fallback=None,
+               phase=None, limit=None, lines=None, timings=None):
+        """Queue one decision; `lines` are the raw info lines of the search, `timings` seconds per stage"""
+        decision = {
+            "t": round(time.time(), 3),
+            "position": position,
+            "move": move,
+            "score": score,
+            "src": source,
+            "cand": candidate,
+            "fallback": fallback,
+            "phase": phase,
+            "limit": list(limit) if limit else None,
+            "ms": {name: round(seconds * 1000, 2) for name, seconds in (timings or {}).items()},
+            "lines": lines,
+        }
+        self.handler.handle(logging.makeLogRecord({"msg": "decision", "decision": decision}))
+        self.records += 1
+
+    def close(self):
+        """Write out everything queued and release the file"""
+        if self._shared_key:
+            with _shared_lock:
+                entry = _shared_logs[self._shared_key]
+                entry[1] -= 1
+                if entry[1]:
+                    return
+                del _shared_logs[self._shared_key]
+                self._shared_key = None
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+        self.handler.close()
+        self.file_handler.close()
+
+def log_files(path):
+    """The log and its rotated backups, oldest first"""
+    files = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        files.append(f"{path}.{index}")
+        index += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+def read_records(path):
+    """Yield every decision in the log and its backups in the order they were written"""
+    for name in log_files(path):
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave half a line at the end of the file
+                    continue
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(records):
+    """Latency percentiles and fallback rates across a session's decisions"""
+    moves = 0
+    sources = {}
+    fallbacks = {}
+    phases = {}
+    stages = {}
+    for record in records:
+        moves += 1
+        source = record.get("src", "search")
+        sources[source] = sources.get(source, 0) + 1
+        reason = record.get("fallback")
+        if reason:
+            fallbacks[reason] = fallbacks.get(reason, 0) + 1
+        phase = record.get("phase") or "fixed"
+        phases[phase] = phases.get(phase, 0) + 1
+        for stage, ms in (record.get("ms") or {}).items():
+            stages.setdefault(stage, []).append(ms)
+
+    latency = {}
+    for stage, values in stages.items():
+        latency[stage] = {
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "max": max(values),
+            "mean": sum(values) / len(values),
+        }
+    searched = sources.get("search", 0)
+    return {
+        "moves": moves,
+        "sources": sources,
+        "phases": phases,
+        "fallbacks": fallbacks,
+        "fallback_rate": sum(fallbacks.values()) / searched if searched else 0.0,
+        "latency_ms": latency,
+    }
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+MonkFish Decision Report
+Summarizes a decision log (and its rotated backups): how often MonkFish
+played something other than its drawing candidate, and where the time went
+"""
+
+import argparse
+import json
+import sys
+from config import MonkFishConfig
+from decision_log import log_files, read_records, summarize
+
+STAGES = ("tablebase", "setup", "search", "total")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a MonkFish decision log")
+    parser.add_argument("log", nargs="?", help="decision log (default: decision_log.path from the config)")
+    parser.add_argument("--config", default="monkfish_config.json")
+    parser.add_argument("--output", help="write the summary as JSON")
+    args = parser.parse_args(argv)
+
+    path = args.log or MonkFishConfig(args.config).get_decision_log_path()
+    print("🐟 MonkFish Decision Report")
+    print("=" * 50)
+    files = log_files(path)
+    if not files:
+        print(f"❌ No decision log at {path}")
+        return 1
+    summary = summarize(read_records(path))
+
+    print(f"   {summary['moves']} moves from {len(files)} file(s)")
+    sources = ", ".join(f"{name} {count}" for name, count in sorted(summary["sources"].items()))
+    phases = ", ".join(f"{name} {count}" for name, count in sorted(summary["phases"].items()))
+    print(f"   Sources: {sources}")
+    print(f"   Phases:  {phases}")
+
+    print(f"\n📊 Fallback rate: {summary['fallback_rate'] * 100:.1f}% of searched moves")
+    for reason, count in sorted(summary["fallbacks"].items()):
+        print(f"   {reason:18s} {count}")
+
+    print("\n⏱  Latency (ms)       p50      p95      max")
+    for stage in STAGES:
+        if stage in summary["latency_ms"]:
+            l = summary["latency_ms"][stage]
+            print(f"   {stage:12s} {l['p50']:8.1f} {l['p95']:8.1f} {l['max']:8.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nReport cancelled")
+        sys.exit(1)
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+MonkFish Distributed Analysis
+A coordinator hands position jobs over TCP to MonkFish workers on other
+hosts, each searching with its own local EnginePool.
+
+    python3 distributed.py coordinator --input positions.txt --output results.ndjson
+    python3 distributed.py worker --host coordinator.lan --workers 4
+
+The protocol is one JSON object per line in both directions:
+
+    worker      {"type": "hello", "worker": "<name>", "slots": 4}
+    coordinator {"type": "job", "id": 7, "position": "...", "depth": 3}
+    worker      {"type": "result", "id": 7, "move": "e2e4", "score": 0.0, "seconds": 0.4,
+                 "depth": 3, "nodes": 52000}
+    worker      {"type": "error", "id": 7, "error": "..."}
+    worker      {"type": "renew"}
+    coordinator {"type": "done"}
+
+Every job handed out is leased to one worker. A worker renews its leases
+while it is alive; a lease that expires, or a worker that disconnects,
+puts the job back in the queue until it has been tried `max_attempts`
+times. Results stream back as they complete.
+"""
+
+import argparse
+import itertools
+import json
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from engine_pool import EnginePool
+from monkfish import NoLegalMovesError
+from result_store import ResultStoreWriter
+
+DEFAULT_PORT = 8766
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+def send_message(sock, lock, message):
+    data = (json.dumps(message, separators=(",", ":")) + "\n").encode()
+    with lock:
+        sock.sendall(data)
+
+class DistributedJob:
+    def __init__(self, job_id, position, depth):
+        self.id = job_id
+        self.position = position
+        self.depth = depth
+        self.attempts = 0
+        self.worker = None
+        self.expires = None
+        self.errors = []
+        self.tried = set()
+
+class WorkerConnection:
+    """The coordinator's side of one connected worker"""
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.name = f"{address[0]}:{address[1]}"
+        self.slots = 0
+        self.leased = {}
+        self.lock = threading.Lock()
+        self.alive = True
+        self.connected_at = time.monotonic()
+        self.stats = {"completed": 0, "failed": 0, "lost": 0, "search_seconds": 0.0}
+
+    def send(self, message):
+        send_message(self.sock, self.lock, message)
+
+class Coordinator:
+    """Shards position jobs across TCP workers and streams their results back"""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.host = host
+        self.port = port
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._ids = itertools.count()
+        self._pending = deque()
+        self._jobs = {}
+        self._results = deque()
+        self._workers = []
+        self._finished = {}
+        self._cond = threading.Condition()
+        self._closing = False
+        self._threads = []
+        self._server = None
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "retries": 0, "expired": 0}
+
+    def start(self):
+        self._server = socket.create_server((self.host, self.port))
+        # Port 0 picks a free port; report the real one
+        self.port = self._server.getsockname()[1]
+        self._start_thread(self._accept_loop, "monkfish-coordinator-accept")
+        self._start_thread(self._lease_monitor, "monkfish-coordinator-leases")
+        return self
+
+    def _start_thread(self, target, name, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def submit(self, positions, depth=None):
+        """Queue positions (FENs or "position startpos moves ..." strings); returns their job ids"""
+        ids = []
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("Coordinator is closed")
+            for position in positions:
+                job = DistributedJob(next(self._ids), position, depth)
+                self._jobs[job.id] = job
+                self._pending.append(job)
+                ids.append(job.id)
+            self.counters["submitted"] += len(ids)
+            self._dispatch()
+            self._cond.notify_all()
+        return ids
+
+    def wait_for_workers(self, count, timeout=None):
+        """Block until `count` workers have said hello; False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._workers) >= count, timeout)
+
+    def results(self, timeout=None):
+        """Yield result dicts as they arrive until every submitted job has finished"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while not self._results and self._jobs and not self._closing:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"{len(self._jobs)} jobs still unfinished")
+                    self._cond.wait(remaining if remaining is not None else 1.0)
+                if not self._results:
+                    return
+                result = self._results.popleft()
+            yield result
+
+    def _accept_loop(self):
+        while not self._closing:
+            try:
+                sock, address = self._server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._start_thread(self._serve_worker, f"monkfish-coordinator-{address[1]}",
+                               WorkerConnection(sock, address))
+
+    def _serve_worker(self, worker):
+        try:
+            with worker.sock.makefile("rb") as stream:
+                for line in stream:
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        message = None
+                    if not isinstance(message, dict):
+                        print(f"info string Ignoring malformed message from {worker.name}: {line[:80]!r}",
+                              file=sys.stderr)
+                        continue
+                    try:
+                        self._handle(worker, message)
+                    except (TypeError, ValueError) as e:
+                        # Fields are converted before any state changes, so skipping the line is safe
+                        print(f"info string Ignoring bad {message.get('type')!r} message from {worker.name}: {e}",
+                              file=sys.stderr)
+        except OSError:
+            pass
+        finally:
+            self._lose(worker)
+
+    def _handle(self, worker, message):
+        kind = message.get("type")
+        with self._cond:
+            if kind == "hello":
+                slots = max(1, int(message.get("slots", 1)))
+                worker.name = str(message.get("worker") or worker.name)
+                worker.slots = slots
+                self._workers.append(worker)
+            elif kind == "renew":
+                expires = time.monotonic() + self.lease_seconds
+                for job in worker.leased.values():
+                    job.expires = expires
+            elif kind == "result":
+                job = self._jobs.get(message.get("id"))
+                if job is not None:
+                    self._complete(job, worker, message)
+                worker.leased.pop(message.get("id"), None)
+            elif kind == "error":
+                job = worker.leased.pop(message.get("id"), None)
+                if job is not None:
+                    worker.stats["failed"] += 1
+                    job.errors.append(f"{worker.name}: {message.get('error')}")
+                    self._retry(job)
+            self._dispatch()
+            self._cond.notify_all()
+
+    def _complete(self, job, worker, message):
+        """Record the first result for a job; late duplicates from expired leases are dropped"""
+        seconds = float(message.get("seconds") or 0.0)
+        del self._jobs[job.id]
+        if job.worker is None:
+            # Its lease had expired and it was waiting to be handed out again
+            self._pending.remove(job)
+        elif job.worker is not worker:
+            job.worker.leased.pop(job.id, None)
+        worker.stats["completed"] += 1
+        worker.stats["search_seconds"] += seconds
+        self.counters["completed"] += 1
+        self._results.append({"id": job.id, "position": job.position, "move": message.get("move"),
+                              "score": message.get("score"), "worker": worker.name,
+                              "attempts": job.attempts, "seconds": message.get("seconds"),
+                              "depth": message.get("depth"), "nodes": message.get("nodes")})
+
+    def _retry(self, job):
+        job.worker = None
+        job.expires = None
+        if job.attempts >= self.max_attempts:
+            del self._jobs[job.id]
+            self.counters["failed"] += 1
+            self._results.append({"id": job.id, "position": job.position, "error": "; ".join(job.errors)
+                                  or "worker lost", "attempts": job.attempts})
+        else:
+            self.counters["retries"] += 1
+            self._pending.appendleft(job)
+
+    def _dispatch(self):
+        """Hand queued jobs to workers with free slots (caller holds the lock).
+
+        The least loaded worker wins, preferring one that hasn't already had the job.
+        """
+        while self._pending:
+            free = [w for w in self._workers if w.alive and len(w.leased) < w.slots]
+            if not free:
+                return
+            job = self._pending.popleft()
+            fresh = [w for w in free if w.name not in job.tried] or free
+            worker = min(fresh, key=lambda w: len(w.leased) / w.slots)
+            job.attempts += 1
+            job.tried.add(worker.name)
+            job.worker = worker
+            job.expires = time.monotonic() + self.lease_seconds
+            worker.leased[job.id] = job
+            message = {"type": "job", "id": job.id, "position": job.position, "lease": self.lease_seconds}
+            if job.depth is not None:
+                message["depth"] = job.depth
+            try:
+                worker.send(message)
+            except OSError:
+                # Its reader thread will notice the dead socket and requeue
+                worker.alive = False
+
+    def _lose(self, worker):
+        """Requeue everything a disconnected worker was holding"""
+        with self._cond:
+            worker.alive = False
+            leased, worker.leased = list(worker.leased.values()), {}
+            for job in leased:
+                if job.id in self._jobs:
+                    worker.stats["lost"] += 1
+                    job.errors.append(f"{worker.name}: disconnected")
+                    self._retry(job)
+            if worker in self._workers:
+                self._workers.remove(worker)
+                self._finished[worker.name] = self._worker_stats(worker)
+            self._dispatch()
+            self._cond.notify_all()
+        try:
+            worker.sock.close()
+        except OSError:
+            pass
+
+    def _lease_monitor(self):
+        while True:
+            with self._cond:
+                if self._closing:
+                    return
+                now = time.monotonic()
+                for worker in self._workers:
+                    for job in [j for j in worker.leased.values() if j.expires and j.expires < now]:
+                        del worker.leased[job.id]
+                        worker.stats["lost"] += 1
+                        self.counters["expired"] += 1
+                        job.errors.append(f"{worker.name}: lease expired")
+                        self._retry(job)
+                self._dispatch()
+                self._cond.notify_all()
+                self._cond.wait(min(1.0, self.lease_seconds / 4))
+
+    def _worker_stats(self, worker):
+        connected = time.monotonic() - worker.connected_at
+        stats = dict(worker.stats, slots=worker.slots, connected_seconds=connected)
+        stats["positions_per_second"] = stats["completed"] / connected if connected > 0 else 0.0
+        stats["mean_search_seconds"] = (stats["search_seconds"] / stats["completed"]
+                                        if stats["completed"] else 0.0)
+        return stats
+
+    def worker_stats(self):
+        """Throughput per worker name, including workers that have since disconnected"""
+        with self._cond:
+            stats = dict(self._finished)
+            for worker in self._workers:
+                stats[worker.name] = self._worker_stats(worker)
+            return stats
+
+    def close(self):
+        """Tell connected workers to finish and stop serving"""
+        with self._cond:
+            self._closing = True
+            workers = list(self._workers)
+            self._cond.notify_all()
+        for worker in workers:
+            try:
+                worker.send({"type": "done"})
+            except OSError:
+                pass
+        if self._server:
+            self._server.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class Worker:
+    """Connects to a coordinator and searches its jobs on a local EnginePool"""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, pool_size=1,
+                 config_file="monkfish_config.json", name=None, pool=None):
+        self.host = host
+        self.port = port
+        self.name = name or f"{socket.gethostname()}-{id(self) & 0xffff:04x}"
+        self.pool = pool or EnginePool(pool_size, config_file)
+        self.sock = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.completed = 0
+        self._completed_lock = threading.Lock()
+
+    def _send(self, message):
+        send_message(self.sock, self._lock, message)
+
+    def _search(self, job):
+        started = time.perf_counter()
+        try:
+            with self.pool.engine() as engine:
+                move, score = engine.get_drawing_move(job["position"], job.get("depth"))
+                kind, limit = engine.last_search_limit or (None, None)
+                nodes = engine.last_search_nodes
+            message = {"type": "result", "id": job["id"], "move": move, "score": score,
+                       "seconds": time.perf_counter() - started,
+                       "depth": limit if kind == "depth" else None, "nodes": nodes}
+        except NoLegalMovesError:
+            message = {"type": "result", "id": job["id"], "move": None, "score": None,
+                       "seconds": time.perf_counter() - started}
+        except Exception as e:
+            message = {"type": "error", "id": job["id"], "error": str(e)}
+        try:
+            self._send(message)
+        except OSError:
+            return
+        if message["type"] == "result":
+            with self._completed_lock:
+                self.completed += 1
+
+    def _renew(self, interval):
+        while not self._stopped.wait(interval):
+            try:
+                self._send({"type": "renew"})
+            except OSError:
+                return
+
+    def run(self):
+        """Serve jobs until the coordinator says done or goes away"""
+        self.pool.start()
+        executor = ThreadPoolExecutor(max_workers=self.pool.size)
+        renewer = None
+        try:
+            self.sock = socket.create_connection((self.host, self.port))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._send({"type": "hello", "worker": self.name, "slots": self.pool.size})
+            with self.sock.makefile("rb") as stream:
+                for line in stream:
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        message = None
+                    if not isinstance(message, dict):
+                        print(f"info string Ignoring malformed coordinator message: {line[:80]!r}",
+                              file=sys.stderr)
+                        continue
+                    if message.get("type") == "done":
+                        break
+                    if message.get("type") == "job":
+                        if renewer is None:
+                            # Renew well inside the lease so one slow search never loses it
+                            interval = max(0.05, float(message.get("lease", DEFAULT_LEASE_SECONDS)) / 3)
+                            renewer = threading.Thread(target=self._renew, args=(interval,), daemon=True)
+                            renewer.start()
+                        executor.submit(self._search, message)
+        except OSError as e:
+            print(f"info string Lost coordinator connection: {e}", file=sys.stderr)
+        finally:
+            self._stopped.set()
+            executor.shutdown(wait=True)
+            if self.sock:
+                self.sock.close()
+            self.pool.close()
+        return self.completed
+
+    def stop(self):
+        """Drop the connection; leased jobs go back to the coordinator's queue"""
+        self._stopped.set()
+        if self.sock:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+def read_positions(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spread MonkFish analysis over several hosts")
+    sub = parser.add_subparsers(dest="role", required=True)
+    coordinator = sub.add_parser("coordinator", help="hand out positions and collect results")
+    coordinator.add_argument("--input", required=True, help="one FEN or 'position ...' per line")
+    coordinator.add_argument("--output", help="append results here as NDJSON (default: stdout)")
+    coordinator.add_argument("--store", help="also append results to this columnar result store")
+    coordinator.add_argument("--host", default="0.0.0.0")
+    coordinator.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator.add_argument("--depth", type=int)
+    coordinator.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS)
+    coordinator.add_argument("--attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    coordinator.add_argument("--min-workers", type=int, default=1, help="workers to wait for before starting")
+    worker = sub.add_parser("worker", help="search jobs from a coordinator")
+    worker.add_argument("--host", default="127.0.0.1")
+    worker.add_argument("--port", type=int, default=DEFAULT_PORT)
+    worker.add_argument("--workers", type=int, default=2, help="Stockfish processes on this host")
+    worker.add_argument("--config", default="monkfish_config.json")
+    worker.add_argument("--name")
+    args = parser.parse_args(argv)
+
+    if args.role == "worker":
+        print(f"🐟 MonkFish worker → {args.host}:{args.port}", file=sys.stderr)
+        completed = Worker(args.host, args.port, args.workers, args.config, args.name).run()
+        print(f"   {completed} positions searched", file=sys.stderr)
+        return 0
+
+    positions = read_positions(args.input)
+    print("🐟 MonkFish Distributed Analysis", file=sys.stderr)
+    print("=" * 50, file=sys.stderr)
+    out = open(args.output, "a") if args.output else sys.stdout
+    store = ResultStoreWriter(args.store) if args.store else None
+    started = time.monotonic()
+    with Coordinator(args.host, args.port, args.lease, args.attempts) as coord:
+        print(f"   {len(positions)} positions, listening on port {coord.port}", file=sys.stderr)
+        coord.wait_for_workers(args.min_workers)
+        coord.submit(positions, args.depth)
+        for result in coord.results():
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            if store and not result.get("error"):
+                store.append_result(result)
+        elapsed = time.monotonic() - started
+        print(f"\n📊 {coord.counters['completed']} done, {coord.counters['failed']} failed, "
+              f"{coord.counters['retries']} retries in {elapsed:.1f}s", file=sys.stderr)
+        for name, stats in sorted(coord.worker_stats().items()):
+            print(f"   {name:24s} {stats['completed']:6d} positions  {stats['positions_per_second']:7.2f}/s  "
+                  f"lost {stats['lost']}  failed {stats['failed']}", file=sys.stderr)
+    if args.output:
+        out.close()
+    if store:
+        store.close()
+        print(f"   {store.rows} rows in {args.store}", file=sys.stderr)
+    return 0 if not coord.counters["failed"] else 1
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
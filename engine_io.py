@@ -0,0 +1,108 @@
+import os
+import select
+import time
+
+CHUNK_SIZE = 64 * 1024
+
+# Lines MonkFish never acts on; dropped before they are decoded (blank lines too).
+# Substring checks cost a scan of every line, so none are on by default: callers
+# reject currmove lines for free while looking for " score cp ".
+SKIP_PREFIXES = (b"info string ",)
+SKIP_CONTAINING = ()
+
+class EngineReader:
+    """Buffered line reader over a raw pipe file descriptor.
+
+    Reads large chunks with os.read, splits each chunk into lines in one
+    bytes.split call and drops uninteresting lines with C-level checks
+    before anything is decoded. readline() can wait with a timeout, so a
+    silent engine never blocks the caller forever.
+    """
+
+    def __init__(self, fd, skip_prefixes=SKIP_PREFIXES, skip_containing=SKIP_CONTAINING,
+                 chunk_size=CHUNK_SIZE):
+        self.fd = fd
+        self.skip_prefixes = tuple(skip_prefixes)
+        self.skip_containing = tuple(skip_containing)
+        self.chunk_size = chunk_size
+        self.lines = []
+        self.next = 0
+        self.partial = b""
+        self.eof = False
+        self.last_read = time.monotonic()
+        self.skipped = 0
+
+    def _fill(self, timeout):
+        """Read one chunk and queue its complete lines; False on timeout"""
+        if timeout is not None:
+            ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+            if not ready:
+                return False
+        chunk = os.read(self.fd, self.chunk_size)
+        self.last_read = time.monotonic()
+        if chunk:
+            parts = (self.partial + chunk).split(b"\n")
+            self.partial = parts.pop()
+        else:
+            # A last line without a newline still counts
+            self.eof = True
+            parts, self.partial = [self.partial], b""
+        if b"\r" in chunk:
+            parts = [part.rstrip(b"\r") for part in parts]
+        prefixes = self.skip_prefixes
+        if prefixes:
+            wanted = [part for part in parts if part and not part.startswith(prefixes)]
+        else:
+            wanted = list(filter(None, parts))
+        for marker in self.skip_containing:
+            wanted = [part for part in wanted if marker not in part]
+        self.skipped += len(parts) - len(wanted)
+        self.lines = wanted
+        self.next = 0
+        return True
+
+    def _wait(self, timeout):
+        """Make sure a line is queued; False on timeout or at EOF"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.next >= len(self.lines):
+            if self.eof:
+                return False
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            if not self._fill(remaining):
+                return False
+        return True
+
+    def readline_bytes(self, timeout=None):
+        """Next wanted line without its line ending; b"" at EOF, None on timeout"""
+        if not self._wait(timeout):
+            return b"" if self.eof else None
+        line = self.lines[self.next]
+        self.next += 1
+        return line
+
+    def read_batch(self, timeout=None):
+        """Every queued line at once, for hot loops; [] at EOF, None on timeout.
+
+        Hand lines you don't consume back with unread().
+        """
+        if not self._wait(timeout):
+            return [] if self.eof else None
+        batch = self.lines[self.next:] if self.next else self.lines
+        self.lines, self.next = [], 0
+        return batch
+
+    def unread(self, lines):
+        if lines:
+            self.lines = list(lines) + self.lines[self.next:]
+            self.next = 0
+
+    def readline(self, timeout=None):
+        """Like a text file's readline ("" at EOF); None on timeout"""
+        line = self.readline_bytes(timeout)
+        if line is None:
+            return None
+        if not line:
+            return ""
+        return line.decode("utf-8", "replace") + "\n"
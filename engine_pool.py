@@ -0,0 +1,199 @@
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from config import MonkFishConfig
+from monkfish import MonkFishParser
+from resources import (HostResources, allowed_cpus, numa_nodes, plan_affinity, cpu_nodes, process_affinity,
+                       set_process_affinity)
+from uci_options import UCIOptions
+
+class EnginePool:
+    """Fixed-size pool of MonkFishParser workers built from one config file"""
+
+    def __init__(self, size, config_file="monkfish_config.json", option_overrides=None, config=None,
+                 pin=None):
+        if size < 1:
+            raise ValueError("Engine pool needs at least one worker")
+        self.size = size
+        self.config_file = config_file
+        self.config = config if config is not None else MonkFishConfig(config_file)
+        self.resources = HostResources.detect(self.config)
+        # Split cores and hash so the whole pool stays within the memory budget
+        self.threads_per_worker, self.hash_per_worker = self.resources.split(size)
+        self.option_overrides = dict(option_overrides or {})
+        # Disjoint CPU sets per worker slot when pinning, laid out over the NUMA nodes
+        self.numa_nodes = numa_nodes(allowed=allowed_cpus())
+        self.pin = pin
+        self.affinity = self._plan_affinity()
+        self.workers = []
+        self._slots = {}
+        # Config keys each worker still has to pick up after a hot reload
+        self._stale = {}
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        """Start every worker up front so the first jobs don't pay for engine startup"""
+        try:
+            for slot in range(self.size):
+                worker = self._spawn(slot)
+                with self._lock:
+                    self.workers.append(worker)
+                    self._slots[worker] = slot
+                self._idle.put(worker)
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def _plan_affinity(self):
+        if not (self.pin if self.pin is not None else self.config.get_pin_workers()):
+            return None
+        try:
+            return plan_affinity(self.size, self.threads_per_worker, self.numa_nodes)
+        except ValueError as e:
+            print(f"info string Warning: Not pinning engine workers: {e}", file=sys.stderr)
+            return None
+
+    def _make_options(self):
+        return self._configure(UCIOptions(self.config, self.resources))
+
+    def _configure(self, uci_options, keys=()):
+        """Pool settings over the config's values; `keys` are config keys to re-read first"""
+        uci_options.apply_config_changes(keys)
+        uci_options.set_option("Threads", str(self.threads_per_worker))
+        uci_options.set_option("Hash", str(self.hash_per_worker))
+        for name, value in self.option_overrides.items():
+            if not uci_options.set_option(name, str(value)):
+                raise ValueError(f"Invalid option or value: {name} = {value}")
+        return uci_options
+
+    def _spawn(self, slot):
+        cpus = self.affinity[slot] if self.affinity else None
+        return MonkFishParser(self.config_file, uci_options=self._make_options(), config=self.config,
+                              cpu_affinity=cpus)
+
+    @contextmanager
+    def engine(self, timeout=None):
+        """Borrow an idle worker for the duration of the with-block"""
+        if self._closed:
+            raise RuntimeError("Engine pool is closed")
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No engine became available within {timeout} seconds")
+        try:
+            yield worker
+        finally:
+            self._release(worker)
+
+    def _release(self, worker):
+        if self._closed:
+            worker.quit()
+            return
+        if worker.engine is None or worker.engine.poll() is not None:
+            worker = self._replace(worker)
+            if worker is None:
+                return
+        self._refresh(worker)
+        self._idle.put(worker)
+
+    def apply_config(self, changes):
+        """Roll hot-reloaded config changes out one worker at a time.
+
+        Idle workers are updated now, one by one, each back in the pool
+        before the next is taken out; busy ones are updated as they come
+        back. Stockfish only receives the options whose values changed.
+        """
+        keys = {(section, key) for section, key, _, _ in changes}
+        if any(section == "resources" for section, _ in keys):
+            self.resources = HostResources.detect(self.config)
+            self.threads_per_worker, self.hash_per_worker = self.resources.split(self.size)
+            self.affinity = self._plan_affinity()
+        with self._lock:
+            for worker in self.workers:
+                self._stale.setdefault(worker, set()).update(keys)
+        for _ in range(self._idle.qsize()):
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._refresh(worker)
+            self._idle.put(worker)
+
+    def _refresh(self, worker):
+        with self._lock:
+            keys = self._stale.pop(worker, None)
+            slot = self._slots.get(worker, 0)
+        if keys is None:
+            return
+        try:
+            worker.uci_options.set_resources(self.resources)
+            self._configure(worker.uci_options, keys)
+            cpus = self.affinity[slot] if self.affinity else None
+            if cpus != worker.cpu_affinity:
+                worker.cpu_affinity = cpus
+                if worker.engine is not None:
+                    set_process_affinity(worker.engine.pid, cpus or allowed_cpus())
+            worker.update_options()
+        except Exception as e:
+            print(f"info string Warning: Could not reconfigure pool worker: {e}", file=sys.stderr)
+
+    def _replace(self, worker):
+        """Swap a dead worker for a fresh one, shrinking the pool if that fails"""
+        worker.quit()
+        with self._lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+            slot = self._slots.pop(worker, 0)
+            self._stale.pop(worker, None)
+        try:
+            replacement = self._spawn(slot)
+        except Exception as e:
+            print(f"info string Warning: Could not restart pool worker: {e}", file=sys.stderr)
+            return None
+        with self._lock:
+            self.workers.append(replacement)
+            self._slots[replacement] = slot
+        return replacement
+
+    def placement(self):
+        """Where each worker runs and how fast it has searched, by slot"""
+        with self._lock:
+            workers = sorted(self.workers, key=lambda w: self._slots.get(w, 0))
+            slots = dict(self._slots)
+        report = []
+        for worker in workers:
+            engine = worker.engine
+            cpus = process_affinity(engine.pid) if engine and engine.poll() is None else None
+            report.append({
+                "slot": slots.get(worker, 0),
+                "pid": engine.pid if engine else None,
+                "pinned": worker.cpu_affinity is not None,
+                "cpus": cpus,
+                "numa_nodes": cpu_nodes(cpus, self.numa_nodes) if cpus else [],
+                "threads": self.threads_per_worker,
+                "nodes_searched": worker.nodes_searched,
+                "nps": worker.nps(),
+            })
+        return report
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            workers, self.workers = self.workers, []
+            self._slots = {}
+            self._stale = {}
+        for worker in workers:
+            try:
+                worker.quit()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,71 @@
+import time
+
+# Stockfish search statistics forwarded to the GUI, in UCI order
+STAT_FIELDS = ("depth", "seldepth", "nodes", "nps", "hashfull", "time")
+
+def _emit(line):
+    print(line, flush=True)
+
+class InfoRelay:
+    """Forwards search progress to the GUI at most once per `interval` seconds.
+
+    Stockfish prints one info line per principal variation per depth, which
+    at high MultiPV is far more than a GUI needs. Only the latest line is
+    kept and it is parsed when an update actually goes out, so skipped
+    lines cost a single string check.
+    """
+
+    def __init__(self, emit=_emit, interval=0.1, clock=time.monotonic):
+        self.emit = emit
+        self.interval = interval
+        self.clock = clock
+        self.latest = None
+        self.candidate = None
+        self.sent = 0
+        self.dropped = 0
+        self._last_emit = None
+        self._dirty = False
+
+    def feed(self, line):
+        """Offer a raw Stockfish line (str or bytes); search info is relayed when the interval allows"""
+        if isinstance(line, bytes):
+            if not line.startswith(b"info depth") or b" currmove " in line:
+                return
+        elif not line.startswith("info depth") or " currmove " in line:
+            return
+        self.latest = line
+        self._dirty = True
+        now = self.clock()
+        if self._last_emit is None or now - self._last_emit >= self.interval:
+            self._send(now)
+        else:
+            self.dropped += 1
+
+    def choose(self, move, score):
+        """Record MonkFish's current candidate and its score in pawns"""
+        self.candidate = (move, score)
+        self._dirty = True
+
+    def flush(self):
+        """Send the newest state if anything changed since the last update"""
+        if self._dirty and self.latest:
+            self._send(self.clock())
+
+    def _send(self, now):
+        latest = self.latest
+        if isinstance(latest, bytes):
+            latest = latest.decode("utf-8", "replace")
+        tokens = latest.split()
+        parts = ["info"]
+        for field in STAT_FIELDS:
+            if field in tokens:
+                index = tokens.index(field)
+                if index + 1 < len(tokens):
+                    parts += [field, tokens[index + 1]]
+        if self.candidate:
+            move, score = self.candidate
+            parts += ["currmove", move, "score", "cp", str(round(score * 100))]
+        self.emit(" ".join(parts))
+        self.sent += 1
+        self._last_emit = now
+        self._dirty = False
@@ -2,14 +2,116 @@ import re
 import subprocess
 import os
 import sys
+import threading
+import time
 from typing import Tuple, Optional, Dict
 from config import MonkFishConfig
+from resources import HostResources, set_process_affinity
+from uci_options import parse_option_line
+from option_state import EngineOptionState
+from phase import game_phase, node_budget
+from tablebase import TablebaseProber
+from engine_io import EngineReader
+from decision_log import DecisionLog
+from capitalize import CapitalizeMode
+
+# Pawn value reported for forced mates when a single number is needed
+MATE_SCORE = 100.0
+
+STARTPOS_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Search info is scanned as raw bytes; only the fields MonkFish uses are decoded
+NODES_PATTERN = re.compile(rb" nodes (\d+)")
+
+def drawing_candidate(line: bytes, threshold: float) -> Optional[Tuple[str, float]]:
+    """(first pv move, score in pawns) of an info line scoring within `threshold`, else None.
+
+    Uses bytes.find rather than a regex: at high MultiPV this runs on every
+    line Stockfish prints and the regex was most of the loop's cost.
+    """
+    start = line.find(b" score cp ")
+    if start < 0:
+        return None
+    start += 10
+    end = line.find(b" ", start)
+    if end < 0:
+        return None
+    score = int(line[start:end]) / 100.0
+    if abs(score) > threshold:
+        return None
+    pv = line.find(b" pv ", end)
+    if pv < 0:
+        return None
+    return line[pv + 4:pv + 9].split(b" ", 1)[0].decode(), score
+
+def pv_entry(line: bytes) -> Optional[Tuple[int, int, str, float]]:
+    """(depth, multipv, first pv move, score in pawns) of an info line with an exact score, else None"""
+    if b"bound " in line:
+        # Aspiration-window results, superseded by the exact line that follows
+        return None
+    depth_end = line.find(b" ", 11)
+    pv = line.find(b" pv ")
+    if depth_end < 0 or pv < 0:
+        return None
+    start = line.find(b" score cp ")
+    if start >= 0:
+        end = line.find(b" ", start + 10)
+        score = int(line[start + 10:end]) / 100.0
+    else:
+        start = line.find(b" score mate ")
+        if start < 0:
+            return None
+        end = line.find(b" ", start + 12)
+        score = MATE_SCORE if int(line[start + 12:end]) > 0 else -MATE_SCORE
+    multipv = 1
+    start = line.find(b" multipv ")
+    if start >= 0:
+        multipv = int(line[start + 9:line.find(b" ", start + 9)])
+    return (int(line[11:depth_end]), multipv, line[pv + 4:pv + 9].split(b" ", 1)[0].decode(), score)
+
+def most_equal(lines: Dict[int, Tuple[str, float]]) -> Tuple[str, float]:
+    """(move, score) of the line closest to 0.00; Stockfish's ranking breaks ties"""
+    return min((lines[multipv] for multipv in sorted(lines)), key=lambda line: abs(line[1]))
+
+class NoLegalMovesError(RuntimeError):
+    """Raised when the side to move has no legal moves (checkmate or stalemate)"""
+    def __init__(self, checkmated=False):
+        super().__init__("No legal moves available in this position")
+        self.checkmated = checkmated
 
 class MonkFishParser:
-    def __init__(self, config_file="monkfish_config.json", uci_options=None):
-        self.config = MonkFishConfig(config_file)
+    def __init__(self, config_file="monkfish_config.json", uci_options=None, config=None, cpu_affinity=None):
+        # An explicit MonkFishConfig (e.g. MonkFishConfig.from_dict) skips the config file
+        self.config = config if config is not None else MonkFishConfig(config_file)
         self.uci_options = uci_options
+        # CPUs Stockfish is pinned to (re-applied on every restart), or None to let the OS place it
+        self.cpu_affinity = cpu_affinity
         self.engine = None
+        self.reader = None
+        self.engine_options = {}
+        self.option_state = EngineOptionState()
+        # Reentrant so a go can be sent and marked in flight in one step, ordered against stop()
+        self._write_lock = threading.RLock()
+        # A go is in flight, and whether stop() was sent while it was
+        self._go_active = False
+        self._stop_sent = False
+        # Whether the last search was cut short by stop() before reaching its limit
+        self.last_search_stopped = False
+        self._started_at = time.monotonic()
+        # ("depth", n) or ("nodes", n) of the most recent go and the nodes it used, for retries and accounting
+        self.last_search_limit = None
+        self.last_search_nodes = 0
+        # Running totals behind the engine's measured NPS
+        self.nodes_searched = 0
+        self.search_seconds = 0.0
+        # Compute profile picked for the current game phase, when phase profiles are on
+        self.active_phase = None
+        self.profile = {}
+        # Eval trend deciding when to stop playing for equality, and whether Stockfish is set up for it
+        self.capitalize = CapitalizeMode()
+        self._capitalize_applied = False
+        self.tablebase = TablebaseProber.from_config(self.config)
+        self.decision_log = DecisionLog.from_config(self.config)
         
         try:
             self._start_engine()
@@ -37,27 +139,30 @@ class MonkFishParser:
             )
         
         try:
+            # Unbuffered binary pipes; EngineReader does the buffering and line splitting
             self.engine = subprocess.Popen(
                 stockfish_path,
-                universal_newlines=True,
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                bufsize=1
+                bufsize=0
             )
+            self.reader = EngineReader(self.engine.stdout.fileno())
         except OSError as e:
             raise RuntimeError(
                 f"Failed to start Stockfish: {e}. "
                 f"Make sure Stockfish is compatible with your system."
             )
         
+        if self.cpu_affinity and not set_process_affinity(self.engine.pid, self.cpu_affinity):
+            print("info string Warning: Could not pin Stockfish to its CPUs", file=sys.stderr)
+        
         # Give engine a moment to start
-        import time
         time.sleep(0.1)
         
         # Check if engine started successfully
         if self.engine.poll() is not None:
-            stderr_output = self.engine.stderr.read() if self.engine.stderr else ""
+            stderr_output = self.engine.stderr.read().decode("utf-8", "replace") if self.engine.stderr else ""
             raise RuntimeError(
                 f"Stockfish crashed immediately after starting. "
                 f"Error output: {stderr_output}"
@@ -77,11 +182,14 @@ class MonkFishParser:
     def _init_engine(self):
         self._send_command("uci")
         
-        # Wait for UCI response with timeout
-        uci_response = self._wait_for_response("uciok", timeout=5)
+        # Wait for UCI response with timeout, keeping the options Stockfish advertises
+        uci_response = self._wait_for_response("uciok", timeout=5, collect=self._collect_option)
         if not uci_response:
             raise RuntimeError("Stockfish did not respond to UCI command within 5 seconds")
         
+        if self.uci_options:
+            self.uci_options.merge_engine_options(self.engine_options)
+        self.option_state.seed(self.engine_options)
         self._update_engine_settings()
         self._send_command("isready")
         
@@ -89,7 +197,14 @@ class MonkFishParser:
         if not ready_response:
             raise RuntimeError("Stockfish did not become ready within 5 seconds")
     
-    def _wait_for_response(self, expected_response, timeout=5):
+    def _collect_option(self, line):
+        if line.startswith("option name "):
+            parsed = parse_option_line(line)
+            if parsed:
+                name, spec = parsed
+                self.engine_options[name] = spec
+    
+    def _wait_for_response(self, expected_response, timeout=5, collect=None):
         """Wait for a specific response with timeout"""
         import time
         start_time = time.time()
@@ -99,59 +214,154 @@ class MonkFishParser:
                 raise RuntimeError("Stockfish process terminated unexpectedly")
             
             try:
-                line = self.engine.stdout.readline().strip()
+                line = self._readline(timeout - (time.time() - start_time))
+                if line is None:
+                    break
+                line = line.strip()
                 if expected_response in line:
                     return True
+                if collect:
+                    collect(line)
             except:
                 break
         
         return False
     
-    def _update_engine_settings(self):
-        """Update Stockfish settings based on current UCI options or config"""
+    def _readline(self, timeout=None):
+        """Next line from Stockfish ("" at EOF, None when `timeout` runs out)"""
+        return self.reader.readline(timeout)
+    
+    @property
+    def last_activity(self):
+        """Last time Stockfish produced output; the supervisor's watchdog reads this"""
+        return self.reader.last_read if self.reader else self._started_at
+    
+    def _desired_engine_settings(self):
+        """Engine option values MonkFish wants Stockfish to run with"""
+        if self.uci_options:
+            # Use UCI options if available
+            use_nnue = self.uci_options.get_use_nnue()
+            skill_level = self.uci_options.get_skill_level()
+            multipv = self.uci_options.get_multipv()
+            hash_size = self.uci_options.get_hash()
+            threads = self.uci_options.get_threads()
+            deterministic = self.uci_options.get_deterministic()
+        else:
+            # Fall back to config
+            use_nnue = self.config.get_use_nnue()
+            skill_level = self.config.get_skill_level()
+            multipv = self.config.get_multipv()
+            resources = HostResources.detect(self.config)
+            hash_size = resources.default_hash_mb
+            threads = resources.default_threads
+            deterministic = self.config.get_deterministic()
+        
+        multipv = self.profile.get("multipv", multipv)
+        use_nnue = self.profile.get("use_nnue", use_nnue)
+        if self.capitalize.active:
+            # One full-strength line to convert the advantage
+            multipv, skill_level = 1, self.config.get_capitalize_skill_level()
+        
+        desired = {}
+        nnue_option = self._nnue_option_name()
+        if nnue_option:
+            desired[nnue_option] = use_nnue
+        desired["Skill Level"] = skill_level
+        desired["MultiPV"] = multipv
+        desired["Hash"] = hash_size
+        desired["Threads"] = threads
+        
+        # Stockfish options passed straight through from the GUI
+        if self.uci_options:
+            desired.update(self.uci_options.get_engine_settings())
+        # Let Stockfish use the configured tables too unless the GUI chose its own
+        syzygy_path = self.config.get_syzygy_path()
+        if syzygy_path and "SyzygyPath" in self.engine_options and not desired.get("SyzygyPath"):
+            desired["SyzygyPath"] = syzygy_path
+        if deterministic:
+            # More than one search thread makes node counts and moves vary run to run, and below
+            # full strength Stockfish picks its move with a PRNG seeded from the clock
+            desired["Threads"] = 1
+            desired["Skill Level"] = 20
+            if "UCI_LimitStrength" in self.engine_options or "UCI_LimitStrength" in desired:
+                desired["UCI_LimitStrength"] = False
+        return desired
+    
+    def _update_engine_settings(self, barrier=False):
+        """Send only the options that differ from what Stockfish has applied"""
         try:
-            if self.uci_options:
-                # Use UCI options if available
-                use_nnue = self.uci_options.get_use_nnue()
-                skill_level = self.uci_options.get_skill_level()
-                multipv = self.uci_options.get_multipv()
-                hash_size = self.uci_options.get_hash()
-                threads = self.uci_options.get_threads()
-            else:
-                # Fall back to config
-                use_nnue = self.config.get_use_nnue()
-                skill_level = self.config.get_skill_level()
-                multipv = self.config.get_multipv()
-                hash_size = 128
-                threads = 1
-            
-            self._send_command(f"setoption name UCI_UseNNUE value {str(use_nnue).lower()}")
-            self._send_command(f"setoption name Skill Level value {skill_level}")
-            self._send_command(f"setoption name MultiPV value {multipv}")
-            self._send_command(f"setoption name Hash value {hash_size}")
-            self._send_command(f"setoption name Threads value {threads}")
+            changes = self.option_state.diff(self._desired_engine_settings())
+            buttons = self.uci_options.pop_pending_buttons() if self.uci_options else []
+            for name, value in changes:
+                self._send_command(f"setoption name {name} value {value}")
+            for name in buttons:
+                self._send_command(f"setoption name {name}")
+            if barrier and (changes or buttons):
+                # One isready for the whole burst so we never search on half-applied options
+                self._send_command("isready")
+                self._wait_ready()
+            self.option_state.mark_applied(changes)
+            return len(changes) + len(buttons)
         except Exception as e:
             print(f"info string Warning: Could not set all engine options: {e}", file=sys.stderr)
+            return 0
+    
+    def _nnue_option_name(self):
+        """NNUE switch name differs between Stockfish versions; newer ones have none"""
+        if not self.engine_options:
+            return "UCI_UseNNUE"
+        for name in ("UCI_UseNNUE", "Use NNUE"):
+            if name in self.engine_options:
+                return name
+        return None
     
     def update_options(self):
         """Update engine settings when UCI options change"""
         try:
-            self._update_engine_settings()
+            return self._update_engine_settings(barrier=True)
         except Exception as e:
             print(f"info string Warning: Could not update engine options: {e}", file=sys.stderr)
+            return 0
         
     def _send_command(self, cmd: str):
-        if self.engine and self.engine.stdin:
+        engine = self.engine
+        if engine and engine.stdin:
             try:
-                self.engine.stdin.write(f"{cmd}\n")
-                self.engine.stdin.flush()
-            except (BrokenPipeError, OSError):
+                with self._write_lock:
+                    engine.stdin.write(f"{cmd}\n".encode())
+                    engine.stdin.flush()
+            except (BrokenPipeError, OSError, ValueError):
                 raise RuntimeError("Lost connection to Stockfish engine")
+    
+    def stop(self):
+        """Ask a running search to finish now; safe to call from another thread"""
+        try:
+            with self._write_lock:
+                self._stop_sent = self._go_active
+                self._send_command("stop")
+        except RuntimeError:
+            pass
+    
+    def _send_go(self, command):
+        with self._write_lock:
+            self._go_active, self._stop_sent = True, False
+            self._send_command(command)
+    
+    def _search_ended(self, kind, limit, last_info):
+        """Record whether the search that just answered bestmove was interrupted by stop()"""
+        with self._write_lock:
+            self._go_active = False
+            stopped = self._stop_sent
+        if stopped and kind == "depth" and last_info:
+            stopped = int(last_info[11:last_info.find(b" ", 11)]) < limit
+        elif stopped and kind == "nodes":
+            stopped = self.last_search_nodes < limit
+        self.last_search_stopped = stopped
         
     def _wait_ready(self):
         while True:
             try:
-                line = self.engine.stdout.readline().strip()
+                line = self._readline().strip()
                 if line == "readyok":
                     break
                 if not line and self.engine.poll() is not None:
@@ -159,69 +369,421 @@ class MonkFishParser:
             except:
                 raise RuntimeError("Error reading from Stockfish")
                 
-    def _parse_info_line(self, line: str) -> Optional[Dict]:
-        pattern = r"info depth (\d+).*score cp (-?\d+).*pv ([a-h]\d[a-h]\d(?:[nbrq])?)"
-        match = re.search(pattern, line)
-        if not match:
+    def ping(self):
+        """Round-trip an isready to check Stockfish is still responsive"""
+        self._send_command("isready")
+        self._wait_ready()
+    
+    def new_game(self):
+        """Reset Stockfish's game state (hash, history) between games"""
+        self._send_command("ucinewgame")
+        self._send_command("isready")
+        self._wait_ready()
+    
+    def get_fen(self):
+        """FEN of the position last sent, as reported by Stockfish's `d` command"""
+        self._send_command("d")
+        fen = None
+        while True:
+            line = self._readline()
+            if not line:
+                raise RuntimeError("Stockfish process terminated")
+            line = line.strip()
+            if line.startswith("Fen:"):
+                fen = line[4:].strip()
+            elif line.startswith("Checkers:"):
+                return fen
+    
+    def _send_position(self, position: str):
+        if position.startswith("position"):
+            moves = position.split("moves ")[1] if "moves " in position else ""
+            self._send_command(f"position startpos moves {moves}")
+        else:
+            self._send_command(f"position fen {position}")
+    
+    def search_depth(self, target_depth=None):
+        """Depth a search runs to when the caller doesn't ask for one"""
+        if target_depth is not None:
+            return target_depth
+        if "depth" in self.profile:
+            return self.profile["depth"]
+        if self.uci_options:
+            return self.uci_options.get_search_depth()
+        return self.config.get_default_depth()
+    
+    def is_deterministic(self):
+        if self.uci_options:
+            return self.uci_options.get_deterministic()
+        return self.config.get_deterministic()
+    
+    def _nodes_per_pv(self):
+        if self.uci_options:
+            return self.uci_options.get_search_nodes()
+        return self.config.get_search_nodes()
+    
+    def node_budget(self, fen):
+        """Nodes a node-budgeted search may spend in `fen`, or None when searching to a depth"""
+        nodes_per_pv = self._nodes_per_pv()
+        if not nodes_per_pv:
+            return None
+        multipv = self.uci_options.get_multipv() if self.uci_options else self.config.get_multipv()
+        multipv = self.profile.get("multipv", multipv)
+        return node_budget(nodes_per_pv, multipv, game_phase(fen))
+    
+    def _position_fen(self, position):
+        fen = self.get_fen() if position.startswith("position") else position
+        return fen or STARTPOS_FEN
+    
+    def count_legal_moves(self):
+        """Legal moves in the position last sent, from Stockfish's `go perft 1`"""
+        self._send_command("go perft 1")
+        while True:
+            line = self._readline()
+            if not line:
+                raise RuntimeError("Stockfish process terminated")
+            if line.startswith("Nodes searched:"):
+                return int(line.split(":")[1])
+    
+    def _profiles_enabled(self):
+        if self.uci_options:
+            return self.uci_options.get_phase_profiles()
+        return self.config.get_profiles_enabled()
+    
+    def _apply_profile(self, position):
+        """Switch compute profile when the game phase changes; options are only sent on a switch.
+
+        Returns the position's FEN when it had to be looked up, else None.
+        """
+        fen, phase, profile = None, None, {}
+        if self._profiles_enabled():
+            fen = self._position_fen(position)
+            phase = game_phase(fen, self.count_legal_moves())
+            profile = self.config.get_profile(phase)
+        if phase != self.active_phase:
+            self.active_phase = phase
+            self.profile = dict(profile)
+            self._update_engine_settings(barrier=True)
+        return fen
+    
+    def _capitalize_enabled(self):
+        if self.uci_options:
+            return self.uci_options.get_capitalize()
+        return self.config.get_capitalize_enabled()
+    
+    def _apply_capitalize(self):
+        """Whether this search converts an advantage; Stockfish's options follow mode switches"""
+        if not self._capitalize_enabled():
+            self.capitalize.reset()
+        if self.capitalize.active != self._capitalize_applied:
+            self._capitalize_applied = self.capitalize.active
+            self._update_engine_settings(barrier=True)
+        return self.capitalize.active
+    
+    def _track_capitalize(self, top_info, seconds):
+        """Feed the finished search's best-line eval into the mode switch"""
+        self.capitalize.record(self.last_search_nodes, seconds)
+        entry = pv_entry(top_info) if top_info else None
+        if entry is None or not self._capitalize_enabled():
+            return
+        score = entry[3]
+        if not self.capitalize.update(score, self.config.get_capitalize_margin(),
+                                      self.config.get_capitalize_exit_margin(),
+                                      self.config.get_capitalize_confirm_moves()):
+            return
+        if self.capitalize.active:
+            print(f"info string Capitalize mode on at {score:+.2f}", file=sys.stderr)
+        else:
+            saved = self.capitalize.savings()
+            print(f"info string Capitalize mode off at {score:+.2f}; {saved['moves']} moves so far saved "
+                  f"~{saved['nodes_saved']} nodes, {saved['seconds_saved']:.2f}s", file=sys.stderr)
+    
+    def _search_limit(self, position, target_depth, nodes, fen=None, capitalizing=False):
+        """An explicit depth or node count wins; otherwise the node budget, then the default depth"""
+        if capitalizing and target_depth is None and nodes is None:
+            depth = self.config.get_capitalize_depth()
+            return ("depth", depth) if depth else ("movetime", self.config.get_capitalize_movetime_ms())
+        if target_depth is None and nodes is None and self._nodes_per_pv():
+            nodes = self.node_budget(fen or self._position_fen(position))
+        if target_depth is None and nodes is not None:
+            return ("nodes", nodes)
+        return ("depth", self.search_depth(target_depth))
+    
+    def _probe_tablebase(self, position):
+        """Answer from Syzygy tables before searching; None means search as usual"""
+        if not self.tablebase:
             return None
-        depth, score, move = match.groups()
-        return {
-            "depth": int(depth),
-            "score": int(score) / 100.0,
-            "pv": move
-        }
-        
-    def get_drawing_move(self, position: str, target_depth: int = None) -> Tuple[str, float]:
+        try:
+            result = self.tablebase.probe(position)
+        except (ValueError, OSError) as e:
+            print(f"info string Warning: Tablebase probe failed: {e}", file=sys.stderr)
+            return None
+        if result:
+            self.last_search_limit = ("tablebase", 0)
+        return result
+    
+    def _log_decision(self, position, move, candidate, info_lines, marks):
+        """Queue the decision record; `marks` are perf_counter times at start, after the
+        tablebase probe, when go was sent and at bestmove"""
+        started, probe_done, search_started, finished = marks
+        if candidate is None:
+            fallback = "no_candidate"
+        elif candidate[0] != move:
+            fallback = "candidate_differs"
+        else:
+            fallback = None
+        self.decision_log.record(
+            position, move, candidate[1] if candidate else 0.0,
+            candidate=list(candidate) if candidate else None, fallback=fallback,
+            phase=self.active_phase, limit=self.last_search_limit, lines=info_lines,
+            timings={"tablebase": probe_done - started, "setup": search_started - probe_done,
+                     "search": finished - search_started, "total": finished - started})
+    
+    def get_drawing_move(self, position: str, target_depth: int = None, relay=None,
+                         nodes: int = None, trace=None) -> Tuple[str, float]:
+        """Search `position`; progress goes to `relay` (an InfoRelay) and stage
+        timestamps to `trace` (a debug_hooks.MoveTrace) when given"""
         if not self.engine or self.engine.poll() is not None:
             raise RuntimeError("Stockfish engine is not running")
         
+        self.last_search_limit = None
+        self.last_search_nodes = 0
+        self.last_search_stopped = False
+        started = time.perf_counter()
+        probed = self._probe_tablebase(position)
+        probe_done = time.perf_counter()
+        if probed:
+            if relay:
+                relay.choose(*probed)
+            if self.decision_log:
+                self.decision_log.record(position, probed[0], probed[1], source="tablebase",
+                                         phase=self.active_phase, limit=self.last_search_limit,
+                                         timings={"tablebase": probe_done - started,
+                                                  "total": probe_done - started})
+            return probed
         try:
-            if target_depth is None:
-                if self.uci_options:
-                    target_depth = self.uci_options.get_search_depth()
-                else:
-                    target_depth = self.config.get_default_depth()
-                
-            if position.startswith("position"):
-                position = position.split("moves ")[1] if "moves" in position else ""
-                self._send_command(f"position startpos moves {position}")
-            else:
-                self._send_command(f"position fen {position}")
-                    
-            self._send_command(f"go depth {target_depth}")
-            best_info = None
+            if self.is_deterministic():
+                # Start every search from an empty hash so earlier searches can't change the result
+                self.new_game()
+            self._send_position(position)
+            fen = self._apply_profile(position)
+            capitalizing = self._apply_capitalize()
+            kind, limit = self._search_limit(position, target_depth, nodes, fen, capitalizing)
+            self.last_search_limit = (kind, limit)
+            if trace:
+                trace.mark("position_sent")
+            self._send_go(f"go {kind} {limit}")
+            search_started = time.perf_counter()
+            if trace:
+                trace.mark("go_sent")
+            best = None
+            checkmated = False
+            last_info = b""
+            # Latest multipv 1 line; its score is the eval the capitalize switch follows
+            top_info = None
+            # Raw info lines for the decision log; parsed later on its writer thread
+            info_lines = [] if self.decision_log else None
             
             # Get drawing threshold from UCI options or config
             if self.uci_options:
                 drawing_threshold = self.uci_options.get_drawing_threshold()
             else:
                 drawing_threshold = self.config.get_drawing_threshold()
+            drawing_threshold = self.profile.get("drawing_threshold", drawing_threshold)
             
             # Wait for response with timeout
-            import time
             start_time = time.time()
             timeout = 30  # 30 second timeout
             
             while time.time() - start_time < timeout:
-                line = self.engine.stdout.readline().strip()
+                # Whole batches keep the per-line work to a few bytes methods
+                batch = self.reader.read_batch(timeout - (time.time() - start_time))
+                if batch is None:
+                    break
+                if not batch:
+                    raise RuntimeError("Stockfish process terminated")
+                if trace:
+                    trace.output()
                 
-                if "bestmove" in line:
-                    bestmove = line.split()[1]
-                    if bestmove == "(none)":
-                        raise RuntimeError("No legal moves available in this position")
-                    return bestmove, best_info["score"] if best_info else 0.0
+                for index, line in enumerate(batch):
+                    if line.startswith(b"bestmove"):
+                        self.reader.unread(batch[index + 1:])
+                        if trace:
+                            trace.mark("bestmove")
+                        bestmove = line.split()[1].decode()
+                        if bestmove == "(none)":
+                            raise NoLegalMovesError(checkmated)
+                        if capitalizing:
+                            # Stockfish's own best move; equality is no longer the goal
+                            top = pv_entry(top_info) if top_info else None
+                            best = (bestmove, top[3] if top else 0.0)
+                            if relay:
+                                relay.choose(*best)
+                        if relay:
+                            relay.flush()
+                        nodes_used = NODES_PATTERN.search(last_info)
+                        self.last_search_nodes = int(nodes_used.group(1)) if nodes_used else 0
+                        self.nodes_searched += self.last_search_nodes
+                        search_seconds = time.perf_counter() - search_started
+                        self.search_seconds += search_seconds
+                        self._search_ended(kind, limit, last_info)
+                        self._track_capitalize(top_info, search_seconds)
+                        if self.decision_log:
+                            self._log_decision(position, bestmove, best, info_lines,
+                                               (started, probe_done, search_started, time.perf_counter()))
+                        return bestmove, best[1] if best else 0.0
                     
-                info = self._parse_info_line(line)
-                if info and abs(info["score"]) <= drawing_threshold:
-                    best_info = info
+                    if not line.startswith(b"info depth"):
+                        continue
+                    if line.startswith(b"info depth 0 score mate"):
+                        checkmated = True
+                    last_info = line
+                    multipv = line.find(b" multipv ")
+                    if ((multipv < 0 or line.startswith(b"1 ", multipv + 9))
+                            and b" pv " in line and b"bound " not in line):
+                        top_info = line
+                    if info_lines is not None:
+                        info_lines.append(line)
+                    
+                    candidate = drawing_candidate(line, drawing_threshold)
+                    if candidate:
+                        best = candidate
+                        if relay:
+                            relay.choose(*candidate)
+                    if relay:
+                        relay.feed(line)
             
             raise RuntimeError(f"Engine did not respond within {timeout} seconds")
             
+        except NoLegalMovesError:
+            raise
         except Exception as e:
             print(f"info string Error in get_drawing_move: {e}", file=sys.stderr)
             raise
+    
+    def analyse(self, position: str, searchmoves=None, relay=None, stop_event=None) -> Tuple[str, float]:
+        """Search `position` with `go infinite` until stop() and return the recommendation.
+
+        Whoever calls stop() should set `stop_event` first: a stop that arrives
+        before the go went out is then repeated instead of lost.
+
+        The recommendation is the most equal line of the last completed depth.
+        `relay` gets it immediately whenever the move changes; everything else
+        goes out at its usual throttled rate, so output stays bounded however
+        long the analysis runs.
+        """
+        if not self.engine or self.engine.poll() is not None:
+            raise RuntimeError("Stockfish engine is not running")
+        
+        self.last_search_limit = None
+        self.last_search_nodes = 0
+        if self.is_deterministic():
+            self.new_game()
+        self._send_position(position)
+        self._apply_profile(position)
+        command = "go infinite"
+        if searchmoves:
+            command += " searchmoves " + " ".join(searchmoves)
+        self._send_command(command)
+        if stop_event is not None and stop_event.is_set():
+            self.stop()
+        search_started = time.perf_counter()
+        recommendation = None
+        checkmated = False
+        last_info = b""
+        # PV lines of the depth in progress by multipv, and how many lines a complete depth has
+        depth, lines, width = 0, {}, 0
+        
+        def recommend(lines):
+            nonlocal recommendation
+            previous, recommendation = recommendation, most_equal(lines)
+            if relay:
+                relay.choose(*recommendation)
+                if previous is None or previous[0] != recommendation[0]:
+                    relay.flush()
+        
+        while True:
+            batch = self.reader.read_batch()
+            if not batch:
+                raise RuntimeError("Stockfish process terminated")
+            for index, line in enumerate(batch):
+                if line.startswith(b"bestmove"):
+                    self.reader.unread(batch[index + 1:])
+                    bestmove = line.split()[1].decode()
+                    if bestmove == "(none)":
+                        raise NoLegalMovesError(checkmated)
+                    # The depth interrupted by stop only counts if all its lines came out
+                    if lines and (len(lines) >= width or recommendation is None):
+                        recommend(lines)
+                    nodes_used = NODES_PATTERN.search(last_info)
+                    self.last_search_nodes = int(nodes_used.group(1)) if nodes_used else 0
+                    self.nodes_searched += self.last_search_nodes
+                    self.search_seconds += time.perf_counter() - search_started
+                    if relay:
+                        relay.flush()
+                    return recommendation or (bestmove, 0.0)
+                
+                if not line.startswith(b"info depth"):
+                    continue
+                if line.startswith(b"info depth 0 score mate"):
+                    checkmated = True
+                last_info = line
+                entry = pv_entry(line)
+                if entry is None:
+                    continue
+                line_depth, multipv, move, score = entry
+                if line_depth > depth:
+                    # A new depth means the previous one is complete
+                    if lines:
+                        width = max(width, len(lines))
+                        recommend(lines)
+                    depth, lines = line_depth, {}
+                lines[multipv] = (move, score)
+                if relay:
+                    relay.feed(line)
+    
+    def nps(self):
+        """Nodes per second over every search this parser has run"""
+        return int(self.nodes_searched / self.search_seconds) if self.search_seconds else 0
+    
+    def evaluate_move(self, position: str, move: str, depth: int) -> float:
+        """Score one move from the side to move's point of view, in pawns"""
+        if not self.engine or self.engine.poll() is not None:
+            raise RuntimeError("Stockfish engine is not running")
+        
+        self._send_position(position)
+        self._send_command(f"go depth {depth} searchmoves {move}")
+        score = 0.0
+        
+        import time
+        start_time = time.time()
+        timeout = 30
+        
+        while time.time() - start_time < timeout:
+            line = self._readline(timeout - (time.time() - start_time))
+            if line is None:
+                break
+            if not line:
+                raise RuntimeError("Stockfish process terminated")
+            line = line.strip()
+            if line.startswith("bestmove"):
+                return score
+            match = re.search(r"^info depth \d+.* score (cp|mate) (-?\d+)", line)
+            if match:
+                kind, value = match.group(1), int(match.group(2))
+                if kind == "cp":
+                    score = value / 100.0
+                else:
+                    score = MATE_SCORE if value > 0 else -MATE_SCORE
+        
+        raise RuntimeError(f"Engine did not respond within {timeout} seconds")
         
     def quit(self):
+        if self.decision_log:
+            self.decision_log.close()
+            self.decision_log = None
+        if self.tablebase:
+            self.tablebase.close()
+            self.tablebase = None
         if self.engine:
             try:
                 self._send_command("quit")
@@ -229,6 +791,18 @@ class MonkFishParser:
             except:
                 pass
             finally:
-                if self.engine.poll() is None:
-                    self.engine.terminate()
-                self.engine = None
\ No newline at end of file
+                engine, self.engine = self.engine, None
+                if engine.poll() is None:
+                    engine.terminate()
+                    try:
+                        engine.wait(timeout=3)
+                    except subprocess.TimeoutExpired:
+                        engine.kill()
+                        engine.wait()
+                # Close our pipe ends now; over many engine restarts they would pile up
+                for pipe in (engine.stdin, engine.stdout, engine.stderr):
+                    if pipe:
+                        try:
+                            pipe.close()
+                        except OSError:
+                            pass
\ No newline at end of file
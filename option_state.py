@@ -0,0 +1,41 @@
+def format_option_value(value):
+    """Render an option value the way it goes on a setoption line"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None or value == "":
+        return "<empty>"
+    return str(value)
+
+class EngineOptionState:
+    """Tracks the option values Stockfish has actually applied.
+
+    Updates are reconciled against this state so only changed options are
+    sent; re-sending an unchanged Hash or Threads would make Stockfish
+    reallocate its transposition table or thread pool for nothing.
+    """
+
+    def __init__(self, engine_options=None):
+        self.applied = {}
+        self.sent = 0
+        if engine_options:
+            self.seed(engine_options)
+
+    def seed(self, engine_options):
+        """Start from the defaults Stockfish advertised during the handshake"""
+        for name, spec in engine_options.items():
+            if spec.get("type") != "button":
+                self.applied[name] = format_option_value(spec.get("default"))
+
+    def diff(self, desired):
+        """(name, value) pairs from `desired` that differ from what is applied"""
+        changes = []
+        for name, value in desired.items():
+            value = format_option_value(value)
+            if self.applied.get(name) != value:
+                changes.append((name, value))
+        return changes
+
+    def mark_applied(self, changes):
+        for name, value in changes:
+            self.applied[name] = value
+        self.sent += len(changes)
@@ -0,0 +1,39 @@
+# Non-pawn material weights used to place a position between opening and endgame
+PIECE_PHASE = {"n": 1, "b": 1, "r": 2, "q": 4}
+MAX_PHASE = 24
+
+# Share of the node budget each phase gets. Openings have many near-equal
+# moves and forgive imprecision; endgames are narrow and reach depth cheaply.
+PHASE_NODE_FACTORS = {"opening": 0.5, "middlegame": 1.0, "endgame": 0.75}
+
+def material_phase(fen):
+    """Non-pawn material left on the board: 24 at the start, 0 with only kings and pawns"""
+    board = fen.split()[0]
+    total = sum(PIECE_PHASE.get(char.lower(), 0) for char in board)
+    return min(MAX_PHASE, total)
+
+def move_number(fen):
+    fields = fen.split()
+    if len(fields) > 5 and fields[5].isdigit():
+        return int(fields[5])
+    return 1
+
+def game_phase(fen, legal_moves=None):
+    """Classify a FEN as "opening", "middlegame" or "endgame".
+
+    `legal_moves`, when known, refines the material count: a wide position
+    with most pieces on is still searched like an opening, and a narrow one
+    with little material left like an endgame.
+    """
+    material = material_phase(fen)
+    if material <= 8:
+        return "endgame"
+    if material >= 20 and (move_number(fen) <= 12 or (legal_moves or 0) >= 35):
+        return "opening"
+    if legal_moves is not None and legal_moves <= 12 and material <= 12:
+        return "endgame"
+    return "middlegame"
+
+def node_budget(nodes_per_pv, multipv, phase):
+    """Total nodes for a search: the per-PV budget times MultiPV, weighted by phase"""
+    return max(1, int(nodes_per_pv * max(1, multipv) * PHASE_NODE_FACTORS.get(phase, 1.0)))
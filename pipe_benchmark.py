@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+MonkFish Pipe Reader Benchmark
+Pushes recorded high-MultiPV Stockfish output through a pipe and compares
+the old text-mode readline loop with EngineReader's byte-level reader
+"""
+
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+from engine_io import EngineReader
+from monkfish import drawing_candidate
+
+OLD_INFO_PATTERN = r"info depth (\d+).*score cp (-?\d+).*pv ([a-h]\d[a-h]\d(?:[nbrq])?)"
+
+PV_MOVES = ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6", "b5a4", "g8f6", "e1g1", "f8e7",
+            "f1e1", "b7b5", "a4b3", "d7d6", "c2c3", "e8g8", "h2h3", "c6a5", "b3c2", "c7c5"]
+
+def synthetic_search(multipv=40, depth=20):
+    """Output shaped like one Stockfish search at `multipv`, with currmove and info string noise"""
+    lines = ["info string NNUE evaluation using nn-5af11540bbfe.nnue enabled"]
+    nodes = 0
+    for d in range(1, depth + 1):
+        for number in range(1, 6):
+            lines.append(f"info depth {d} currmove {PV_MOVES[number]} currmovenumber {number}")
+        for pv in range(1, multipv + 1):
+            nodes += 1500 * d
+            score = (pv * 7 + d * 3) % 120 - 60
+            line = " ".join(PV_MOVES[(pv + i) % len(PV_MOVES)] for i in range(min(d, 16)))
+            lines.append(f"info depth {d} seldepth {d + 6} multipv {pv} score cp {score} nodes {nodes} "
+                         f"nps 1250000 hashfull {min(999, d * 40)} tbhits 0 time {nodes // 1250} pv {line}")
+    lines.append("bestmove e2e4 ponder e7e5")
+    return ("\n".join(lines) + "\n").encode()
+
+def _feed(fd, data, repeat):
+    try:
+        for _ in range(repeat):
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+    finally:
+        os.close(fd)
+
+def _run(reader_loop, data, repeat):
+    read_fd, write_fd = os.pipe()
+    writer = threading.Thread(target=_feed, args=(write_fd, data, repeat), daemon=True)
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+    writer.start()
+    searches = reader_loop(read_fd)
+    cpu = time.thread_time() - cpu_start
+    elapsed = time.perf_counter() - start
+    writer.join()
+    return {"seconds": elapsed, "reader_cpu": cpu, "searches": searches}
+
+def text_loop(fd, threshold=0.5):
+    """The original loop: text-mode readline, strip and a regex on every line"""
+    searches = 0
+    with open(fd, "r", encoding="utf-8") as stream:
+        best = None
+        while True:
+            line = stream.readline()
+            if not line:
+                return searches
+            line = line.strip()
+            if "bestmove" in line:
+                searches += 1
+                best = None
+                continue
+            match = re.search(OLD_INFO_PATTERN, line)
+            if match and abs(int(match.group(2)) / 100.0) <= threshold:
+                best = match.group(3)
+
+def byte_loop(fd, threshold=0.5):
+    """EngineReader: chunked reads, noise dropped before decoding, find-based parsing of info lines"""
+    searches = 0
+    reader = EngineReader(fd)
+    try:
+        best = None
+        while True:
+            batch = reader.read_batch()
+            if not batch:
+                return searches
+            for line in batch:
+                if line.startswith(b"bestmove"):
+                    searches += 1
+                    best = None
+                    continue
+                candidate = drawing_candidate(line, threshold)
+                if candidate:
+                    best = candidate
+    finally:
+        os.close(fd)
+
+def compare(data, repeat=50, rounds=5):
+    """Alternate the two loops `rounds` times and keep each one's fastest run"""
+    old = new = None
+    for _ in range(rounds):
+        run = _run(text_loop, data, repeat)
+        if old is None or run["seconds"] < old["seconds"]:
+            old = run
+        run = _run(byte_loop, data, repeat)
+        if new is None or run["seconds"] < new["seconds"]:
+            new = run
+    lines = data.count(b"\n") * repeat
+    megabytes = len(data) * repeat / (1024 * 1024)
+    for result in (old, new):
+        result["lines_per_second"] = lines / result["seconds"] if result["seconds"] else 0.0
+        result["mb_per_second"] = megabytes / result["seconds"] if result["seconds"] else 0.0
+    speedup = old["seconds"] / new["seconds"] if new["seconds"] else 0.0
+    return {"lines": lines, "megabytes": megabytes, "text": old, "bytes": new, "speedup": speedup}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare Stockfish pipe reading strategies")
+    parser.add_argument("--recording", help="file with captured Stockfish output (default: synthetic MultiPV 40)")
+    parser.add_argument("--multipv", type=int, default=40)
+    parser.add_argument("--depth", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50, help="times the recording is replayed")
+    parser.add_argument("--rounds", type=int, default=5, help="alternating runs; the fastest of each counts")
+    args = parser.parse_args(argv)
+
+    if args.recording:
+        with open(args.recording, "rb") as f:
+            data = f.read()
+    else:
+        data = synthetic_search(args.multipv, args.depth)
+
+    print("🐟 MonkFish Pipe Reader Benchmark")
+    print("=" * 50)
+    report = compare(data, args.repeat, args.rounds)
+    print(f"   {report['lines']} lines, {report['megabytes']:.1f} MB")
+    for name in ("text", "bytes"):
+        r = report[name]
+        print(f"   {name:6s} {r['seconds']:7.3f}s  {r['lines_per_second']:>12,.0f} lines/s  "
+              f"{r['mb_per_second']:7.1f} MB/s  reader CPU {r['reader_cpu']:.3f}s")
+    print(f"\n📊 Byte reader speedup: {report['speedup']:.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nBenchmark cancelled")
+        sys.exit(1)
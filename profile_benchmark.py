@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+MonkFish Phase Profile Benchmark
+Replays the positions of a self-played game with fixed settings and with
+phase profiles, and compares the CPU time each spends on the whole game
+"""
+
+import argparse
+import json
+import sys
+import time
+from ab_test import _is_repetition
+from config import MonkFishConfig
+from monkfish import MonkFishParser, NoLegalMovesError
+from resources import process_cpu_seconds
+from uci_options import UCIOptions
+
+def self_play_positions(config_file, max_plies=80):
+    """Positions of one MonkFish-vs-MonkFish game from the start position"""
+    parser = MonkFishParser(config_file, uci_options=UCIOptions(MonkFishConfig(config_file)))
+    moves, positions = [], []
+    try:
+        while len(moves) < max_plies:
+            position = "position startpos moves " + " ".join(moves) if moves else "position startpos"
+            try:
+                move, _ = parser.get_drawing_move(position)
+            except NoLegalMovesError:
+                break
+            positions.append(position)
+            moves.append(move)
+            if _is_repetition(moves):
+                break
+    finally:
+        parser.quit()
+    return positions
+
+def measure(config_file, positions, profiles):
+    """CPU seconds (Stockfish + MonkFish) and wall time to search every position"""
+    uci_options = UCIOptions(MonkFishConfig(config_file))
+    uci_options.set_option("Phase_Profiles", "true" if profiles else "false")
+    parser = MonkFishParser(config_file, uci_options=uci_options)
+    phases = {}
+    try:
+        pid = parser.engine.pid
+        engine_start = process_cpu_seconds(pid) or 0.0
+        own_start = time.process_time()
+        wall_start = time.perf_counter()
+        for position in positions:
+            try:
+                parser.get_drawing_move(position)
+            except NoLegalMovesError:
+                pass
+            phase = parser.active_phase or "fixed"
+            phases[phase] = phases.get(phase, 0) + 1
+        wall = time.perf_counter() - wall_start
+        own = time.process_time() - own_start
+        engine = (process_cpu_seconds(pid) or 0.0) - engine_start
+    finally:
+        parser.quit()
+    return {"engine_cpu": engine, "monkfish_cpu": own, "total_cpu": engine + own,
+            "wall": wall, "moves": len(positions), "phases": phases}
+
+def compare(config_file, positions):
+    fixed = measure(config_file, positions, profiles=False)
+    profiled = measure(config_file, positions, profiles=True)
+    saving = 0.0
+    if fixed["total_cpu"] > 0:
+        saving = (fixed["total_cpu"] - profiled["total_cpu"]) / fixed["total_cpu"]
+    return {"fixed": fixed, "profiles": profiled, "cpu_saving": saving}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare game CPU time with and without phase profiles")
+    parser.add_argument("--config", default="monkfish_config.json")
+    parser.add_argument("--plies", type=int, default=80, help="length of the self-played game")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    print("🐟 MonkFish Phase Profile Benchmark")
+    print("=" * 50)
+    positions = self_play_positions(args.config, args.plies)
+    print(f"   Game of {len(positions)} plies")
+    report = compare(args.config, positions)
+
+    for name in ("fixed", "profiles"):
+        r = report[name]
+        phases = ", ".join(f"{phase} {count}" for phase, count in sorted(r["phases"].items()))
+        print(f"   {name:9s} CPU {r['total_cpu']:7.2f}s (Stockfish {r['engine_cpu']:.2f}s, "
+              f"MonkFish {r['monkfish_cpu']:.2f}s)  wall {r['wall']:.2f}s  [{phases}]")
+    print(f"\n📊 CPU saving with profiles: {report['cpu_saving'] * 100:+.1f}%")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nBenchmark cancelled")
+        sys.exit(1)
@@ -0,0 +1,301 @@
+import math
+import os
+
+# Memory a Stockfish process needs besides its hash table (binary, NNUE net, stacks)
+ENGINE_OVERHEAD_MB = 64
+# Hash handed to each search thread by default
+HASH_PER_THREAD_MB = 64
+# Budget assumed when the platform gives us no way to read physical memory
+FALLBACK_MEMORY_MB = 4096
+
+def _read(root, path):
+    try:
+        with open(os.path.join(root, path.lstrip("/")), "r") as f:
+            return f.read().strip()
+    except (OSError, ValueError):
+        return None
+
+def _floor_pow2(value):
+    return 1 << int(math.log2(value)) if value >= 1 else 1
+
+def _cgroup_cpus(root):
+    """CPU limit from cgroup v2 cpu.max or v1 cfs quota, or None when unlimited"""
+    cpu_max = _read(root, "/sys/fs/cgroup/cpu.max")
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return max(1, math.ceil(int(quota) / int(period)))
+        return None
+    quota = _read(root, "/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+    period = _read(root, "/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return max(1, math.ceil(int(quota) / int(period)))
+    return None
+
+def _cgroup_memory_mb(root):
+    """Memory limit from cgroup v2 memory.max or v1 limit_in_bytes, or None when unlimited"""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        value = _read(root, path)
+        if value and value != "max":
+            limit = int(value) // (1024 * 1024)
+            # cgroup v1 reports "unlimited" as a huge page-aligned number
+            if limit < 1 << 40:
+                return limit
+            return None
+    return None
+
+def _physical_memory_mb(root):
+    meminfo = _read(root, "/proc/meminfo")
+    if meminfo:
+        for line in meminfo.splitlines():
+            if line.startswith("MemTotal:"):
+                return int(line.split()[1]) // 1024
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return FALLBACK_MEMORY_MB
+
+def _available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def parse_cpulist(text):
+    """CPU numbers in a sysfs cpulist such as "0-3,8-11" """
+    cpus = []
+    for part in (text or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+def format_cpulist(cpus):
+    """The sysfs cpulist spelling of a set of CPUs"""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def allowed_cpus():
+    """CPUs this process may run on, in order"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+def numa_nodes(root="/", allowed=None):
+    """{node: [cpus]} from /sys/devices/system/node, limited to the allowed CPUs.
+
+    Hosts without NUMA information (or containers hiding it) come back as a
+    single node 0 holding every allowed CPU.
+    """
+    allowed = set(allowed_cpus() if allowed is None else allowed)
+    nodes = {}
+    try:
+        entries = os.listdir(os.path.join(root, "sys/devices/system/node"))
+    except OSError:
+        entries = []
+    for entry in entries:
+        if not entry.startswith("node") or not entry[4:].isdigit():
+            continue
+        cpus = [cpu for cpu in parse_cpulist(_read(root, f"/sys/devices/system/node/{entry}/cpulist"))
+                if cpu in allowed]
+        if cpus:
+            nodes[int(entry[4:])] = cpus
+    if not nodes:
+        return {0: sorted(allowed)}
+    return dict(sorted(nodes.items()))
+
+def plan_affinity(workers, threads, nodes):
+    """Disjoint CPU sets of `threads` CPUs for each of `workers` engines.
+
+    Workers go to the node with the most free CPUs, so they spread across
+    sockets and none straddles two nodes unless a node is too small for it.
+    """
+    free = {node: list(cpus) for node, cpus in nodes.items()}
+    plan = []
+    for _ in range(workers):
+        cpus = []
+        while len(cpus) < threads and any(free.values()):
+            node = max(free, key=lambda n: len(free[n]))
+            take = threads - len(cpus)
+            cpus.extend(free[node][:take])
+            free[node] = free[node][take:]
+        if len(cpus) < threads:
+            raise ValueError(f"Not enough CPUs to give {workers} engines {threads} threads each")
+        plan.append(sorted(cpus))
+    return plan
+
+def cpu_nodes(cpus, nodes):
+    """NUMA nodes a set of CPUs falls on"""
+    return sorted(node for node, node_cpus in nodes.items() if set(cpus) & set(node_cpus))
+
+def set_process_affinity(pid, cpus, root="/"):
+    """Pin every thread of a process to `cpus`; False where affinity isn't supported.
+
+    Threads the process starts later inherit the mask from the thread that
+    creates them, so pinning the existing ones is enough.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        threads = [int(tid) for tid in os.listdir(os.path.join(root, f"proc/{pid}/task"))]
+    except OSError:
+        threads = [pid]
+    pinned = False
+    for tid in threads:
+        try:
+            os.sched_setaffinity(tid, cpus)
+            pinned = True
+        except OSError:
+            # The thread exited between listing and pinning
+            continue
+    return pinned
+
+def process_affinity(pid):
+    """CPUs a process may run on, or None if unavailable"""
+    try:
+        return sorted(os.sched_getaffinity(pid))
+    except (AttributeError, OSError):
+        return None
+
+def process_cpu_seconds(pid, root="/"):
+    """User+system CPU time a process has used, from /proc/<pid>/stat; None if unavailable"""
+    stat = _read(root, f"/proc/{pid}/stat")
+    if not stat:
+        return None
+    # The command name may contain spaces, so count fields from the closing parenthesis
+    fields = stat.rpartition(")")[2].split()
+    try:
+        ticks = int(fields[11]) + int(fields[12])
+        return ticks / os.sysconf("SC_CLK_TCK")
+    except (IndexError, ValueError, OSError):
+        return None
+
+def process_rss_bytes(pid, root="/"):
+    """Resident set size of a process from /proc/<pid>/status; None if unavailable"""
+    status = _read(root, f"/proc/{pid}/status")
+    if not status:
+        return None
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+def open_fd_count(pid, root="/"):
+    """Number of file descriptors a process has open; None if unavailable"""
+    try:
+        return len(os.listdir(os.path.join(root, f"proc/{pid}/fd")))
+    except OSError:
+        return None
+
+def child_processes(pid, root="/"):
+    """(pid, state) of every direct child of a process; state "Z" is a zombie"""
+    children = []
+    try:
+        entries = os.listdir(os.path.join(root, "proc"))
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        stat = _read(root, f"/proc/{entry}/stat")
+        if not stat:
+            continue
+        fields = stat.rpartition(")")[2].split()
+        if len(fields) > 1 and fields[1] == str(pid):
+            children.append((int(entry), fields[0]))
+    return children
+
+class HostResources:
+    """CPU and memory MonkFish may use, honouring affinity and cgroup limits"""
+
+    def __init__(self, cpus, memory_mb, memory_fraction=0.5):
+        self.cpus = max(1, int(cpus))
+        self.memory_mb = max(1, int(memory_mb))
+        self.memory_fraction = memory_fraction
+
+    @classmethod
+    def detect(cls, config=None, root="/"):
+        cpus = _available_cpus() if root == "/" else None
+        cgroup_cpus = _cgroup_cpus(root)
+        if cpus is None:
+            cpus = cgroup_cpus or os.cpu_count() or 1
+        elif cgroup_cpus:
+            cpus = min(cpus, cgroup_cpus)
+
+        memory_mb = _physical_memory_mb(root)
+        cgroup_memory = _cgroup_memory_mb(root)
+        if cgroup_memory:
+            memory_mb = min(memory_mb, cgroup_memory)
+
+        fraction = 0.5
+        if config is not None:
+            fraction = config.get_memory_fraction() or fraction
+            if config.get_max_threads():
+                cpus = min(cpus, config.get_max_threads())
+            if config.get_max_hash_mb():
+                memory_mb = min(memory_mb, int((config.get_max_hash_mb() + ENGINE_OVERHEAD_MB) / fraction))
+        return cls(cpus, memory_mb, fraction)
+
+    @property
+    def memory_budget_mb(self):
+        return max(1, int(self.memory_mb * self.memory_fraction))
+
+    @property
+    def max_threads(self):
+        return self.cpus
+
+    @property
+    def max_hash_mb(self):
+        return max(1, self.memory_budget_mb - ENGINE_OVERHEAD_MB)
+
+    @property
+    def default_threads(self):
+        # Leave a core for the GUI and the Python side once there are a few to spare
+        return self.cpus - 1 if self.cpus > 2 else 1
+
+    @property
+    def default_hash_mb(self):
+        wanted = max(128, HASH_PER_THREAD_MB * self.default_threads)
+        return _floor_pow2(min(wanted, self.max_hash_mb))
+
+    def split(self, workers):
+        """Threads and hash (MB) per engine when `workers` engines share the host"""
+        workers = max(1, workers)
+        threads = max(1, self.cpus // workers)
+        per_worker_budget = self.memory_budget_mb // workers - ENGINE_OVERHEAD_MB
+        wanted = max(16, HASH_PER_THREAD_MB * threads)
+        hash_mb = _floor_pow2(max(1, min(wanted, per_worker_budget)))
+        return threads, hash_mb
+
+    def __repr__(self):
+        return (f"HostResources(cpus={self.cpus}, memory_mb={self.memory_mb}, "
+                f"budget_mb={self.memory_budget_mb})")
+
+if __name__ == "__main__":
+    from config import MonkFishConfig
+    resources = HostResources.detect(MonkFishConfig())
+    print(f"CPUs available:   {resources.cpus}")
+    print(f"Memory limit:     {resources.memory_mb} MB (budget {resources.memory_budget_mb} MB)")
+    print(f"Threads:          default {resources.default_threads}, max {resources.max_threads}")
+    print(f"Hash:             default {resources.default_hash_mb} MB, max {resources.max_hash_mb} MB")
+    for workers in (2, 4, 8):
+        threads, hash_mb = resources.split(workers)
+        print(f"Pool of {workers}:        {threads} threads, {hash_mb} MB hash per engine")
+    nodes = numa_nodes()
+    print("NUMA nodes:       " + ", ".join(f"{node}: {format_cpulist(cpus)}" for node, cpus in nodes.items()))
+    for workers in (2, 4, 8):
+        threads, _ = resources.split(workers)
+        try:
+            plan = plan_affinity(workers, threads, nodes)
+        except ValueError:
+            continue
+        print(f"Pinned pool of {workers}: " + "  ".join(
+            f"{format_cpulist(cpus)} (node {','.join(map(str, cpu_nodes(cpus, nodes)))})" for cpus in plan))
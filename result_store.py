@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+MonkFish Result Store
+Batch analysis results in fixed-width columns, one NumPy .npy file per
+column plus an index.json, so millions of rows can be summarized or joined
+against game metadata without parsing any text:
+
+    python3 result_store.py import results.ndjson results.store
+    python3 result_store.py summary results.store
+
+    import numpy as np
+    columns = load_columns("results.store")      # memory-mapped arrays
+    slow = columns["latency_ms"] > 500
+
+The files are written with the standard library alone; NumPy is only
+needed to get memory-mapped arrays back (load_columns falls back to
+memoryviews without it). Positions are keyed by the same 64-bit hash the
+decision log uses, as an unsigned integer.
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from decision_log import position_hash
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the stdlib readers below cover its absence
+    np = None
+
+# name, .npy dtype, struct format of one value
+COLUMNS = [
+    ("position_hash", "<u8", "<Q"),
+    ("move", "|S5", "5s"),
+    ("score", "<f4", "<f"),
+    ("depth", "<i4", "<i"),
+    ("nodes", "<i8", "<q"),
+    ("latency_ms", "<f4", "<f"),
+]
+
+INDEX_FILE = "index.json"
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+# Fixed header size so the row count can be rewritten in place as rows are appended
+NPY_HEADER_BYTES = 128
+
+def position_key(position):
+    """The 64-bit position hash as stored in the position_hash column"""
+    return int(position_hash(position), 16)
+
+def _npy_header(dtype, rows):
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (dtype, rows)
+    header = header.ljust(NPY_HEADER_BYTES - len(NPY_MAGIC) - 2 - 1) + "\n"
+    return NPY_MAGIC + struct.pack("<H", len(header)) + header.encode("latin-1")
+
+def _header_size(f):
+    """Bytes before the data in an .npy file (version 1 or 2 headers)"""
+    magic = f.read(8)
+    if magic[:6] != NPY_MAGIC[:6]:
+        raise ValueError(f"{f.name} is not an .npy file")
+    if magic[6] == 1:
+        return 10 + struct.unpack("<H", f.read(2))[0]
+    return 12 + struct.unpack("<I", f.read(4))[0]
+
+class ResultStoreWriter:
+    """Appends analysis results to a column store, creating it or continuing an existing one"""
+
+    def __init__(self, directory, buffer_rows=4096):
+        self.directory = directory
+        self.buffer_rows = buffer_rows
+        self.rows = 0
+        os.makedirs(directory, exist_ok=True)
+        index = read_index(directory) if os.path.exists(os.path.join(directory, INDEX_FILE)) else None
+        if index:
+            self.rows = index["rows"]
+        self.files = {}
+        self._packers = {}
+        self._buffers = {}
+        for name, dtype, fmt in COLUMNS:
+            path = os.path.join(directory, f"{name}.npy")
+            packer = struct.Struct(fmt)
+            if index:
+                f = open(path, "r+b")
+                # Drop anything written after the last index update (e.g. an interrupted run)
+                f.truncate(NPY_HEADER_BYTES + self.rows * packer.size)
+                f.seek(0, os.SEEK_END)
+            else:
+                f = open(path, "wb")
+                f.write(_npy_header(dtype, 0))
+            self.files[name] = f
+            self._packers[name] = packer
+            self._buffers[name] = bytearray()
+        self._pending = 0
+
+    def append(self, position, move, score=None, depth=None, nodes=None, seconds=None):
+        """Add one row; a missing score is NaN and a missing depth, nodes or move is -1/-1/empty"""
+        values = {
+            "position_hash": position_key(position),
+            "move": (move or "").encode("ascii"),
+            "score": math.nan if score is None else score,
+            "depth": -1 if depth is None else depth,
+            "nodes": -1 if nodes is None else nodes,
+            "latency_ms": math.nan if seconds is None else seconds * 1000.0,
+        }
+        for name, value in values.items():
+            self._buffers[name] += self._packers[name].pack(value)
+        self._pending += 1
+        if self._pending >= self.buffer_rows:
+            self.flush()
+
+    def append_result(self, result):
+        """Add a result dict as produced by distributed.py or the HTTP service"""
+        self.append(result["position"], result.get("move"), result.get("score"), result.get("depth"),
+                    result.get("nodes"), result.get("seconds"))
+
+    def flush(self):
+        """Write buffered rows, then the headers and index, so readers only ever see whole rows"""
+        if not self._pending:
+            return
+        for name, f in self.files.items():
+            f.write(self._buffers[name])
+            self._buffers[name].clear()
+        self.rows += self._pending
+        self._pending = 0
+        for name, dtype, _ in COLUMNS:
+            f = self.files[name]
+            f.seek(0)
+            f.write(_npy_header(dtype, self.rows))
+            f.seek(0, os.SEEK_END)
+            f.flush()
+        self._write_index()
+
+    def _write_index(self):
+        index = {
+            "format": "monkfish-results",
+            "version": 1,
+            "rows": self.rows,
+            "columns": {name: {"file": f"{name}.npy", "dtype": dtype} for name, dtype, _ in COLUMNS},
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def close(self):
+        if not self.files:
+            return
+        self.flush()
+        if not os.path.exists(os.path.join(self.directory, INDEX_FILE)):
+            self._write_index()
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def read_index(directory):
+    with open(os.path.join(directory, INDEX_FILE)) as f:
+        return json.load(f)
+
+def load_columns(directory):
+    """{column: values} for the rows in the index.
+
+    With NumPy these are read-only memory-mapped arrays. Without it, numeric
+    columns are memoryviews over an mmap and `move` is a list of str.
+    """
+    index = read_index(directory)
+    rows = index["rows"]
+    columns = {}
+    for name, dtype, fmt in COLUMNS:
+        path = os.path.join(directory, index["columns"][name]["file"])
+        if np is not None:
+            columns[name] = np.load(path, mmap_mode="r")[:rows] if rows else np.empty(0, dtype=dtype)
+            continue
+        with open(path, "rb") as f:
+            offset = _header_size(f)
+            size = struct.calcsize(fmt)
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if rows else b""
+        view = memoryview(data)[offset:offset + rows * size] if rows else memoryview(b"")
+        if name == "move":
+            columns[name] = [bytes(view[i:i + size]).rstrip(b"\0").decode("ascii")
+                             for i in range(0, rows * size, size)]
+        else:
+            columns[name] = view.cast(fmt[-1])
+    return columns
+
+def rows_for(columns, keys):
+    """Row number of each position hash in `keys` (-1 when absent), for joins with game metadata"""
+    hashes = columns["position_hash"]
+    if np is not None:
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(hashes):
+            return np.full(len(keys), -1)
+        order = np.argsort(hashes, kind="stable")
+        found = np.minimum(np.searchsorted(hashes[order], keys), len(order) - 1)
+        rows = order[found]
+        return np.where(hashes[rows] == keys, rows, -1)
+    first = {}
+    for row, key in enumerate(hashes):
+        first.setdefault(key, row)
+    return [first.get(key, -1) for key in keys]
+
+def _percentile(ordered, fraction):
+    if not len(ordered):
+        return 0.0
+    return float(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))])
+
+def summarize(directory):
+    """Row counts, score spread, latency percentiles and search totals"""
+    columns = load_columns(directory)
+    rows = len(columns["position_hash"])
+    if np is not None:
+        score, latency = columns["score"], columns["latency_ms"]
+        scored = score[~np.isnan(score)]
+        timed = np.sort(latency[~np.isnan(latency)])
+        nodes = columns["nodes"][columns["nodes"] >= 0]
+        depths, counts = np.unique(columns["depth"][columns["depth"] >= 0], return_counts=True)
+        no_move = int(np.count_nonzero(columns["move"] == b""))
+        abs_scores = np.abs(scored)
+        total_nodes, total_ms = int(nodes.sum()), float(timed.sum())
+        mean_abs = float(abs_scores.mean()) if len(abs_scores) else 0.0
+        max_abs = float(abs_scores.max()) if len(abs_scores) else 0.0
+        depth_counts = {int(d): int(c) for d, c in zip(depths, counts)}
+    else:
+        scored = [s for s in columns["score"] if not math.isnan(s)]
+        timed = sorted(t for t in columns["latency_ms"] if not math.isnan(t))
+        no_move = sum(1 for move in columns["move"] if not move)
+        total_nodes = sum(n for n in columns["nodes"] if n >= 0)
+        total_ms = sum(timed)
+        abs_scores = [abs(s) for s in scored]
+        mean_abs = sum(abs_scores) / len(abs_scores) if abs_scores else 0.0
+        max_abs = max(abs_scores) if abs_scores else 0.0
+        depth_counts = {}
+        for depth in columns["depth"]:
+            if depth >= 0:
+                depth_counts[depth] = depth_counts.get(depth, 0) + 1
+    return {
+        "rows": rows,
+        "no_move": no_move,
+        "mean_abs_score": mean_abs,
+        "max_abs_score": max_abs,
+        "latency_ms": {"p50": _percentile(timed, 0.5), "p95": _percentile(timed, 0.95),
+                       "max": _percentile(timed, 1.0)},
+        "nodes": total_nodes,
+        "nps": int(total_nodes / (total_ms / 1000.0)) if total_ms else 0,
+        "depths": dict(sorted(depth_counts.items())),
+    }
+
+def import_ndjson(path, directory):
+    """Append every result line of an NDJSON file (error lines are skipped); returns rows added"""
+    added = 0
+    with open(path) as f, ResultStoreWriter(directory) as writer:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            result = json.loads(line)
+            if "position" not in result or result.get("error"):
+                continue
+            writer.append_result(result)
+            added += 1
+    return added
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar store for MonkFish batch results")
+    sub = parser.add_subparsers(dest="command", required=True)
+    importer = sub.add_parser("import", help="append an NDJSON result file to a store")
+    importer.add_argument("ndjson")
+    importer.add_argument("store")
+    report = sub.add_parser("summary", help="summarize a store")
+    report.add_argument("store")
+    report.add_argument("--output", help="write the summary as JSON")
+    args = parser.parse_args(argv)
+
+    print("🐟 MonkFish Result Store")
+    print("=" * 50)
+    if args.command == "import":
+        started = time.perf_counter()
+        added = import_ndjson(args.ndjson, args.store)
+        print(f"   {added} results added to {args.store} in {time.perf_counter() - started:.2f}s")
+        return 0
+
+    started = time.perf_counter()
+    summary = summarize(args.store)
+    elapsed = time.perf_counter() - started
+    latency = summary["latency_ms"]
+    print(f"   {summary['rows']} rows ({summary['no_move']} without a move), summarized in {elapsed:.3f}s"
+          f"{'' if np is not None else ' without numpy'}")
+    print(f"   |score| mean {summary['mean_abs_score']:.3f}, max {summary['max_abs_score']:.2f}")
+    print(f"   latency p50 {latency['p50']:.1f}ms  p95 {latency['p95']:.1f}ms  max {latency['max']:.1f}ms")
+    print(f"   {summary['nodes']:,} nodes, {summary['nps']:,} nps")
+    print("   depths: " + ", ".join(f"{depth}: {count}" for depth, count in summary["depths"].items()))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nCancelled")
+        sys.exit(1)
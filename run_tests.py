@@ -19,7 +19,29 @@ def run_test_suite():
         'tests.test_uci_options', 
         'tests.test_uci_protocol',
         'tests.test_philosophy',
-        'tests.test_positions'
+        'tests.test_positions',
+        'tests.test_ab_test',
+        'tests.test_autotune',
+        'tests.test_server',
+        'tests.test_scheduler',
+        'tests.test_resources',
+        'tests.test_option_state',
+        'tests.test_supervisor',
+        'tests.test_info_relay',
+        'tests.test_phase',
+        'tests.test_tablebase',
+        'tests.test_engine_io',
+        'tests.test_decision_log',
+        'tests.test_debug_hooks',
+        'tests.test_soak',
+        'tests.test_distributed',
+        'tests.test_client',
+        'tests.test_analysis',
+        'tests.test_config_watcher',
+        'tests.test_build_select',
+        'tests.test_result_store',
+        'tests.test_pgn_index',
+        'tests.test_capitalize'
     ]
     
     print("🐟 MonkFish Test Suite")
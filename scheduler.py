@@ -0,0 +1,218 @@
+import heapq
+import itertools
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+LIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {LIVE: "live", BATCH: "batch"}
+
+class Saturated(Exception):
+    """Raised when a priority class has no queue space left"""
+
+class Job:
+    def __init__(self, position, priority, depth, seq):
+        self.position = position
+        self.priority = priority
+        self.depth = depth
+        self.multipv = None
+        self.seq = seq
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.preempted = False
+        self.degraded = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class PriorityScheduler:
+    """Runs live searches ahead of batch work on a shared EnginePool.
+
+    When a live job arrives and every worker is busy, the most recently
+    started batch search is stopped and its job requeued. While the queue
+    is over the overload mark, batch jobs run with reduced depth and MultiPV.
+    """
+
+    def __init__(self, pool, max_live_queue=64, max_batch_queue=256, overload_queue=16,
+                 degrade_depth_by=1, degraded_multipv=10, preempt=True):
+        self.pool = pool
+        self.limits = {LIVE: max_live_queue, BATCH: max_batch_queue}
+        self.overload_queue = overload_queue
+        self.degrade_depth_by = degrade_depth_by
+        self.degraded_multipv = degraded_multipv
+        self.preempt = preempt
+        self._heap = []
+        self._queued = {LIVE: 0, BATCH: 0}
+        self._running = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._threads = []
+        self._closing = False
+        self._waits = {LIVE: deque(maxlen=1000), BATCH: deque(maxlen=1000)}
+        self.counters = {"completed_live": 0, "completed_batch": 0, "failed": 0,
+                         "rejected": 0, "preempted": 0, "degraded": 0}
+
+    def start(self):
+        for i in range(self.pool.size):
+            thread = threading.Thread(target=self._worker, name=f"monkfish-scheduler-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            pending, self._heap = self._heap, []
+            self._cond.notify_all()
+        for job in pending:
+            job.future.cancel()
+        for thread in self._threads:
+            thread.join()
+
+    def submit(self, position, priority=BATCH, depth=None):
+        """Queue a search and return a concurrent.futures.Future for (move, score)"""
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("Scheduler is closed")
+            if self._queued[priority] >= self.limits[priority]:
+                self.counters["rejected"] += 1
+                raise Saturated()
+            job = Job(position, priority, depth, next(self._seq))
+            self._push(job)
+            if priority == LIVE and self.preempt:
+                self._preempt_batch()
+            self._cond.notify()
+        return job.future
+
+    def has_space(self, priority):
+        with self._cond:
+            return self._queued[priority] < self.limits[priority]
+
+    def promote(self, future):
+        """Move a queued batch job into the live class (e.g. a live request joined it)"""
+        with self._cond:
+            for job in self._heap:
+                if job.future is future and job.priority == BATCH:
+                    self._queued[BATCH] -= 1
+                    self._queued[LIVE] += 1
+                    job.priority = LIVE
+                    heapq.heapify(self._heap)
+                    if self.preempt:
+                        self._preempt_batch()
+                    return True
+        return False
+
+    def _push(self, job):
+        heapq.heappush(self._heap, job)
+        self._queued[job.priority] += 1
+
+    def _preempt_batch(self):
+        """Stop the newest batch search if no worker is free for the live queue"""
+        if len(self._running) < self.pool.size:
+            return
+        waiting_live = self._queued[LIVE]
+        preempting = sum(1 for job, _ in self._running.values() if job.preempted)
+        if preempting >= waiting_live:
+            return
+        batch = [(job, engine) for job, engine in self._running.values()
+                 if job.priority == BATCH and not job.preempted]
+        if not batch:
+            return
+        job, engine = max(batch, key=lambda item: item[0].started_at)
+        # Only counted once the engine confirms the search was cut short; a stop that
+        # lands between commands or after bestmove is lost and the result stands
+        job.preempted = True
+        engine.stop()
+
+    def _next_job(self):
+        with self._cond:
+            while not self._heap and not self._closing:
+                self._cond.wait()
+            if self._closing:
+                return None
+            job = heapq.heappop(self._heap)
+            self._queued[job.priority] -= 1
+            self._waits[job.priority].append(time.monotonic() - job.enqueued_at)
+            if job.priority == BATCH and self._queued[LIVE] + self._queued[BATCH] >= self.overload_queue:
+                self._degrade(job)
+            return job
+
+    def _degrade(self, job):
+        if job.degraded:
+            return
+        job.degraded = True
+        self.counters["degraded"] += 1
+        depth = job.depth or self.pool.config.get_default_depth()
+        job.depth = max(1, depth - self.degrade_depth_by)
+        job.multipv = self.degraded_multipv
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            if job.future.done():
+                continue
+            try:
+                with self.pool.engine() as engine:
+                    result = self._run(job, engine)
+            except Exception as e:
+                self.counters["failed"] += 1
+                print(f"info string Scheduler job failed: {e}", file=sys.stderr)
+                if not job.future.done():
+                    job.future.set_exception(e)
+                continue
+            if result is None:
+                continue
+            self.counters["completed_live" if job.priority == LIVE else "completed_batch"] += 1
+            if not job.future.done():
+                job.future.set_result(result)
+
+    def _run(self, job, engine):
+        restore_multipv = None
+        if job.multipv is not None and engine.uci_options.get_multipv() > job.multipv:
+            restore_multipv = engine.uci_options.get_multipv()
+            engine.uci_options.set_option("MultiPV", str(job.multipv))
+            engine.update_options()
+        with self._cond:
+            job.started_at = time.monotonic()
+            job.preempted = False
+            self._running[threading.get_ident()] = (job, engine)
+        stopped = False
+        try:
+            result = engine.get_drawing_move(job.position, target_depth=job.depth)
+            stopped = engine.last_search_stopped
+        finally:
+            with self._cond:
+                self._running.pop(threading.get_ident(), None)
+                preempted = job.preempted = job.preempted and stopped
+                if preempted:
+                    self.counters["preempted"] += 1
+                if preempted and self._closing:
+                    job.future.cancel()
+                elif preempted:
+                    # Keep the original sequence number so it runs first among batch jobs
+                    job.enqueued_at = time.monotonic()
+                    self._push(job)
+                    self._cond.notify()
+            if restore_multipv is not None:
+                engine.uci_options.set_option("MultiPV", str(restore_multipv))
+                engine.update_options()
+        return None if preempted else result
+
+    def metrics(self):
+        """Queue depth, wait times and counters per priority class"""
+        with self._cond:
+            snapshot = dict(self.counters)
+            snapshot["running"] = len(self._running)
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self._waits[priority])
+                snapshot[f"{name}_queue_depth"] = self._queued[priority]
+                snapshot[f"{name}_wait_ms_avg"] = round(1000 * sum(waits) / len(waits), 2) if waits else 0.0
+                snapshot[f"{name}_wait_ms_p95"] = round(1000 * waits[int(0.95 * (len(waits) - 1))], 2) if waits else 0.0
+                snapshot[f"{name}_wait_ms_max"] = round(1000 * waits[-1], 2) if waits else 0.0
+        return snapshot
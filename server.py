@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+MonkFish HTTP Analysis Service
+Small asyncio HTTP/JSON front end over a pool of Stockfish workers.
+
+    POST /drawing-move  {"fen": "...", "depth": 3}
+    POST /batch         {"fens": ["...", ...], "depth": 3}
+    GET  /health
+    GET  /metrics
+
+Identical positions that are already queued or running share one search,
+the queue is bounded and single requests get 429 when it is full, and
+large batches (or Accept: application/x-ndjson) stream NDJSON results as
+they complete. Single positions run ahead of batch items (see scheduler.py).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from config_watcher import ConfigWatcher
+from engine_pool import EnginePool
+from scheduler import PriorityScheduler, Saturated, LIVE, BATCH
+
+STREAM_THRESHOLD = 32
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+class RequestError(Exception):
+    """A request that can't be read, answered with `status`"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def valid_fen(fen):
+    """Cheap structural FEN check so malformed input never reaches Stockfish"""
+    if not isinstance(fen, str):
+        return False
+    fields = fen.split()
+    if len(fields) < 2 or len(fields) > 6 or fields[1] not in ("w", "b"):
+        return False
+    ranks = fields[0].split("/")
+    if len(ranks) != 8:
+        return False
+    for rank in ranks:
+        squares = 0
+        for char in rank:
+            if char.isdigit():
+                squares += int(char)
+            elif char in "pnbrqkPNBRQK":
+                squares += 1
+            else:
+                return False
+        if squares != 8:
+            return False
+    return fields[0].count("K") == 1 and fields[0].count("k") == 1
+
+class AnalysisService:
+    """Coalescing asyncio front end over a PriorityScheduler.
+
+    Single positions are scheduled as live work and batch items as batch
+    work, so interactive requests are never stuck behind a large batch.
+    """
+
+    def __init__(self, pool, max_queue=64, scheduler=None):
+        self.pool = pool
+        self.max_queue = max_queue
+        self.scheduler = scheduler or PriorityScheduler(
+            pool, max_live_queue=max_queue, max_batch_queue=max_queue)
+        self.inflight = {}
+        self.stats = {"completed": 0, "failed": 0, "coalesced": 0, "rejected": 0}
+
+    async def start(self):
+        self.scheduler.start()
+
+    async def stop(self):
+        await asyncio.get_event_loop().run_in_executor(None, self.scheduler.close)
+
+    async def _finish(self, fen, job_future):
+        start = time.perf_counter()
+        try:
+            move, score = await asyncio.wrap_future(job_future)
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        self.stats["completed"] += 1
+        return {"fen": fen, "move": move, "score": score,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def _track(self, key, job_future):
+        future = asyncio.ensure_future(self._finish(key[0], job_future))
+        self.inflight[key] = (future, job_future)
+        future.add_done_callback(lambda f: self.inflight.pop(key, None) if self.inflight.get(key, (None,))[0] is f else None)
+        return future
+
+    def _join(self, key, priority):
+        future, job_future = self.inflight[key]
+        self.stats["coalesced"] += 1
+        if priority == LIVE:
+            self.scheduler.promote(job_future)
+        return future
+
+    def submit_nowait(self, fen, depth=None, priority=LIVE):
+        """Schedule a position or join an identical one in flight; raises Saturated when full"""
+        key = (fen, depth)
+        if key in self.inflight:
+            return self._join(key, priority)
+        try:
+            job_future = self.scheduler.submit(fen, priority, depth)
+        except Saturated:
+            self.stats["rejected"] += 1
+            raise
+        return self._track(key, job_future)
+
+    async def submit(self, fen, depth=None):
+        """Schedule a batch position, waiting for queue space instead of failing"""
+        delay = 0.005
+        while True:
+            key = (fen, depth)
+            if key in self.inflight:
+                return self._join(key, BATCH)
+            try:
+                return self._track(key, self.scheduler.submit(fen, BATCH, depth))
+            except Saturated:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.1)
+
+    def saturated(self):
+        return not self.scheduler.has_space(BATCH)
+
+    def health(self):
+        return dict(self.stats, status="ok", workers=self.pool.size,
+                    queue_limit=self.max_queue, inflight=len(self.inflight),
+                    scheduler=self.scheduler.metrics())
+
+class AnalysisServer:
+    """Minimal HTTP/1.1 server (one request per connection) for AnalysisService"""
+
+    def __init__(self, service, host="127.0.0.1", port=8765):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        await self.service.start()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.service.stop()
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            return None
+        method, path, _ = (request_line.split(" ", 2) + ["", ""])[:3]
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise RequestError(400, "invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, "request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], headers, body
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                request = await self._read_request(reader)
+            except RequestError as e:
+                await self._send_json(writer, e.status, {"error": str(e)})
+                return
+            if request is None:
+                return
+            method, path, headers, body = request
+            if path == "/health":
+                await self._send_json(writer, 200, self.service.health())
+            elif path == "/metrics":
+                await self._send_json(writer, 200, self.service.scheduler.metrics())
+            elif path in ("/drawing-move", "/batch"):
+                if method != "POST":
+                    await self._send_json(writer, 405, {"error": "use POST"})
+                    return
+                try:
+                    payload = json.loads(body.decode("utf-8") or "{}")
+                except ValueError:
+                    payload = None
+                if not isinstance(payload, dict):
+                    await self._send_json(writer, 400, {"error": "body must be a JSON object"})
+                    return
+                if path == "/drawing-move":
+                    await self._drawing_move(writer, payload)
+                else:
+                    await self._batch(writer, headers, payload)
+            else:
+                await self._send_json(writer, 404, {"error": f"unknown path {path}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            print(f"info string Error handling request: {e}", file=sys.stderr)
+        finally:
+            writer.close()
+
+    def _depth(self, payload):
+        depth = payload.get("depth")
+        if depth is not None and (not isinstance(depth, int) or not 1 <= depth <= 30):
+            raise ValueError("depth must be an integer between 1 and 30")
+        return depth
+
+    async def _drawing_move(self, writer, payload):
+        fen = payload.get("fen")
+        try:
+            depth = self._depth(payload)
+        except ValueError as e:
+            await self._send_json(writer, 400, {"error": str(e)})
+            return
+        if not valid_fen(fen):
+            await self._send_json(writer, 400, {"error": "missing or invalid fen"})
+            return
+        try:
+            future = self.service.submit_nowait(fen, depth)
+        except Saturated:
+            await self._send_json(writer, 429, {"error": "analysis queue is full"}, {"Retry-After": "1"})
+            return
+        try:
+            result = await asyncio.shield(future)
+        except Exception as e:
+            await self._send_json(writer, 500, {"error": str(e)})
+            return
+        await self._send_json(writer, 200, result)
+
+    async def _batch(self, writer, headers, payload):
+        fens = payload.get("fens")
+        try:
+            depth = self._depth(payload)
+        except ValueError as e:
+            await self._send_json(writer, 400, {"error": str(e)})
+            return
+        if not isinstance(fens, list) or not fens:
+            await self._send_json(writer, 400, {"error": "fens must be a non-empty list"})
+            return
+        if self.service.saturated():
+            self.service.stats["rejected"] += 1
+            await self._send_json(writer, 429, {"error": "analysis queue is full"}, {"Retry-After": "1"})
+            return
+
+        stream = "application/x-ndjson" in headers.get("accept", "") or len(fens) > STREAM_THRESHOLD
+        if stream:
+            await self._stream_batch(writer, fens, depth)
+            return
+        futures = []
+        for fen in fens:
+            futures.append(await self.service.submit(fen, depth) if valid_fen(fen) else None)
+        results = []
+        for index, (fen, future) in enumerate(zip(fens, futures)):
+            results.append(await self._item(index, fen, future))
+        await self._send_json(writer, 200, {"results": results})
+
+    async def _item(self, index, fen, future):
+        if future is None:
+            return {"index": index, "fen": fen, "error": "invalid fen"}
+        try:
+            result = await asyncio.shield(future)
+        except Exception as e:
+            return {"index": index, "fen": fen, "error": str(e)}
+        return dict(result, index=index)
+
+    async def _stream_batch(self, writer, fens, depth):
+        """Feed the queue as space frees up and write each result as soon as it is done"""
+        done = asyncio.Queue()
+
+        async def feed():
+            for index, fen in enumerate(fens):
+                future = await self.service.submit(fen, depth) if valid_fen(fen) else None
+                done.put_nowait((index, fen, future))
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        feeder = asyncio.ensure_future(feed())
+        pending = set()
+        written = 0
+        try:
+            while written < len(fens):
+                getter = asyncio.ensure_future(done.get())
+                finished, _ = await asyncio.wait(pending | {getter}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in finished:
+                    getter.cancel()
+                else:
+                    index, fen, future = getter.result()
+                    pending.add(asyncio.ensure_future(self._item(index, fen, future)))
+                for task in [t for t in finished if t in pending]:
+                    pending.discard(task)
+                    line = (json.dumps(task.result()) + "\n").encode("utf-8")
+                    writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    await writer.drain()
+                    written += 1
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            feeder.cancel()
+            for task in pending:
+                task.cancel()
+
+    async def _send_json(self, writer, status, payload, extra_headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body)}",
+                "Connection: close"]
+        for name, value in (extra_headers or {}).items():
+            head.append(f"{name}: {value}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+async def serve(config_file, host, port, workers, max_queue):
+    with EnginePool(workers, config_file) as pool:
+        watcher = None
+        if pool.config.get_hot_reload_enabled():
+            watcher = ConfigWatcher(pool.config, targets=[pool]).start()
+        server = await AnalysisServer(AnalysisService(pool, max_queue), host, port).start()
+        print(f"info string MonkFish analysis service on http://{host}:{server.port} ({workers} workers)")
+        try:
+            await server.server.serve_forever()
+        finally:
+            await server.stop()
+            if watcher:
+                watcher.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MonkFish HTTP/JSON analysis service")
+    parser.add_argument("--config", default="monkfish_config.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="Stockfish processes in the pool")
+    parser.add_argument("--queue", type=int, default=64, help="positions allowed to wait for a worker")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.config, args.host, args.port, args.workers, args.queue))
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
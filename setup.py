@@ -134,6 +134,27 @@ class MonkFishSetup:
         
         raise Exception("Could not find stockfish binary in downloaded archive")
     
+    def select_stockfish_build(self):
+        """Use the fastest build in stockfish_builds/ when several are kept locally"""
+        builds_dir = "stockfish_builds"
+        print("🏎️  Selecting Stockfish build...", end=" ")
+        if not os.path.isdir(builds_dir):
+            print(f"⏭️  (no {builds_dir}/ directory, keeping {self.stockfish_filename})")
+            return True
+        try:
+            from build_select import select_build, record_selection
+            results, best = select_build(builds_dir)
+            if best is None:
+                print(f"⚠️  none of the builds in {builds_dir}/ ran, keeping {self.stockfish_filename}")
+                return True
+            record_selection("monkfish_config.json", results, best)
+            print(f"✅ {os.path.basename(best['path'])} ({best['nps']:,} nps)")
+            return True
+        except Exception as e:
+            # The default binary still works, so a failed benchmark doesn't stop setup
+            print(f"⚠️  {e}")
+            return True
+    
     def setup_shell_script(self):
         """Make sure shell script is executable"""
         print("🐚 Setting up shell script...", end=" ")
@@ -191,6 +212,7 @@ class MonkFishSetup:
             self.check_python,
             self.check_permissions,
             self.download_stockfish,
+            self.select_stockfish_build,
             self.setup_shell_script,
             self.create_config_if_missing,
             self.test_engine
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+MonkFish Soak Test
+Drives thousands of position/go/setoption cycles through the UCI handler,
+killing and restarting Stockfish along the way, and fails if Python memory,
+RSS, open file descriptors or child processes keep growing
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from resources import process_rss_bytes, open_fd_count, child_processes
+from uci import UCIHandler
+
+# Largest growth per 1000 moves each metric may show once warmed up
+DEFAULT_SLOPES = {
+    "python_heap_bytes": 256 * 1024,
+    "python_rss_bytes": 4 * 1024 * 1024,
+    "engine_rss_bytes": 8 * 1024 * 1024,
+    "open_fds": 0.5,
+    "children": 0.5,
+    "zombies": 0.5,
+}
+
+class _BestmoveSink:
+    """Stands in for stdout: keeps the last bestmove and drops everything else"""
+
+    def __init__(self):
+        self.bestmove = None
+
+    def write(self, text):
+        if text.startswith("bestmove "):
+            self.bestmove = text.split()[1]
+        return len(text)
+
+    def flush(self):
+        pass
+
+def slope(samples, key):
+    """Least-squares growth of `key` per move across the samples"""
+    points = [(s["moves"], s[key]) for s in samples if s.get(key) is not None]
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+def sample(handler, moves):
+    """One reading of every tracked metric"""
+    gc.collect()
+    pid = os.getpid()
+    children = child_processes(pid)
+    engine = handler.parser.engine if handler.parser else None
+    return {
+        "moves": moves,
+        "time": time.time(),
+        "python_heap_bytes": tracemalloc.get_traced_memory()[0],
+        "python_rss_bytes": process_rss_bytes(pid),
+        "engine_rss_bytes": process_rss_bytes(engine.pid) if engine else None,
+        "open_fds": open_fd_count(pid),
+        "children": len(children),
+        "zombies": sum(1 for _, state in children if state == "Z"),
+    }
+
+def evaluate(samples, limits=None, warmup=0.2):
+    """Per-metric slope against its limit, ignoring the first `warmup` fraction of samples"""
+    limits = dict(DEFAULT_SLOPES, **(limits or {}))
+    steady = samples[int(len(samples) * warmup):]
+    results = {}
+    for key, limit in limits.items():
+        values = [s[key] for s in samples if s.get(key) is not None]
+        if not values:
+            continue
+        per_1000 = slope(steady, key) * 1000
+        results[key] = {
+            "start": values[0],
+            "end": values[-1],
+            "max": max(values),
+            "slope_per_1000_moves": per_1000,
+            "limit": limit,
+            "ok": per_1000 <= limit,
+        }
+    return results
+
+def run_soak(config_file, moves=20000, sample_every=250, restart_every=2000, recycle_every=5000,
+             setoption_every=50, game_plies=60, limits=None, progress=None):
+    """Play `moves` moves through a UCIHandler and return the report.
+
+    Every `restart_every` moves Stockfish is killed so the supervisor has to
+    replace it, and every `recycle_every` moves the whole engine is shut down
+    with quit() and started again lazily.
+    """
+    tracemalloc.start()
+    handler = UCIHandler(config_file)
+    sink = _BestmoveSink()
+    samples = []
+    events = {"restarts": 0, "recycles": 0, "setoptions": 0, "games": 1, "failed_moves": 0}
+    multipv = handler.uci_options.get_multipv()
+    played = []
+    started = time.perf_counter()
+    try:
+        with redirect_stdout(sink):
+            handler._ensure_parser()
+            samples.append(sample(handler, 0))
+            for move_number in range(1, moves + 1):
+                if move_number % setoption_every == 0:
+                    # Flip MultiPV so every cycle has an option to sync
+                    value = multipv if move_number % (2 * setoption_every) else max(1, multipv - 1)
+                    handler.handle_setoption(f"setoption name MultiPV value {value}")
+                    events["setoptions"] += 1
+                if move_number % restart_every == 0 and handler.parser and handler.parser.engine:
+                    handler.parser.engine.kill()
+                    events["restarts"] += 1
+                if move_number % recycle_every == 0 and handler.parser:
+                    handler.parser.quit()
+                    handler.parser = None
+                    handler.options_dirty = True
+                    events["recycles"] += 1
+
+                position = "position startpos"
+                if played:
+                    position += " moves " + " ".join(played)
+                handler.handle_position(position)
+                sink.bestmove = None
+                handler.handle_go("go")
+                if sink.bestmove and sink.bestmove != "(none)" and len(played) < game_plies:
+                    played.append(sink.bestmove)
+                else:
+                    if not sink.bestmove or sink.bestmove == "(none)":
+                        events["failed_moves"] += 1
+                    played = []
+                    events["games"] += 1
+
+                if move_number % sample_every == 0:
+                    samples.append(sample(handler, move_number))
+                    if progress:
+                        progress(samples[-1])
+    finally:
+        if handler.parser:
+            handler.parser.quit()
+        tracemalloc.stop()
+
+    metrics = evaluate(samples, limits)
+    supervisor = handler.parser.metrics() if handler.parser and hasattr(handler.parser, "metrics") else None
+    return {
+        "config": config_file,
+        "moves": moves,
+        "seconds": time.perf_counter() - started,
+        "events": events,
+        "metrics": metrics,
+        "passed": all(m["ok"] for m in metrics.values()),
+        "supervisor": supervisor,
+        "samples": samples,
+    }
+
+def format_report(report):
+    """Markdown summary to attach to a release"""
+    lines = [
+        "# MonkFish soak test",
+        "",
+        f"- Moves: {report['moves']} in {report['seconds']:.0f}s",
+        "- Events: " + ", ".join(f"{name} {count}" for name, count in report["events"].items()),
+        f"- Result: {'PASS' if report['passed'] else 'FAIL'}",
+        "",
+        "| Metric | Start | End | Max | Slope / 1000 moves | Limit | OK |",
+        "|---|---|---|---|---|---|---|",
+    ]
+    for name, m in report["metrics"].items():
+        lines.append(f"| {name} | {m['start']} | {m['end']} | {m['max']} | "
+                     f"{m['slope_per_1000_moves']:.2f} | {m['limit']} | {'✅' if m['ok'] else '❌'} |")
+    return "\n".join(lines) + "\n"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check MonkFish for leaks over a long UCI session")
+    parser.add_argument("--config", default="monkfish_config.json")
+    parser.add_argument("--moves", type=int, default=20000)
+    parser.add_argument("--sample-every", type=int, default=250)
+    parser.add_argument("--restart-every", type=int, default=2000, help="kill Stockfish every N moves")
+    parser.add_argument("--recycle-every", type=int, default=5000, help="quit() and restart every N moves")
+    parser.add_argument("--output", help="write the full report (with samples) as JSON")
+    parser.add_argument("--markdown", help="write the summary table as Markdown")
+    args = parser.parse_args(argv)
+
+    print("🐟 MonkFish Soak Test")
+    print("=" * 50)
+
+    def progress(s):
+        heap = s["python_heap_bytes"] / 1024
+        print(f"   {s['moves']:6d} moves  heap {heap:8.0f} KB  fds {s['open_fds']}  children {s['children']}",
+              file=sys.stderr)
+
+    report = run_soak(args.config, args.moves, args.sample_every, args.restart_every,
+                      args.recycle_every, progress=progress)
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    if args.markdown:
+        with open(args.markdown, "w") as f:
+            f.write(format_report(report))
+        print(f"Summary written to {args.markdown}")
+    return 0 if report["passed"] else 1
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nSoak test cancelled")
+        sys.exit(1)
@@ -0,0 +1,237 @@
+import sys
+import threading
+import time
+from collections import deque
+from monkfish import MonkFishParser, NoLegalMovesError
+
+class EngineSupervisor:
+    """Keeps a MonkFishParser alive through Stockfish crashes and hangs.
+
+    While a command is running, a watchdog kills Stockfish if it goes
+    `hang_timeout` seconds without output (except during go infinite,
+    where a finished search legitimately waits in silence for stop); while idle, an isready heartbeat
+    checks it every `heartbeat_interval` seconds. A dead engine is replaced
+    by a fresh one started from the current UCI options, and an interrupted
+    search is retried once at reduced depth so a move still comes back.
+    """
+
+    def __init__(self, config_file="monkfish_config.json", uci_options=None,
+                 hang_timeout=None, heartbeat_interval=None, retry_depth_reduction=None, config=None):
+        self.config_file = config_file
+        self.uci_options = uci_options
+        self.parser = MonkFishParser(config_file, uci_options=uci_options, config=config)
+        config = self.parser.config
+        self.hang_timeout = hang_timeout if hang_timeout is not None else config.get_hang_timeout()
+        self.heartbeat_interval = (heartbeat_interval if heartbeat_interval is not None
+                                   else config.get_heartbeat_interval())
+        self.retry_depth_reduction = (retry_depth_reduction if retry_depth_reduction is not None
+                                      else config.get_retry_depth_reduction())
+        self.counters = {"restarts": 0, "crashes": 0, "hangs": 0, "retries": 0,
+                         "failed_retries": 0, "heartbeats": 0}
+        self._recoveries = deque(maxlen=100)
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self._active_since = None
+        self._last_used = time.monotonic()
+        self._hang_detected = False
+        self._threads = []
+        if self.hang_timeout:
+            self._start_thread(self._watchdog, "monkfish-watchdog")
+        if self.heartbeat_interval:
+            self._start_thread(self._heartbeat, "monkfish-heartbeat")
+
+    def _start_thread(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    # The parser's attributes, so a supervisor can stand in wherever a parser is used
+    @property
+    def engine(self):
+        return self.parser.engine
+
+    @property
+    def config(self):
+        return self.parser.config
+
+    @property
+    def engine_options(self):
+        return self.parser.engine_options
+
+    @property
+    def option_state(self):
+        return self.parser.option_state
+
+    @property
+    def capitalize(self):
+        return self.parser.capitalize
+
+    def _watchdog(self):
+        tick = min(0.1, self.hang_timeout / 4)
+        while not self._closed.wait(tick):
+            started = self._active_since
+            parser = self.parser
+            engine = parser.engine
+            if started is None or engine is None:
+                continue
+            stalled = time.monotonic() - max(started, parser.last_activity)
+            if stalled > self.hang_timeout and engine.poll() is None:
+                # Killing the process unblocks the reader, which then fails and recovers
+                self._hang_detected = True
+                engine.kill()
+
+    def _heartbeat(self):
+        while not self._closed.wait(self.heartbeat_interval):
+            if time.monotonic() - self._last_used < self.heartbeat_interval:
+                continue
+            if not self._lock.acquire(blocking=False):
+                continue
+            try:
+                if self._closed.is_set():
+                    return
+                self.counters["heartbeats"] += 1
+                self._watched(self.parser.ping)
+            except Exception as e:
+                try:
+                    self._recover(e)
+                except Exception as e:
+                    print(f"info string Warning: {e}", file=sys.stderr)
+            finally:
+                self._lock.release()
+
+    def _watched(self, func, *args):
+        self._active_since = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            self._active_since = None
+            self._last_used = time.monotonic()
+
+    def _recover(self, error):
+        """Replace the engine; the new one is configured from the current UCI options"""
+        if self._closed.is_set():
+            raise error
+        started = time.monotonic()
+        hung, self._hang_detected = self._hang_detected, False
+        self.counters["hangs" if hung else "crashes"] += 1
+        reason = f"hung for over {self.hang_timeout}s" if hung else f"failed ({error})"
+        print(f"info string Stockfish {reason}; restarting it", file=sys.stderr)
+
+        old = self.parser
+        if old.engine and old.engine.poll() is None:
+            old.engine.kill()
+        old.quit()
+        try:
+            # The replacement shares the config object, so hot reloads keep reaching it
+            self.parser = MonkFishParser(self.config_file, uci_options=self.uci_options, config=old.config)
+        except Exception as e:
+            raise RuntimeError(f"Could not restart Stockfish: {e}")
+        # Still the same game: keep the eval trend and cost totals
+        self.parser.capitalize = old.capitalize
+        self.counters["restarts"] += 1
+        self._recoveries.append(time.monotonic() - started)
+
+    def _call(self, method, *args):
+        """Run a parser method, restarting the engine if it fails"""
+        with self._lock:
+            try:
+                return self._watched(getattr(self.parser, method), *args)
+            except NoLegalMovesError:
+                raise
+            except Exception as e:
+                self._recover(e)
+                return None
+
+    def get_drawing_move(self, position, target_depth=None, relay=None, nodes=None, trace=None):
+        with self._lock:
+            try:
+                return self._watched(self.parser.get_drawing_move, position, target_depth, relay, nodes,
+                                     trace)
+            except NoLegalMovesError:
+                raise
+            except Exception as e:
+                limit = self.parser.last_search_limit
+                self._recover(e)
+
+            # A smaller search keeps the move inside the time the GUI is waiting for
+            kind, amount = limit or ("depth", self.parser.search_depth(target_depth))
+            if kind == "movetime":
+                # Already bounded by time; run it again as it was
+                retry_depth, retry_nodes = None, None
+                print("info string Retrying search", file=sys.stderr)
+            elif kind == "nodes":
+                # Each ply costs roughly twice the nodes of the one before
+                retry_depth, retry_nodes = None, max(1, amount >> self.retry_depth_reduction)
+                print(f"info string Retrying search with {retry_nodes} nodes", file=sys.stderr)
+            else:
+                retry_depth, retry_nodes = max(1, amount - self.retry_depth_reduction), None
+                print(f"info string Retrying search at depth {retry_depth}", file=sys.stderr)
+            self.counters["retries"] += 1
+            try:
+                return self._watched(self.parser.get_drawing_move, position, retry_depth, relay,
+                                     retry_nodes, trace)
+            except NoLegalMovesError:
+                raise
+            except Exception as e:
+                self.counters["failed_retries"] += 1
+                self._recover(e)
+                raise RuntimeError(f"Search failed after restarting Stockfish: {e}")
+
+    def analyse(self, position, searchmoves=None, relay=None, stop_event=None):
+        """Infinite analysis until stop(); a failed engine is replaced but the analysis isn't resumed.
+
+        The silence watchdog stays off: Stockfish goes quiet at its maximum
+        depth and waits for stop. A dead process still ends the read, and the
+        heartbeat checks the engine once the analysis is over.
+        """
+        with self._lock:
+            try:
+                return self.parser.analyse(position, searchmoves, relay, stop_event)
+            except NoLegalMovesError:
+                raise
+            except Exception as e:
+                self._recover(e)
+                raise RuntimeError(f"Analysis interrupted by an engine failure: {e}")
+            finally:
+                self._last_used = time.monotonic()
+
+    def evaluate_move(self, position, move, depth):
+        with self._lock:
+            result = self._call("evaluate_move", position, move, depth)
+            if result is None:
+                self.counters["retries"] += 1
+                result = self._watched(self.parser.evaluate_move, position, move, depth)
+            return result
+
+    def update_options(self):
+        return self._call("update_options") or 0
+
+    def new_game(self):
+        # A restarted engine is a new game already
+        self._call("new_game")
+
+    def ping(self):
+        self._call("ping")
+
+    def search_depth(self, target_depth=None):
+        return self.parser.search_depth(target_depth)
+
+    def stop(self):
+        """Stop the running search; safe to call from another thread"""
+        self.parser.stop()
+
+    def metrics(self):
+        """Restart counters and recovery latency in milliseconds"""
+        snapshot = dict(self.counters)
+        recoveries = list(self._recoveries)
+        snapshot["recovery_ms_last"] = round(1000 * recoveries[-1], 1) if recoveries else 0.0
+        snapshot["recovery_ms_avg"] = round(1000 * sum(recoveries) / len(recoveries), 1) if recoveries else 0.0
+        snapshot["recovery_ms_max"] = round(1000 * max(recoveries), 1) if recoveries else 0.0
+        return snapshot
+
+    def quit(self):
+        self._closed.set()
+        for thread in self._threads:
+            thread.join()
+        with self._lock:
+            self.parser.quit()
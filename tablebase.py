@@ -0,0 +1,106 @@
+import os
+import sys
+
+try:
+    import chess
+    import chess.syzygy
+except ImportError:  # python-chess is optional; without it MonkFish always searches
+    chess = None
+
+# Pawns reported for a tablebase win; below MATE_SCORE since no mate distance is known
+TABLEBASE_WIN_SCORE = 50.0
+
+def board_for(position):
+    """python-chess board for a MonkFish position string or FEN"""
+    if position.startswith("position"):
+        board = chess.Board()
+        if "moves " in position:
+            for move in position.split("moves ", 1)[1].split():
+                board.push_uci(move)
+        return board
+    return chess.Board(position)
+
+class TablebaseProber:
+    """Answers endgame positions from local Syzygy WDL/DTZ files without searching.
+
+    Draws are held with a move that keeps the draw, wins are converted by
+    the shortest distance to zeroing, and lost positions resist as long as
+    the tables allow.
+    """
+
+    def __init__(self, path, tablebase=None):
+        self.path = path
+        self.tablebase = tablebase
+        self.probes = 0
+        self.hits = 0
+        if self.tablebase is None:
+            self.tablebase = chess.syzygy.Tablebase()
+            for directory in path.split(os.pathsep):
+                if directory:
+                    self.tablebase.add_directory(directory)
+        tables = getattr(self.tablebase, "wdl", {})
+        # Table names look like "KRPvKR"; the longest one bounds what can be probed
+        self.max_pieces = max((len(name) - 1 for name in tables), default=0)
+
+    @classmethod
+    def from_config(cls, config):
+        """A prober for the configured directory, or None if probing isn't possible"""
+        path = config.get_syzygy_path()
+        if not path or not config.get_tablebase_probing():
+            return None
+        if chess is None:
+            print("info string Syzygy probing needs python-chess (pip install chess)", file=sys.stderr)
+            return None
+        try:
+            prober = cls(path)
+        except OSError as e:
+            print(f"info string Warning: Could not open Syzygy tables at {path}: {e}", file=sys.stderr)
+            return None
+        if not prober.max_pieces:
+            print(f"info string Warning: No Syzygy tables found in {path}", file=sys.stderr)
+            return None
+        return prober
+
+    def probe(self, position):
+        """(move, score) straight from the tables, or None when they can't answer"""
+        board = board_for(position)
+        if len(board.piece_map()) > self.max_pieces or board.castling_rights:
+            return None
+        self.probes += 1
+        wdl = self.tablebase.get_wdl(board)
+        if wdl is None or board.is_game_over():
+            return None
+
+        outcomes = []
+        for move in sorted(board.legal_moves, key=lambda m: m.uci()):
+            zeroing = board.is_zeroing(move)
+            board.push(move)
+            # Scores after the move are from the opponent's side; flip them to ours
+            reply_wdl = self.tablebase.get_wdl(board)
+            reply_dtz = self.tablebase.get_dtz(board)
+            mate = board.is_checkmate()
+            board.pop()
+            if mate:
+                reply_wdl, reply_dtz = -2, 0
+            if reply_wdl is None or reply_dtz is None:
+                return None
+            outcomes.append((move, -reply_wdl, -reply_dtz, zeroing))
+
+        best_wdl = max(outcome[1] for outcome in outcomes)
+        candidates = [outcome for outcome in outcomes if outcome[1] == best_wdl]
+        if best_wdl == 2:
+            # Mate or a pawn move/capture first, then the fewest moves to the next zeroing move
+            move, _, dtz, _ = min(candidates, key=lambda o: (o[2] != 0, not o[3], abs(o[2])))
+            score = TABLEBASE_WIN_SCORE
+        elif best_wdl == -2:
+            move, _, dtz, _ = max(candidates, key=lambda o: (abs(o[2]), not o[3]))
+            score = -TABLEBASE_WIN_SCORE
+        else:
+            # Cursed wins and blessed losses are draws under the 50-move rule
+            move = candidates[0][0]
+            score = 0.0
+        self.hits += 1
+        return move.uci(), score
+
+    def close(self):
+        self.tablebase.close()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Scripted stand-in for Stockfish used by the test suite.
+
+Speaks enough UCI for MonkFish's wrapper code: the handshake with a
+Stockfish-like option list, setoption/isready, position, go (depth, nodes,
+movetime, infinite, searchmoves), stop, d and perft 1. Candidate moves and
+scores are derived from a hash of the position so results are deterministic.
+
+Behaviour can be steered with environment variables:
+    FAKE_SF_DELAY            seconds to sleep per completed depth
+    FAKE_SF_HANG_AFTER       hang (stop answering) on the Nth go command
+    FAKE_SF_CRASH_AFTER      exit abruptly on the Nth go command
+    FAKE_SF_MATE_AFTER_PLIES report checkmate once the move list is this long
+    FAKE_SF_STALEMATE        report stalemate instead of checkmate
+    FAKE_SF_MAX_DEPTH        in go infinite, go silent after this depth until stop
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+
+FAKE_STOCKFISH = os.path.abspath(__file__)
+
+STARTPOS_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+CANDIDATE_MOVES = [
+    "e2e4", "d2d4", "g1f3", "c2c4", "b1c3", "e2e3", "d2d3", "g2g3",
+    "b2b3", "c2c3", "f2f4", "a2a3", "h2h3", "b2b4", "f2f3", "g2g4",
+    "h2h4", "a2a4", "g1h3", "b1a3",
+]
+
+OPTIONS = [
+    "option name Debug Log File type string default <empty>",
+    "option name Threads type spin default 1 min 1 max 1024",
+    "option name Hash type spin default 16 min 1 max 33554432",
+    "option name Clear Hash type button",
+    "option name Ponder type check default false",
+    "option name MultiPV type spin default 1 min 1 max 500",
+    "option name Skill Level type spin default 20 min 0 max 20",
+    "option name Move Overhead type spin default 10 min 0 max 5000",
+    "option name nodestime type spin default 0 min 0 max 10000",
+    "option name UCI_Chess960 type check default false",
+    "option name UCI_LimitStrength type check default false",
+    "option name UCI_Elo type spin default 1320 min 1320 max 3190",
+    "option name UCI_ShowWDL type check default false",
+    "option name SyzygyPath type string default <empty>",
+    "option name SyzygyProbeDepth type spin default 1 min 1 max 100",
+    "option name Syzygy50MoveRule type check default true",
+    "option name SyzygyProbeLimit type spin default 7 min 0 max 7",
+    "option name EvalFile type string default nn-5af11540bbfe.nnue",
+]
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+class FakeStockfish:
+    def __init__(self):
+        self.options = {"MultiPV": "1"}
+        self.position = "position startpos"
+        self.go_count = 0
+        self.stop_event = threading.Event()
+        self.search_thread = None
+        self.write_lock = threading.Lock()
+        self.delay = float(os.environ.get("FAKE_SF_DELAY", "0") or 0)
+
+    def emit(self, line):
+        with self.write_lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+    def move_count(self):
+        if " moves " not in self.position:
+            return 0
+        return len(self.position.split(" moves ", 1)[1].split())
+
+    def score_for(self, move, depth):
+        key = f"{self.position}|{move}".encode()
+        base = zlib.crc32(key) % 301 - 150
+        return base + (depth % 3) - 1
+
+    def candidates(self, searchmoves):
+        moves = searchmoves or CANDIDATE_MOVES
+        return moves[:max(1, int(self.options.get("MultiPV", "1")))]
+
+    def search(self, limits):
+        depth_limit = limits.get("depth")
+        nodes_limit = limits.get("nodes")
+        movetime = limits.get("movetime")
+        infinite = limits.get("infinite", False)
+        searchmoves = limits.get("searchmoves")
+        if depth_limit is None and not infinite:
+            depth_limit = 3 if nodes_limit is None else max(1, min(12, nodes_limit // 1000))
+
+        mate_after = _env_int("FAKE_SF_MATE_AFTER_PLIES")
+        if mate_after is not None and self.move_count() >= mate_after:
+            if os.environ.get("FAKE_SF_STALEMATE"):
+                self.emit("info depth 0 score cp 0")
+            else:
+                self.emit("info depth 0 score mate 0")
+            self.emit("bestmove (none)")
+            return
+
+        max_depth = _env_int("FAKE_SF_MAX_DEPTH")
+        start = time.time()
+        best = None
+        depth = 0
+        nodes = 0
+        while not self.stop_event.is_set():
+            depth += 1
+            ranked = sorted(self.candidates(searchmoves),
+                            key=lambda m: -self.score_for(m, depth))
+            for index, move in enumerate(ranked, 1):
+                nodes += 250 * depth
+                elapsed = max(1, int((time.time() - start) * 1000))
+                self.emit(
+                    f"info depth {depth} seldepth {depth + 2} multipv {index} "
+                    f"score cp {self.score_for(move, depth)} nodes {nodes} "
+                    f"nps {nodes * 1000 // elapsed} hashfull {min(1000, depth * 7)} "
+                    f"tbhits 0 time {elapsed} pv {move} e7e5"
+                )
+            best = ranked[0]
+            if self.delay:
+                self.stop_event.wait(self.delay)
+            if depth_limit is not None and depth >= depth_limit:
+                break
+            if nodes_limit is not None and nodes >= nodes_limit:
+                break
+            if movetime is not None and (time.time() - start) * 1000 >= movetime:
+                break
+            if infinite and max_depth is not None and depth >= max_depth:
+                # Stockfish's behaviour at MAX_PLY: nothing more until stop
+                break
+            if infinite and not self.delay:
+                self.stop_event.wait(0.01)
+        if infinite:
+            self.stop_event.wait()
+        self.emit(f"bestmove {best}")
+
+    def handle_go(self, tokens):
+        self.go_count += 1
+        if tokens[1:3] == ["perft", "1"]:
+            for move in CANDIDATE_MOVES:
+                self.emit(f"{move}: 1")
+            self.emit("")
+            self.emit(f"Nodes searched: {len(CANDIDATE_MOVES)}")
+            self.emit("")
+            return
+        if _env_int("FAKE_SF_CRASH_AFTER") == self.go_count:
+            os._exit(1)
+        if _env_int("FAKE_SF_HANG_AFTER") == self.go_count:
+            time.sleep(3600)
+
+        limits = {}
+        i = 1
+        while i < len(tokens):
+            token = tokens[i]
+            if token in ("depth", "nodes", "movetime") and i + 1 < len(tokens):
+                limits[token] = int(tokens[i + 1])
+                i += 2
+            elif token == "infinite":
+                limits["infinite"] = True
+                i += 1
+            elif token == "searchmoves":
+                limits["searchmoves"] = tokens[i + 1:]
+                break
+            else:
+                i += 1
+
+        self.stop_event.clear()
+        self.search_thread = threading.Thread(target=self.search, args=(limits,))
+        self.search_thread.start()
+
+    def wait_search(self):
+        if self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+
+    def run(self):
+        for raw in sys.stdin:
+            line = raw.strip()
+            tokens = line.split()
+            if not tokens:
+                continue
+            command = tokens[0]
+            if command == "uci":
+                self.emit("id name FakeFish")
+                self.emit("id author MonkFish tests")
+                for option in OPTIONS:
+                    self.emit(option)
+                self.emit("uciok")
+            elif command == "isready":
+                self.emit("readyok")
+            elif command == "setoption":
+                if "value" in tokens:
+                    value_idx = tokens.index("value")
+                    name = " ".join(tokens[2:value_idx])
+                    self.options[name] = " ".join(tokens[value_idx + 1:])
+                else:
+                    self.options[" ".join(tokens[2:])] = None
+            elif command == "ucinewgame":
+                self.wait_search()
+            elif command == "position":
+                self.wait_search()
+                self.position = line
+            elif command == "go":
+                self.wait_search()
+                self.handle_go(tokens)
+            elif command == "stop":
+                self.stop_event.set()
+                self.wait_search()
+            elif command == "d":
+                self.wait_search()
+                if self.position.startswith("position fen"):
+                    fen = self.position.split(" fen ", 1)[1].split(" moves ")[0]
+                else:
+                    fen = STARTPOS_FEN
+                self.emit("")
+                self.emit(" +---+---+---+---+---+---+---+---+")
+                self.emit(f"Fen: {fen}")
+                self.emit(f"Key: {zlib.crc32(self.position.encode()):016X}")
+                self.emit("Checkers: ")
+            elif command == "quit":
+                self.stop_event.set()
+                self.wait_search()
+                return
+
+
+def write_config(path, **sections):
+    """Write a MonkFish config file that points at this fake engine"""
+    config = {
+        "engine": {"stockfish_path": FAKE_STOCKFISH, "skill_level": 3, "multipv": 5, "use_nnue": False},
+        "search": {"default_depth": 2, "drawing_threshold": 0.5},
+    }
+    for section, values in sections.items():
+        config.setdefault(section, {}).update(values)
+    with open(path, "w") as f:
+        json.dump(config, f, indent=2)
+    return path
+
+
+def run_bench():
+    nps = int(os.environ.get("FAKE_SF_BENCH_NPS", "1000000"))
+    sys.stderr.write("===========================\n")
+    sys.stderr.write("Total time (ms) : 1000\n")
+    sys.stderr.write(f"Nodes searched  : {nps}\n")
+    sys.stderr.write(f"Nodes/second    : {nps}\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        run_bench()
+    else:
+        FakeStockfish().run()
@@ -0,0 +1,123 @@
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+sys.path.append('..')
+from ab_test import SPRT, ABTest, elo_to_score, play_game, _is_repetition
+from engine_pool import EnginePool
+from tests.fake_stockfish import write_config
+
+class TestSPRT(unittest.TestCase):
+
+    def test_accepts_h1_for_clear_improvement(self):
+        """Test that consistently better samples cross the upper bound"""
+        sprt = SPRT(0.0, 0.1)
+        for i in range(200):
+            sprt.add(0.2 + (0.05 if i % 2 else -0.05))
+            if sprt.status():
+                break
+        self.assertEqual(sprt.status(), "H1")
+        self.assertLess(sprt.n, 200)
+
+    def test_accepts_h0_for_no_improvement(self):
+        """Test that samples around h0 cross the lower bound"""
+        sprt = SPRT(0.0, 0.1)
+        for i in range(200):
+            sprt.add(-0.02 + (0.05 if i % 2 else -0.05))
+        self.assertEqual(sprt.status(), "H0")
+
+    def test_decides_without_variance(self):
+        """Test that a run of identical samples still reaches a verdict through the variance floor"""
+        sprt = SPRT(elo_to_score(-10), elo_to_score(0))
+        for _ in range(200):
+            sprt.add(0.5)
+        self.assertEqual(sprt.status(), "H1")
+        self.assertGreater(sprt.n, 10)
+
+        sprt = SPRT(0.0, 0.1)
+        for _ in range(200):
+            sprt.add(0.0)
+        self.assertEqual(sprt.status(), "H0")
+
+    def test_verdict_is_latched(self):
+        """Test that a crossed bound stays decided when later samples would pull the LLR back"""
+        sprt = SPRT(0.0, 0.1)
+        i = 0
+        while sprt.status() is None:
+            sprt.add(0.2 + (0.05 if i % 2 else -0.05))
+            i += 1
+        n = sprt.n
+        for i in range(200):
+            sprt.add(-0.2 + (0.05 if i % 2 else -0.05))
+        self.assertEqual(sprt.status(), "H1")
+        self.assertEqual(sprt.n, n)
+
+    def test_decided_once_both_verdicts_recorded(self):
+        """Test that an A/B run is decided when each test has latched its own verdict"""
+        test = ABTest("a.json", "b.json")
+        for i in range(200):
+            test.score_test.add(0.6 + (0.05 if i % 2 else -0.05))
+        self.assertFalse(test.decided())
+        for i in range(200):
+            test.time_test.add(0.3 + (0.05 if i % 2 else -0.05))
+        self.assertTrue(test.decided())
+
+    def test_pairs_counted_after_verdict(self):
+        """Test that the summary counts every recorded pair, not only those the SPRT saw"""
+        test = ABTest("a.json", "b.json")
+        for i in range(300):
+            test._record({"results": [1.0, 0.5], "score": 0.75, "time_a": 0.01, "time_b": 0.01,
+                          "time_saving": 0.3 + (0.05 if i % 2 else -0.05)})
+        summary = test.summary()
+        self.assertEqual(summary["score_verdict"], "H1")
+        self.assertLess(test.score_test.n, 300)
+        self.assertEqual(summary["pairs"], 300)
+        self.assertEqual(summary["wins"] + summary["draws"] + summary["losses"], 2 * summary["pairs"])
+
+    def test_elo_to_score(self):
+        """Test the Elo to expected score conversion"""
+        self.assertAlmostEqual(elo_to_score(0), 0.5)
+        self.assertAlmostEqual(elo_to_score(400), 10 / 11)
+
+    def test_repetition_adjudication(self):
+        """Test that a move cycle played three times is detected"""
+        cycle = ["g1f3", "g8f6", "f3g1", "f6g8"]
+        self.assertFalse(_is_repetition(["e2e4"] + cycle * 2))
+        self.assertTrue(_is_repetition(["e2e4"] + cycle * 3))
+
+class TestABHarness(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_a = write_config(os.path.join(self.temp_dir, "a.json"))
+        self.config_b = write_config(os.path.join(self.temp_dir, "b.json"),
+                                     search={"default_depth": 1})
+
+    def tearDown(self):
+        os.environ.pop("FAKE_SF_MATE_AFTER_PLIES", None)
+        shutil.rmtree(self.temp_dir)
+
+    def test_checkmate_ends_game(self):
+        """Test that a checkmated side to move loses the game"""
+        os.environ["FAKE_SF_MATE_AFTER_PLIES"] = "3"
+        with EnginePool(1, self.config_a) as pool_a, EnginePool(1, self.config_b) as pool_b:
+            with pool_a.engine() as white, pool_b.engine() as black:
+                result, times = play_game(white, black, [])
+        # Black is to move after three plies and has been mated
+        self.assertEqual(result, 1.0)
+        self.assertEqual(len(times["white"]), 2)
+        self.assertEqual(len(times["black"]), 1)
+
+    def test_run_stops_at_max_pairs(self):
+        """Test a short parallel A/B run end to end"""
+        os.environ["FAKE_SF_MATE_AFTER_PLIES"] = "6"
+        test = ABTest(self.config_a, self.config_b, concurrency=2, max_pairs=3, max_plies=20)
+        summary = test.run()
+        self.assertEqual(summary["pairs"], 3)
+        self.assertEqual(summary["games"], 6)
+        self.assertEqual(summary["wins"] + summary["draws"] + summary["losses"], 6)
+        self.assertGreater(summary["avg_move_time_a"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import sys
+from contextlib import redirect_stdout
+sys.path.append('..')
+from info_relay import InfoRelay
+from monkfish import MonkFishParser, pv_entry, most_equal, MATE_SCORE
+from uci import UCIHandler, parse_go
+from tests.fake_stockfish import FakeStockfish, write_config
+
+SEARCHMOVES = ["e2e4", "d2d4", "g1f3", "c2c4"]
+
+def fake_scores(position, moves, depth):
+    """Scores the fake engine gives `moves` (MonkFish sends startpos as "position startpos moves")"""
+    fake = FakeStockfish()
+    fake.position = position
+    return {move: fake.score_for(move, depth) / 100.0 for move in moves}
+
+class TestInfoParsing(unittest.TestCase):
+
+    def test_pv_entry(self):
+        """Test reading depth, multipv, move and score from info lines"""
+        line = b"info depth 12 seldepth 16 multipv 3 score cp -24 nodes 99 nps 1 time 5 pv g1f3 d7d5"
+        self.assertEqual(pv_entry(line), (12, 3, "g1f3", -0.24))
+        self.assertEqual(pv_entry(b"info depth 7 score mate -2 nodes 5 pv h2h3 d8h4"), (7, 1, "h2h3", -MATE_SCORE))
+        self.assertIsNone(pv_entry(b"info depth 9 multipv 1 score cp 31 lowerbound nodes 5 pv e2e4"))
+        self.assertIsNone(pv_entry(b"info depth 9 currmove e2e4 currmovenumber 1"))
+        self.assertIsNone(pv_entry(b"info depth 0 score mate 0"))
+
+    def test_most_equal(self):
+        """Test that the line nearest 0.00 wins and Stockfish's order breaks ties"""
+        self.assertEqual(most_equal({1: ("e2e4", 0.3), 2: ("d2d4", -0.1), 3: ("c2c4", 0.1)}), ("d2d4", -0.1))
+        self.assertEqual(most_equal({2: ("d2d4", 0.5), 1: ("e2e4", 0.5)}), ("e2e4", 0.5))
+
+    def test_parse_go(self):
+        """Test spotting infinite and the searchmoves list"""
+        self.assertEqual(parse_go("go infinite"), (True, []))
+        self.assertEqual(parse_go("go searchmoves e2e4 d2d4 infinite"), (True, ["e2e4", "d2d4"]))
+        self.assertEqual(parse_go("go depth 5"), (False, []))
+
+class TestInfiniteAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = write_config(os.path.join(self.temp_dir, "config.json"))
+        os.environ["FAKE_SF_DELAY"] = "0.05"
+
+    def tearDown(self):
+        del os.environ["FAKE_SF_DELAY"]
+        shutil.rmtree(self.temp_dir)
+
+    def test_analyse_until_stop(self):
+        """Test that analysis keeps deepening, honours searchmoves and reports only changes at once"""
+        parser = MonkFishParser(self.config)
+        emitted = []
+        relay = InfoRelay(emit=emitted.append, interval=60)
+        stop = threading.Event()
+        result = []
+        thread = threading.Thread(target=lambda: result.append(
+            parser.analyse("position startpos", SEARCHMOVES, relay, stop)))
+        try:
+            thread.start()
+            time.sleep(0.6)
+            stop.set()
+            parser.stop()
+            thread.join(5)
+        finally:
+            parser.quit()
+        move, score = result[0]
+        self.assertIn(move, SEARCHMOVES)
+        self.assertEqual(relay.candidate, (move, score))
+        # Each depth leaves the ranking of the same moves shifted by at most a centipawn
+        expected = {most_equal(dict(enumerate(fake_scores("position startpos moves", SEARCHMOVES, depth).items())))[0]
+                    for depth in (1, 2, 3)}
+        self.assertIn(move, expected)
+        self.assertGreater(parser.last_search_nodes, 0)
+        # One throttled stats line plus one per change of recommendation, not one per info line
+        self.assertLessEqual(len(emitted), 1 + len(expected) + 1)
+
+    def test_stop_before_go(self):
+        """Test that a stop racing ahead of the go still ends the search"""
+        parser = MonkFishParser(self.config)
+        stop = threading.Event()
+        stop.set()
+        try:
+            started = time.perf_counter()
+            move, _ = parser.analyse("position startpos", stop_event=stop)
+            elapsed = time.perf_counter() - started
+        finally:
+            parser.quit()
+        self.assertTrue(move)
+        self.assertLess(elapsed, 5)
+
+class TestUCIInfinite(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.handler = UCIHandler(write_config(os.path.join(self.temp_dir, "config.json")))
+        self.output = io.StringIO()
+        os.environ["FAKE_SF_DELAY"] = "0.05"
+
+    def tearDown(self):
+        del os.environ["FAKE_SF_DELAY"]
+        if self.handler.parser:
+            self.handler.parser.quit()
+        shutil.rmtree(self.temp_dir)
+
+    def test_go_infinite_and_stop(self):
+        """Test that go infinite returns at once and bestmove only follows stop"""
+        with redirect_stdout(self.output):
+            self.handler.handle_position("position startpos")
+            started = time.perf_counter()
+            self.handler.handle_go("go infinite searchmoves " + " ".join(SEARCHMOVES))
+            self.assertLess(time.perf_counter() - started, 2)
+            time.sleep(0.5)
+            self.assertNotIn("bestmove", self.output.getvalue())
+            started = time.perf_counter()
+            self.handler.handle_stop()
+            stop_seconds = time.perf_counter() - started
+        lines = self.output.getvalue().splitlines()
+        bestmoves = [line for line in lines if line.startswith("bestmove")]
+        self.assertEqual(len(bestmoves), 1)
+        self.assertIn(bestmoves[0].split()[1], SEARCHMOVES)
+        self.assertLess(stop_seconds, 1)
+        self.assertTrue(any(" currmove " in line for line in lines))
+        self.assertIsNone(self.handler.analysis)
+
+    def test_stray_stop_is_ignored(self):
+        """Test that stop without a running analysis prints nothing"""
+        with redirect_stdout(self.output):
+            self.handler.handle_stop()
+        self.assertEqual(self.output.getvalue(), "")
+
+    def test_go_replaces_running_analysis(self):
+        """Test that a new go finishes the running analysis before searching"""
+        with redirect_stdout(self.output):
+            self.handler.handle_position("position startpos")
+            self.handler.handle_go("go infinite")
+            time.sleep(0.2)
+            self.handler.handle_go("go depth 1")
+        bestmoves = [line for line in self.output.getvalue().splitlines() if line.startswith("bestmove")]
+        self.assertEqual(len(bestmoves), 2)
+        self.assertNotIn("(none)", bestmoves[1])
+
+if __name__ == '__main__':
+    unittest.main()
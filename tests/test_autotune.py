@@ -0,0 +1,69 @@
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+sys.path.append('..')
+from autotune import Autotuner, pareto_frontier, suggest_configs, parameter_grid, to_config_sections
+from tests.fake_stockfish import write_config
+
+def _result(latency, error, depth):
+    return {"params": {"Search_Depth": depth}, "latency_p90": latency, "equality_error": error}
+
+class TestAutotuneSelection(unittest.TestCase):
+
+    def test_parameter_grid(self):
+        """Test that the grid expands to every combination"""
+        combos = parameter_grid({"MultiPV": [10, 20], "Search_Depth": [2, 3, 4]})
+        self.assertEqual(len(combos), 6)
+        self.assertIn({"MultiPV": 20, "Search_Depth": 3}, combos)
+
+    def test_pareto_frontier(self):
+        """Test that dominated settings are dropped from the frontier"""
+        fast = _result(0.05, 0.30, 1)
+        slow_accurate = _result(0.80, 0.05, 4)
+        dominated = _result(0.90, 0.40, 5)
+        frontier = pareto_frontier([dominated, slow_accurate, fast])
+        self.assertEqual(frontier, [fast, slow_accurate])
+
+    def test_suggestions_respect_time_budget(self):
+        """Test that each time control gets the most accurate setting it can afford"""
+        frontier = [_result(0.05, 0.30, 1), _result(0.80, 0.05, 4)]
+        suggestions = suggest_configs(frontier, {"bullet": 0.1, "rapid": 2.0, "tiny": 0.01})
+        self.assertEqual(suggestions["bullet"], {"Search_Depth": 1})
+        self.assertEqual(suggestions["rapid"], {"Search_Depth": 4})
+        # Nothing fits: fall back to the fastest setting
+        self.assertEqual(suggestions["tiny"], {"Search_Depth": 1})
+
+    def test_config_sections(self):
+        """Test that tuned options map back to config file keys"""
+        sections = to_config_sections({"Drawing_Threshold": 5, "MultiPV": 20})
+        self.assertEqual(sections, {"search": {"drawing_threshold": 0.05}, "engine": {"multipv": 20}})
+
+class TestAutotuneRun(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = write_config(os.path.join(self.temp_dir, "config.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_sweep_with_engine_pool(self):
+        """Test a small sweep end to end"""
+        tuner = Autotuner(
+            self.config_file,
+            grid={"Search_Depth": [1, 2], "MultiPV": [5]},
+            positions=["position startpos", "position startpos moves e2e4", "8/8/4k3/8/8/4K3/8/8 w - - 0 1"],
+            workers=2, reference_depth=3, chunk_size=2,
+        )
+        report = tuner.run()
+        self.assertEqual(len(report["results"]), 2)
+        self.assertTrue(report["frontier"])
+        self.assertEqual(set(report["suggestions"]), {"bullet", "blitz", "rapid", "classical"})
+        for result in report["results"]:
+            self.assertGreater(result["latency_p90"], 0)
+            self.assertGreaterEqual(result["equality_error"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import json
+import os
+import shutil
+import stat
+import tempfile
+import sys
+sys.path.append('..')
+from build_select import (cpu_flags, build_name, is_compatible, find_candidates, run_bench, select_build,
+                          record_selection)
+from tests.fake_stockfish import FAKE_STOCKFISH
+
+X86_FLAGS = "fpu sse sse2 pni ssse3 sse4_1 sse4_2 popcnt avx avx2 fma"
+
+class TestBuildSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.builds = os.path.join(self.temp_dir, "builds")
+        os.makedirs(self.builds)
+        self.root = os.path.join(self.temp_dir, "root")
+        os.makedirs(os.path.join(self.root, "proc"))
+        with open(os.path.join(self.root, "proc/cpuinfo"), "w") as f:
+            f.write(f"processor\t: 0\nflags\t\t: {X86_FLAGS}\n\nprocessor\t: 1\nflags\t\t: {X86_FLAGS}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def add_build(self, name, nps=None, crash=False):
+        """A fake Stockfish build whose bench reports `nps`, or dies like an illegal instruction"""
+        path = os.path.join(self.builds, name)
+        with open(path, "w") as f:
+            f.write("#!/bin/sh\n")
+            if crash:
+                f.write("kill -ILL $$\n")
+            f.write(f'FAKE_SF_BENCH_NPS={nps} exec "{sys.executable}" "{FAKE_STOCKFISH}" "$@"\n')
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        return path
+
+    def test_cpu_flags(self):
+        """Test reading x86 flags and ARM features"""
+        self.assertIn("avx2", cpu_flags(self.root))
+        with open(os.path.join(self.root, "proc/cpuinfo"), "w") as f:
+            f.write("processor\t: 0\nFeatures\t: fp asimd asimddp\n")
+        self.assertEqual(cpu_flags(self.root), {"fp", "asimd", "asimddp"})
+        self.assertEqual(cpu_flags(os.path.join(self.temp_dir, "missing")), set())
+
+    def test_build_names_and_compatibility(self):
+        """Test naming builds from file names and matching them to the CPU"""
+        flags = set(X86_FLAGS.split())
+        self.assertEqual(build_name("stockfish-ubuntu-x86-64-avx2"), "x86-64-avx2")
+        self.assertEqual(build_name("stockfish-android-armv8-dotprod"), "armv8-dotprod")
+        self.assertIsNone(build_name("stockfish"))
+        self.assertTrue(is_compatible("x86-64-avx2", flags, "x86_64"))
+        self.assertFalse(is_compatible("x86-64-bmi2", flags, "x86_64"))
+        self.assertFalse(is_compatible("x86-64", flags, "aarch64"))
+        self.assertTrue(is_compatible("armv8", {"asimd"}, "aarch64"))
+        self.assertTrue(is_compatible(None, flags, "x86_64"))
+
+    def test_run_bench(self):
+        """Test reading NPS from bench and failing on a crashing build"""
+        self.assertEqual(run_bench(self.add_build("stockfish-a", nps=1234567)), 1234567)
+        with self.assertRaises(RuntimeError):
+            run_bench(self.add_build("stockfish-b", crash=True))
+
+    def test_select_fastest(self):
+        """Test that incompatible and crashing builds are skipped and the fastest wins"""
+        self.add_build("stockfish-ubuntu-x86-64-modern", nps=1000000)
+        avx2 = self.add_build("stockfish-ubuntu-x86-64-avx2", nps=1800000)
+        self.add_build("stockfish-ubuntu-x86-64-bmi2", nps=9000000)
+        self.add_build("stockfish-ubuntu-x86-64-avx512", nps=9000000, crash=True)
+        with open(os.path.join(self.builds, "stockfish.txt"), "w") as f:
+            f.write("not a binary")
+        self.assertEqual(len(find_candidates(self.builds)), 4)
+
+        results, best = select_build(self.builds, root=self.root, machine="x86_64")
+        by_build = {r["build"]: r for r in results}
+        self.assertEqual(best["path"], avx2)
+        self.assertIn("instructions", by_build["x86-64-bmi2"]["error"])
+        self.assertIsNone(by_build["x86-64-avx512"]["nps"])
+        self.assertEqual(by_build["x86-64-modern"]["nps"], 1000000)
+
+        config_file = os.path.join(self.temp_dir, "config.json")
+        with open(config_file, "w") as f:
+            json.dump({"engine": {"stockfish_path": "./stockfish", "skill_level": 7}}, f)
+        record_selection(config_file, results, best)
+        with open(config_file) as f:
+            saved = json.load(f)
+        self.assertEqual(saved["engine"], {"stockfish_path": avx2, "skill_level": 7})
+        self.assertEqual(saved["build"]["selected"], "x86-64-avx2")
+        self.assertEqual(saved["build"]["nps"], 1800000)
+        self.assertEqual(sorted(saved["build"]["results"].values()), [1000000, 1800000])
+
+    def test_unreadable_config_is_left_alone(self):
+        """A config that doesn't parse is never replaced with defaults"""
+        config_file = os.path.join(self.temp_dir, "config.json")
+        with open(config_file, "w") as f:
+            f.write('{"engine": {"skill_level": 7,')
+        with self.assertRaises(RuntimeError):
+            best = {"path": "/opt/stockfish", "build": None, "nps": 1, "error": None}
+            record_selection(config_file, [best], best)
+        with open(config_file) as f:
+            self.assertEqual(f.read(), '{"engine": {"skill_level": 7,')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import os
+import shutil
+import tempfile
+import sys
+sys.path.append('..')
+from capitalize import CapitalizeMode
+from monkfish import MonkFishParser
+from config_watcher import validate
+from config import MonkFishConfig
+from uci_options import UCIOptions
+from tests.fake_stockfish import write_config
+
+class TestCapitalizeMode(unittest.TestCase):
+
+    def test_enters_after_confirmed_trend(self):
+        """The margin has to hold for confirm_moves searches in a row"""
+        mode = CapitalizeMode()
+        self.assertFalse(mode.update(2.5, 2.0, 1.0, confirm_moves=2))
+        self.assertFalse(mode.update(1.5, 2.0, 1.0, confirm_moves=2))
+        self.assertFalse(mode.update(2.1, 2.0, 1.0, confirm_moves=2))
+        self.assertTrue(mode.update(3.0, 2.0, 1.0, confirm_moves=2))
+        self.assertTrue(mode.active)
+
+    def test_hysteresis(self):
+        """Once on, the mode stays on until the eval drops below the exit margin"""
+        mode = CapitalizeMode()
+        mode.update(2.5, 2.0, 1.0)
+        self.assertFalse(mode.update(1.2, 2.0, 1.0))
+        self.assertTrue(mode.active)
+        self.assertTrue(mode.update(0.8, 2.0, 1.0))
+        self.assertFalse(mode.active)
+        self.assertEqual(mode.switches, 2)
+
+    def test_savings(self):
+        """Capitalize searches are compared with the average equal-mode search"""
+        mode = CapitalizeMode()
+        self.assertEqual(mode.savings()["nodes_saved"], 0)
+        mode.record(100000, 1.0)
+        mode.record(300000, 3.0)
+        mode.update(5.0, 2.0, 1.0)
+        mode.record(20000, 0.3)
+        saved = mode.savings()
+        self.assertEqual(saved["moves"], 1)
+        self.assertEqual(saved["nodes_saved"], 180000)
+        self.assertAlmostEqual(saved["seconds_saved"], 1.7)
+
+    def test_reset_keeps_totals(self):
+        """A new game plays for equality again but the cost totals remain"""
+        mode = CapitalizeMode()
+        mode.update(5.0, 2.0, 1.0)
+        mode.record(1000, 0.1)
+        mode.reset()
+        self.assertFalse(mode.active)
+        self.assertEqual(mode.stats["capitalize"][0], 1)
+
+    def test_exit_margin_validated(self):
+        """A reload with exit_margin above margin is rejected"""
+        sections = MonkFishConfig.from_dict({"capitalize": {"margin": 1.0, "exit_margin": 2.0}}).config
+        self.assertTrue(any("capitalize" in error for error in validate(sections)))
+
+    def test_option_is_boolean(self):
+        """A truthy config value still gives the Capitalize check option a boolean"""
+        options = UCIOptions(MonkFishConfig.from_dict({"capitalize": {"enabled": 1}}))
+        self.assertIs(options.options["Capitalize"]["default"], True)
+        self.assertIs(options.get_value("Capitalize"), True)
+
+
+class TestCapitalizeSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        # A margin below any fake score, so the mode turns on after two searches
+        config_file = write_config(os.path.join(self.temp_dir, "config.json"),
+                                   capitalize={"enabled": True, "margin": -5.0, "exit_margin": -6.0,
+                                               "confirm_moves": 2, "movetime_ms": 20})
+        self.parser = MonkFishParser(config_file)
+
+    def tearDown(self):
+        self.parser.quit()
+        shutil.rmtree(self.temp_dir)
+
+    def test_switches_to_single_pv_and_back(self):
+        """Two winning evals switch to MultiPV 1 at full strength with movetime, a lost margin switches back"""
+        position = "position startpos moves e2e4"
+        for _ in range(2):
+            self.parser.get_drawing_move(position)
+            self.assertEqual(self.parser.last_search_limit[0], "depth")
+        self.assertTrue(self.parser.capitalize.active)
+
+        move, score = self.parser.get_drawing_move(position)
+        self.assertEqual(self.parser.last_search_limit, ("movetime", 20))
+        self.assertEqual(self.parser.option_state.applied["MultiPV"], "1")
+        self.assertEqual(self.parser.option_state.applied["Skill Level"], "20")
+        self.assertNotEqual(score, 0.0)
+
+        self.parser.config.config["capitalize"]["exit_margin"] = 5.0
+        self.parser.get_drawing_move(position)
+        self.assertFalse(self.parser.capitalize.active)
+        self.parser.get_drawing_move(position)
+        self.assertEqual(self.parser.last_search_limit[0], "depth")
+        self.assertEqual(self.parser.option_state.applied["MultiPV"], "5")
+        self.assertEqual(self.parser.capitalize.savings()["moves"], 2)
+
+    def test_explicit_depth_wins(self):
+        """A caller's explicit depth is kept while capitalizing"""
+        for _ in range(2):
+            self.parser.get_drawing_move("position startpos")
+        self.parser.get_drawing_move("position startpos", target_depth=1)
+        self.assertEqual(self.parser.last_search_limit, ("depth", 1))
+
+    def test_disabled(self):
+        """With the mode off the eval trend is ignored"""
+        self.parser.config.config["capitalize"]["enabled"] = False
+        for _ in range(3):
+            self.parser.get_drawing_move("position startpos")
+        self.assertFalse(self.parser.capitalize.active)
+        self.assertEqual(self.parser.option_state.applied["MultiPV"], "5")
+
+if __name__ == '__main__':
+    unittest.main()
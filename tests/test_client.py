@@ -0,0 +1,134 @@
+import unittest
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import sys
+sys.path.append('..')
+from client import MonkFish, MonkFishOptions, Analysis
+from config import MonkFishConfig
+from monkfish import NoLegalMovesError
+from tests.fake_stockfish import FAKE_STOCKFISH
+
+POSITIONS = ["position startpos"] + [f"position startpos moves {move}" for move in
+                                     ("e2e4", "d2d4", "c2c4", "g1f3", "b1c3", "e2e3")]
+
+def options(**settings):
+    settings = dict({"multipv": 5, "depth": 2, "drawing_threshold": 0.5}, **settings)
+    return MonkFishOptions(stockfish_path=FAKE_STOCKFISH, **settings)
+
+class TestMonkFishOptions(unittest.TestCase):
+
+    def test_from_dict_touches_no_files(self):
+        """Test that an in-memory config neither reads nor creates monkfish_config.json"""
+        temp_dir = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            config = options(depth=7, threads=2).to_config()
+            self.assertEqual(os.listdir(temp_dir), [])
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(temp_dir)
+        self.assertIsNone(config.config_file)
+        self.assertEqual(config.get_default_depth(), 7)
+        self.assertEqual(config.get_engine_path(), FAKE_STOCKFISH)
+        self.assertFalse(config.get_decision_log_enabled())
+        # Sections left out keep their defaults
+        self.assertEqual(config.get_hang_timeout(), MonkFishConfig.from_dict({}).get_hang_timeout())
+
+    def test_option_overrides(self):
+        """Test that explicit threads/hash join the raw engine options"""
+        opts = options(threads=2, hash_mb=64, engine_options={"Move Overhead": 30})
+        self.assertEqual(opts.option_overrides(), {"Threads": 2, "Hash": 64, "Move Overhead": 30})
+        self.assertEqual(options().option_overrides(), {})
+
+class TestMonkFishClient(unittest.IsolatedAsyncioTestCase):
+
+    async def test_drawing_move(self):
+        """Test one search through the async context manager"""
+        async with MonkFish(options()) as mf:
+            result = await mf.drawing_move("position startpos")
+            again = await mf.drawing_move("position startpos")
+            engine = mf.pool.workers[0].engine
+        self.assertIsInstance(result, Analysis)
+        self.assertTrue(result.move)
+        self.assertEqual((result.move, result.score), (again.move, again.score))
+        self.assertIsNone(result.error)
+        self.assertIsNotNone(engine.returncode)
+
+    async def test_connection_reuse(self):
+        """Test that every search runs on the engines started with the client"""
+        async with MonkFish(options(engines=2)) as mf:
+            pids = {worker.engine.pid for worker in mf.pool.workers}
+            async for _ in mf.analyse_many(POSITIONS):
+                pass
+            self.assertEqual({worker.engine.pid for worker in mf.pool.workers}, pids)
+
+    async def test_analyse_many(self):
+        """Test that every position comes back once, tagged with its index"""
+        async with MonkFish(options(engines=2)) as mf:
+            expected = {i: (await mf.drawing_move(p)).move for i, p in enumerate(POSITIONS)}
+            results = [r async for r in mf.analyse_many(POSITIONS, concurrency=3)]
+        self.assertEqual(sorted(r.index for r in results), list(range(len(POSITIONS))))
+        self.assertEqual({r.index: r.move for r in results}, expected)
+        self.assertTrue(all(r.position == POSITIONS[r.index] for r in results))
+
+    async def test_analyse_many_reports_failures(self):
+        """Test that a position without legal moves is reported rather than ending the stream"""
+        os.environ["FAKE_SF_MATE_AFTER_PLIES"] = "1"
+        try:
+            async with MonkFish(options()) as mf:
+                with self.assertRaises(NoLegalMovesError):
+                    await mf.drawing_move(POSITIONS[1])
+                results = [r async for r in mf.analyse_many(POSITIONS[:3])]
+        finally:
+            del os.environ["FAKE_SF_MATE_AFTER_PLIES"]
+        by_index = {r.index: r for r in results}
+        self.assertTrue(by_index[0].move)
+        self.assertIsNone(by_index[1].move)
+        self.assertIn("no legal moves", by_index[1].error.lower())
+
+    async def test_cancel_stops_search(self):
+        """Test that cancelling a call stops Stockfish and frees the engine for the next one"""
+        os.environ["FAKE_SF_DELAY"] = "0.2"
+        try:
+            async with MonkFish(options()) as mf:
+                task = asyncio.ensure_future(mf.drawing_move("position startpos", depth=100))
+                await asyncio.sleep(0.5)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                started = time.perf_counter()
+                result = await mf.drawing_move("position startpos", depth=1)
+                elapsed = time.perf_counter() - started
+        finally:
+            del os.environ["FAKE_SF_DELAY"]
+        self.assertTrue(result.move)
+        self.assertLess(elapsed, 5)
+
+    async def test_break_cancels_remaining(self):
+        """Test that leaving analyse_many early stops the searches still running"""
+        os.environ["FAKE_SF_DELAY"] = "0.2"
+        try:
+            async with MonkFish(options(engines=2)) as mf:
+                started = time.perf_counter()
+                async for result in mf.analyse_many(POSITIONS * 3, depth=3):
+                    break
+                result = await mf.drawing_move("position startpos", depth=1)
+                elapsed = time.perf_counter() - started
+                idle = mf.pool._idle.qsize()
+        finally:
+            del os.environ["FAKE_SF_DELAY"]
+        self.assertTrue(result.move)
+        self.assertLess(elapsed, 5)
+        self.assertEqual(idle, 2)
+
+    async def test_not_started(self):
+        """Test that searching before start() is an error"""
+        with self.assertRaises(RuntimeError):
+            await MonkFish(options()).drawing_move("position startpos")
+
+if __name__ == '__main__':
+    unittest.main()
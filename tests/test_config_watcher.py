@@ -0,0 +1,165 @@
+import unittest
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import sys
+from contextlib import redirect_stderr
+sys.path.append('..')
+from config import MonkFishConfig
+from config_watcher import ConfigWatcher, config_diff, validate, needs_restart
+from engine_pool import EnginePool
+from uci import UCIHandler
+from tests.fake_stockfish import write_config
+
+class RecordingTarget:
+    def __init__(self):
+        self.applied = []
+
+    def apply_config(self, changes):
+        self.applied.append(changes)
+
+def record_idle_count(pool, worker, seen):
+    """Note how many workers are idle each time `worker` pushes options to Stockfish"""
+    update = worker.update_options
+
+    def recording_update():
+        seen.append(pool._idle.qsize())
+        return update()
+    worker.update_options = recording_update
+
+class TestValidation(unittest.TestCase):
+
+    def test_config_diff(self):
+        """Test that only changed settings are listed"""
+        old = {"engine": {"multipv": 5, "skill_level": 3}, "search": {"default_depth": 2}}
+        new = {"engine": {"multipv": 8, "skill_level": 3}, "search": {"default_depth": 2}, "extra": {"a": 1}}
+        self.assertEqual(config_diff(old, new), [("engine", "multipv", 5, 8), ("extra", "a", None, 1)])
+
+    def test_validate(self):
+        """Test that option ranges and resource limits are checked"""
+        self.assertEqual(validate(MonkFishConfig.from_dict({}).config), [])
+        for section, key, value in (("engine", "multipv", 0), ("engine", "skill_level", 30),
+                                    ("search", "default_depth", "deep"), ("resources", "memory_fraction", 2),
+                                    ("resources", "max_threads", -1)):
+            errors = validate(MonkFishConfig.from_dict({section: {key: value}}).config)
+            self.assertTrue(errors, f"{section}.{key} = {value!r} passed")
+
+    def test_needs_restart(self):
+        """Test which settings can't be applied live"""
+        self.assertTrue(needs_restart("engine", "stockfish_path"))
+        self.assertTrue(needs_restart("decision_log", "path"))
+        self.assertFalse(needs_restart("engine", "multipv"))
+        self.assertTrue(needs_restart("tablebase", "probe_before_search"))
+
+class TestConfigWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = write_config(os.path.join(self.temp_dir, "config.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def edit(self, section, key, value):
+        with open(self.config_file) as f:
+            data = json.load(f)
+        data.setdefault(section, {})[key] = value
+        with open(self.config_file, "w") as f:
+            json.dump(data, f)
+        # Some filesystems only keep whole-second mtimes; the size or inode still tells edits apart
+        os.utime(self.config_file, ns=(0, os.stat(self.config_file).st_mtime_ns + 1))
+
+    def test_reload_and_reject(self):
+        """Test that valid edits are applied and invalid or half-written ones are not"""
+        config = MonkFishConfig(self.config_file)
+        target = RecordingTarget()
+        watcher = ConfigWatcher(config, targets=[target])
+        self.assertEqual(watcher.check(), [])
+        self.edit("engine", "multipv", 9)
+        self.assertEqual(watcher.check(), [("engine", "multipv", 5, 9)])
+        self.assertEqual(config.get_multipv(), 9)
+        self.assertEqual(target.applied, [[("engine", "multipv", 5, 9)]])
+        with redirect_stderr(io.StringIO()) as err:
+            self.edit("engine", "multipv", 0)
+            self.assertEqual(watcher.check(), [])
+            with open(self.config_file, "w") as f:
+                f.write('{"engine": {')
+            self.assertEqual(watcher.check(), [])
+        self.assertIn("rejected", err.getvalue())
+        self.assertEqual(config.get_multipv(), 9)
+        self.assertEqual((watcher.reloads, watcher.rejected), (1, 2))
+
+    def test_pool_rolls_changes(self):
+        """Test that a pool updates one worker at a time, busy ones on return, without restarting engines"""
+        config = MonkFishConfig(self.config_file)
+        watcher = ConfigWatcher(config)
+        with EnginePool(2, config=config) as pool:
+            watcher.targets.append(pool)
+            pids = {worker.engine.pid for worker in pool.workers}
+            idle_during_update = []
+            for worker in pool.workers:
+                record_idle_count(pool, worker, idle_during_update)
+            with pool.engine() as busy:
+                self.edit("engine", "multipv", 3)
+                self.edit("resources", "max_hash_mb", 32)
+                changes = watcher.check()
+                self.assertEqual({(s, k) for s, k, _, _ in changes},
+                                 {("engine", "multipv"), ("resources", "max_hash_mb")})
+                self.assertEqual(busy.option_state.applied["MultiPV"], "5")
+                # The idle worker was taken out alone while the busy one kept its job
+                self.assertEqual(idle_during_update, [0])
+            self.assertEqual(idle_during_update, [0, 1])
+            for worker in pool.workers:
+                self.assertEqual(worker.option_state.applied["MultiPV"], "3")
+                self.assertLessEqual(int(worker.option_state.applied["Hash"]), 32)
+                with pool.engine() as engine:
+                    self.assertTrue(engine.get_drawing_move("position startpos")[0])
+            self.assertEqual({worker.engine.pid for worker in pool.workers}, pids)
+
+    def test_uci_handler_reload(self):
+        """Test that the UCI handler takes reloaded values as pending options"""
+        handler = UCIHandler(self.config_file)
+        watcher = ConfigWatcher(handler.config, targets=[handler])
+        with redirect_stderr(io.StringIO()):
+            self.edit("search", "drawing_threshold", 0.2)
+            watcher.check()
+        self.assertEqual(handler.uci_options.get_value("Drawing_Threshold"), 20)
+        self.assertTrue(handler.options_dirty)
+
+    def test_uci_handler_resources_reload(self):
+        """Test that reloaded resource limits reach the Hash and Threads options"""
+        handler = UCIHandler(self.config_file)
+        watcher = ConfigWatcher(handler.config, targets=[handler])
+        with redirect_stderr(io.StringIO()):
+            self.edit("resources", "max_hash_mb", 8)
+            watcher.check()
+        self.assertEqual(handler.uci_options.options["Hash"]["max"], 8)
+        self.assertLessEqual(handler.uci_options.get_hash(), 8)
+        self.assertTrue(handler.options_dirty)
+
+    def test_reload_during_sync_stays_pending(self):
+        """Test that a reload landing while options are being sent is not marked as sent"""
+        handler = UCIHandler(self.config_file)
+        watcher = ConfigWatcher(handler.config, targets=[handler])
+        reload = threading.Thread(target=watcher.check)
+
+        class SlowParser:
+            def update_options(parser):
+                reload.start()
+                time.sleep(0.1)
+
+        handler.parser = SlowParser()
+        handler.options_dirty = True
+        with redirect_stderr(io.StringIO()):
+            self.edit("search", "drawing_threshold", 0.2)
+            handler.sync_options()
+            reload.join()
+        self.assertEqual(handler.uci_options.get_value("Drawing_Threshold"), 20)
+        self.assertTrue(handler.options_dirty)
+
+if __name__ == '__main__':
+    unittest.main()
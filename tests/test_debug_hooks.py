@@ -0,0 +1,95 @@
+import unittest
+import io
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import sys
+from contextlib import redirect_stdout, redirect_stderr
+sys.path.append('..')
+from debug_hooks import MoveTrace, TRACE_MARKS
+from uci import UCIHandler
+from tests.fake_stockfish import write_config
+
+class FakeClock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self):
+        return self.now
+
+class TestMoveTrace(unittest.TestCase):
+
+    def test_breakdown(self):
+        """Test that engine time and Python overhead are split at go_sent/bestmove"""
+        clock = FakeClock()
+        trace = MoveTrace(clock=clock)
+        for name, now in (("options_synced", 10.001), ("position_sent", 10.003), ("go_sent", 10.004)):
+            clock.now = now
+            trace.mark(name)
+        clock.now = 10.020
+        trace.output()
+        clock.now = 10.050
+        trace.output()
+        clock.now = 10.054
+        trace.mark("bestmove")
+        clock.now = 10.055
+        trace.mark("done")
+        result = trace.breakdown()
+        self.assertEqual(list(result["marks_ms"]), list(TRACE_MARKS))
+        self.assertAlmostEqual(result["marks_ms"]["first_info"], 20.0, places=3)
+        self.assertAlmostEqual(result["marks_ms"]["last_info"], 50.0, places=3)
+        self.assertAlmostEqual(result["engine_ms"], 50.0, places=3)
+        self.assertAlmostEqual(result["python_ms"], 5.0, places=3)
+
+class TestDebugOptions(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, "debug")
+        self.handler = UCIHandler(write_config(os.path.join(self.temp_dir, "config.json"),
+                                               debug={"output_dir": self.output_dir}))
+        self.handler.handle_position("position startpos moves e2e4")
+
+    def tearDown(self):
+        if self.handler.parser:
+            self.handler.parser.quit()
+        shutil.rmtree(self.temp_dir)
+
+    def go(self):
+        with redirect_stdout(io.StringIO()) as out, redirect_stderr(io.StringIO()):
+            self.handler.handle_go("go")
+        self.assertTrue(out.getvalue().splitlines()[-1].startswith("bestmove "))
+
+    def test_off_by_default(self):
+        """Test that nothing is profiled or written while both options are off"""
+        self.go()
+        self.assertIsNone(self.handler.debug.profiler)
+        self.assertFalse(os.path.exists(self.output_dir))
+
+    def test_trace_files(self):
+        """Test that Debug_Trace writes every stage of the move"""
+        self.handler.uci_options.set_option("Debug_Trace", "true")
+        self.go()
+        with open(os.path.join(self.output_dir, "move-0001.trace.json")) as f:
+            record = json.load(f)
+        self.assertEqual(record["position"], "position startpos moves e2e4")
+        self.assertEqual(list(record["marks_ms"]), list(TRACE_MARKS))
+        marks = list(record["marks_ms"].values())
+        self.assertEqual(marks, sorted(marks))
+        self.assertGreaterEqual(record["python_ms"], 0)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "move-0001.pstats")))
+
+    def test_profile_files(self):
+        """Test that Debug_Profile writes loadable pstats per move"""
+        self.handler.uci_options.set_option("Debug_Profile", "true")
+        self.go()
+        self.go()
+        for move in (1, 2):
+            stats = pstats.Stats(os.path.join(self.output_dir, f"move-{move:04d}.pstats"))
+            functions = {name for _, _, name in stats.stats}
+            self.assertIn("get_drawing_move", functions)
+
+if __name__ == '__main__':
+    unittest.main()
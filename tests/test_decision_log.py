@@ -0,0 +1,131 @@
+import unittest
+import io
+import os
+import shutil
+import tempfile
+import sys
+from contextlib import redirect_stdout
+sys.path.append('..')
+from decision_log import DecisionLog, candidate_table, read_records, summarize, position_hash
+from decision_report import main as report_main
+from monkfish import MonkFishParser
+from tests.fake_stockfish import write_config
+
+LINES = [
+    b"info depth 1 seldepth 2 multipv 1 score cp 35 nodes 20 nps 1000 time 1 pv e2e4 e7e5",
+    b"info depth 1 seldepth 2 multipv 2 score cp 4 nodes 40 nps 1000 time 1 pv g1f3",
+    b"info depth 2 seldepth 3 multipv 1 score mate 3 nodes 90 nps 1000 time 2 pv d1h5",
+]
+
+class TestDecisionLog(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "decisions.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_candidate_table(self):
+        """Test that info lines become per-move score histories"""
+        table = candidate_table(LINES)
+        self.assertEqual(table["e2e4"], [[1, 1, 35]])
+        self.assertEqual(table["g1f3"], [[1, 2, 4]])
+        self.assertEqual(table["d1h5"], [[2, 1, "M3"]])
+
+    def test_record_written_in_background(self):
+        """Test that a queued decision lands in the file as one compact JSON line"""
+        log = DecisionLog(self.path)
+        log.record("position startpos", "g1f3", 0.04, candidate=["g1f3", 0.04], phase="opening",
+                   limit=("depth", 2), lines=LINES, timings={"search": 0.012, "total": 0.015})
+        log.close()
+        with open(self.path) as f:
+            text = f.read()
+        self.assertEqual(text.count("\n"), 1)
+        self.assertNotIn(": ", text)
+        record = next(read_records(self.path))
+        self.assertEqual(record["pos"], position_hash("position startpos"))
+        self.assertEqual(record["move"], "g1f3")
+        self.assertEqual(record["limit"], ["depth", 2])
+        self.assertEqual(record["ms"], {"search": 12.0, "total": 15.0})
+        self.assertIn("e2e4", record["cands"])
+
+    def test_rotation_keeps_order(self):
+        """Test that records are read back in order across rotated files"""
+        log = DecisionLog(self.path, max_bytes=300, backup_count=40)
+        for index in range(30):
+            log.record(f"position startpos moves {index}", "e2e4", 0.0, lines=LINES)
+        log.close()
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        records = list(read_records(self.path))
+        self.assertEqual(len(records), 30)
+        self.assertEqual([r["pos"] for r in records],
+                         [position_hash(f"position startpos moves {i}") for i in range(30)])
+
+    def test_summarize(self):
+        """Test fallback rates and latency percentiles"""
+        records = [
+            {"src": "search", "fallback": None, "ms": {"total": 10.0}},
+            {"src": "search", "fallback": "no_candidate", "ms": {"total": 30.0}},
+            {"src": "search", "fallback": "candidate_differs", "ms": {"total": 20.0}},
+            {"src": "search", "fallback": None, "ms": {"total": 40.0}},
+            {"src": "tablebase", "fallback": None, "ms": {"total": 1.0}},
+        ]
+        summary = summarize(records)
+        self.assertEqual(summary["moves"], 5)
+        self.assertEqual(summary["fallback_rate"], 0.5)
+        self.assertEqual(summary["fallbacks"], {"no_candidate": 1, "candidate_differs": 1})
+        self.assertEqual(summary["latency_ms"]["total"]["max"], 40.0)
+        self.assertEqual(summary["latency_ms"]["total"]["p50"], 20.0)
+
+    def test_parser_logs_each_move(self):
+        """Test end to end that every searched move is logged with its reason and timings"""
+        config = write_config(os.path.join(self.test_dir, "config.json"),
+                              decision_log={"enabled": True, "path": self.path})
+        parser = MonkFishParser(config)
+        try:
+            move, _ = parser.get_drawing_move("position startpos")
+            parser.get_drawing_move("position startpos moves e2e4")
+        finally:
+            parser.quit()
+        records = list(read_records(self.path))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["move"], move)
+        self.assertEqual(records[0]["src"], "search")
+        self.assertTrue(records[0]["cands"])
+        self.assertIn(records[0]["fallback"], (None, "no_candidate", "candidate_differs"))
+        self.assertEqual(set(records[0]["ms"]), {"tablebase", "setup", "search", "total"})
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(report_main([self.path]), 0)
+        self.assertIn("2 moves", out.getvalue())
+
+    def test_workers_share_one_log(self):
+        """Test that pool workers write through one rotating handler per file"""
+        config = write_config(os.path.join(self.test_dir, "config.json"),
+                              decision_log={"enabled": True, "path": self.path, "max_bytes": 400,
+                                            "backup_count": 40})
+        parsers = [MonkFishParser(config) for _ in range(2)]
+        try:
+            self.assertIs(parsers[0].decision_log, parsers[1].decision_log)
+            for index in range(6):
+                parsers[index % 2].get_drawing_move(f"position startpos moves {'e2e4' if index % 3 else 'd2d4'}")
+            parsers[0].quit()
+            parsers[1].get_drawing_move("position startpos moves c2c4")
+        finally:
+            for parser in parsers:
+                parser.quit()
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertEqual(len(list(read_records(self.path))), 7)
+
+    def test_disabled_by_default(self):
+        """Test that no log is opened unless the config asks for one"""
+        parser = MonkFishParser(write_config(os.path.join(self.test_dir, "config.json")))
+        try:
+            self.assertIsNone(parser.decision_log)
+        finally:
+            parser.quit()
+
+if __name__ == '__main__':
+    unittest.main()
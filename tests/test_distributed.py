@@ -0,0 +1,153 @@
+import unittest
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import sys
+sys.path.append('..')
+from distributed import Coordinator, Worker
+from tests.fake_stockfish import write_config
+
+POSITIONS = ["position startpos"] + [f"position startpos moves {move}" for move in
+                                     ("e2e4", "d2d4", "c2c4", "g1f3", "b1c3", "e2e3", "d2d3", "g2g3")]
+
+class RawWorker:
+    """A hand-driven worker speaking the wire protocol, for simulating misbehaving hosts"""
+
+    def __init__(self, port, slots=1, name="raw"):
+        self.sock = socket.create_connection(("127.0.0.1", port))
+        self.stream = self.sock.makefile("rb")
+        self.send({"type": "hello", "worker": name, "slots": slots})
+
+    def send(self, message):
+        self.sock.sendall((json.dumps(message) + "\n").encode())
+
+    def receive(self):
+        return json.loads(self.stream.readline())
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+class TestDistributed(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = write_config(os.path.join(self.temp_dir, "config.json"))
+        self.threads = []
+
+    def tearDown(self):
+        for thread in self.threads:
+            thread.join(timeout=10)
+        shutil.rmtree(self.temp_dir)
+
+    def start_worker(self, port, name, pool_size=1):
+        worker = Worker("127.0.0.1", port, pool_size, self.config, name=name)
+        thread = threading.Thread(target=worker.run, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        return worker
+
+    def test_worker_skips_malformed_lines(self):
+        """A garbled line from the coordinator is skipped and the worker keeps serving jobs"""
+        listener = socket.create_server(("127.0.0.1", 0))
+        self.start_worker(listener.getsockname()[1], "tolerant")
+        conn, _ = listener.accept()
+        stream = conn.makefile("rb")
+        try:
+            self.assertEqual(json.loads(stream.readline())["type"], "hello")
+            conn.sendall(b'{"type": "job", "id": 1, "posi\n[1, 2]\n')
+            job = {"type": "job", "id": 2, "position": POSITIONS[0], "lease": 30}
+            conn.sendall((json.dumps(job) + "\n").encode())
+            message = json.loads(stream.readline())
+            while message["type"] == "renew":
+                message = json.loads(stream.readline())
+            self.assertEqual((message["type"], message["id"]), ("result", 2))
+            self.assertTrue(message["move"])
+            conn.sendall(b'{"type": "done"}\n')
+        finally:
+            stream.close()
+            conn.close()
+            listener.close()
+
+    def test_coordinator_skips_malformed_messages(self):
+        """Test that bad worker messages are skipped without dropping the connection"""
+        with Coordinator(port=0, lease_seconds=5) as coord:
+            raw = RawWorker(coord.port, slots="many", name="sloppy")
+            raw.sock.sendall(b'[1, 2]\n"hello"\n{"type": "hel\n')
+            raw.send({"type": "hello", "worker": "sloppy", "slots": 1})
+            self.assertTrue(coord.wait_for_workers(1, timeout=10))
+            coord.submit(POSITIONS[:1])
+            job = raw.receive()
+            raw.send({"type": "result", "id": job["id"], "move": "e2e4", "score": 0.0, "seconds": "fast"})
+            raw.send({"type": "result", "id": job["id"], "move": "e2e4", "score": 0.0, "seconds": 0.1})
+            results = list(coord.results(timeout=10))
+            raw.close()
+        self.assertEqual([(r["id"], r["move"]) for r in results], [(job["id"], "e2e4")])
+        self.assertEqual(coord.worker_stats()["sloppy"]["completed"], 1)
+
+    def test_several_workers(self):
+        """Test that jobs spread over several localhost workers and all results stream back"""
+        with Coordinator(port=0, lease_seconds=5) as coord:
+            for index in range(3):
+                self.start_worker(coord.port, f"w{index}", pool_size=1 + index % 2)
+            self.assertTrue(coord.wait_for_workers(3, timeout=30))
+            ids = coord.submit(POSITIONS * 4, depth=2)
+            results = list(coord.results(timeout=30))
+            stats = coord.worker_stats()
+        self.assertEqual(sorted(r["id"] for r in results), ids)
+        self.assertTrue(all(r["move"] for r in results))
+        self.assertEqual(coord.counters["completed"], len(ids))
+        self.assertEqual(sum(s["completed"] for s in stats.values()), len(ids))
+        self.assertEqual(set(stats), {"w0", "w1", "w2"})
+        self.assertTrue(all(s["positions_per_second"] > 0 for s in stats.values()))
+
+    def test_lost_worker_jobs_are_retried(self):
+        """Test that a worker disconnecting mid-job gives its jobs to another worker"""
+        with Coordinator(port=0, lease_seconds=5) as coord:
+            raw = RawWorker(coord.port, slots=2)
+            coord.submit(POSITIONS[:3])
+            held = [raw.receive()["id"], raw.receive()["id"]]
+            raw.close()
+            self.start_worker(coord.port, "healthy")
+            results = {r["id"]: r for r in coord.results(timeout=30)}
+        self.assertEqual(len(results), 3)
+        for job_id in held:
+            self.assertEqual(results[job_id]["worker"], "healthy")
+            self.assertEqual(results[job_id]["attempts"], 2)
+        self.assertEqual(coord.worker_stats()["raw"]["lost"], 2)
+
+    def test_expired_lease(self):
+        """Test that a silent worker loses its lease and a late result is ignored"""
+        with Coordinator(port=0, lease_seconds=0.3) as coord:
+            raw = RawWorker(coord.port, name="silent")
+            self.start_worker(coord.port, "healthy")
+            self.assertTrue(coord.wait_for_workers(2, timeout=30))
+            coord.submit(POSITIONS[:1])
+            job = raw.receive()
+            results = list(coord.results(timeout=30))
+            raw.send({"type": "result", "id": job["id"], "move": "a2a3", "score": 0.0})
+            raw.close()
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["worker"], "healthy")
+        self.assertGreaterEqual(coord.counters["expired"], 1)
+
+    def test_gives_up_after_max_attempts(self):
+        """Test that a job failing on every attempt is reported as an error"""
+        with Coordinator(port=0, lease_seconds=5, max_attempts=2) as coord:
+            raw = RawWorker(coord.port)
+            coord.submit(["not a position"])
+            for _ in range(2):
+                job = raw.receive()
+                raw.send({"type": "error", "id": job["id"], "error": "bad position"})
+            results = list(coord.results(timeout=10))
+            raw.close()
+        self.assertEqual(len(results), 1)
+        self.assertIn("bad position", results[0]["error"])
+        self.assertEqual(results[0]["attempts"], 2)
+        self.assertEqual(coord.counters["failed"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+sys.path.append('..')
+from engine_io import EngineReader
+from monkfish import drawing_candidate
+from pipe_benchmark import compare, synthetic_search
+
+class TestEngineReader(unittest.TestCase):
+
+    def setUp(self):
+        self.read_fd, self.write_fd = os.pipe()
+        self.reader = EngineReader(self.read_fd, chunk_size=16)
+
+    def tearDown(self):
+        for fd in (self.read_fd, self.write_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def write(self, data):
+        os.write(self.write_fd, data)
+
+    def test_lines_split_across_chunks(self):
+        """Lines longer than one read are joined back together"""
+        self.write(b"info depth 12 seldepth 18 score cp 31 pv e2e4\nreadyok\n")
+        self.assertEqual(self.reader.readline_bytes(1.0), b"info depth 12 seldepth 18 score cp 31 pv e2e4")
+        self.assertEqual(self.reader.readline_bytes(1.0), b"readyok")
+
+    def test_noise_is_skipped(self):
+        """info string and blank lines never reach the caller"""
+        self.write(b"info string NNUE enabled\n\nreadyok\n")
+        self.assertEqual(self.reader.readline(1.0), "readyok\n")
+        self.assertEqual(self.reader.skipped, 2)
+
+    def test_skip_containing(self):
+        """Substring filters drop matching lines when asked for"""
+        reader = EngineReader(self.read_fd, skip_containing=(b" currmove ",))
+        self.write(b"info depth 9 currmove e2e4 currmovenumber 1\nbestmove e2e4\n")
+        self.assertEqual(reader.readline_bytes(1.0), b"bestmove e2e4")
+
+    def test_crlf(self):
+        """Windows line endings are stripped"""
+        self.write(b"uciok\r\nreadyok\r\n")
+        self.assertEqual(self.reader.read_batch(1.0), [b"uciok", b"readyok"])
+
+    def test_timeout(self):
+        """A silent engine gives None instead of blocking"""
+        self.assertIsNone(self.reader.readline_bytes(0.05))
+        self.assertIsNone(self.reader.readline(0.05))
+        self.assertIsNone(self.reader.read_batch(0.05))
+
+    def test_partial_line_at_eof(self):
+        """A last line without a newline is still delivered before EOF"""
+        self.write(b"bestmove e2e4\nbestmove d2")
+        os.close(self.write_fd)
+        self.assertEqual(self.reader.readline_bytes(1.0), b"bestmove e2e4")
+        self.assertEqual(self.reader.readline_bytes(1.0), b"bestmove d2")
+        self.assertEqual(self.reader.readline_bytes(1.0), b"")
+        self.assertEqual(self.reader.readline(1.0), "")
+        self.assertEqual(self.reader.read_batch(1.0), [])
+
+    def test_unread(self):
+        """Lines handed back come out again before newer ones"""
+        self.reader.chunk_size = 1024
+        self.write(b"bestmove e2e4\nreadyok\n")
+        batch = self.reader.read_batch(1.0)
+        self.reader.unread(batch[1:])
+        self.assertEqual(self.reader.readline_bytes(1.0), b"readyok")
+
+class TestDrawingCandidate(unittest.TestCase):
+
+    def test_within_threshold(self):
+        """The first pv move and score come back for drawish lines"""
+        line = b"info depth 14 seldepth 20 multipv 3 score cp -12 nodes 9000 nps 1 time 5 pv g1f3 d7d5 c2c4"
+        self.assertEqual(drawing_candidate(line, 0.5), ("g1f3", -0.12))
+
+    def test_promotion_and_bounds(self):
+        """Promotions keep their piece letter and bound markers are ignored"""
+        line = b"info depth 30 score cp 8 upperbound nodes 1 pv a7a8q"
+        self.assertEqual(drawing_candidate(line, 0.5), ("a7a8q", 0.08))
+
+    def test_rejected_lines(self):
+        """Out-of-threshold, mate and currmove lines give None"""
+        self.assertIsNone(drawing_candidate(b"info depth 14 score cp 120 nodes 1 pv e2e4", 0.5))
+        self.assertIsNone(drawing_candidate(b"info depth 14 score mate 3 nodes 1 pv e2e4", 0.5))
+        self.assertIsNone(drawing_candidate(b"info depth 14 currmove e2e4 currmovenumber 1", 0.5))
+
+class TestPipeBenchmark(unittest.TestCase):
+
+    def test_compare(self):
+        """Both loops see every search in the recording"""
+        report = compare(synthetic_search(multipv=4, depth=3), repeat=3, rounds=1)
+        self.assertEqual(report["text"]["searches"], 3)
+        self.assertEqual(report["bytes"]["searches"], 3)
+        self.assertGreater(report["speedup"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import io
+import os
+import shutil
+import tempfile
+import sys
+from contextlib import redirect_stdout
+sys.path.append('..')
+from info_relay import InfoRelay
+from uci import UCIHandler
+from tests.fake_stockfish import write_config
+
+LINE = ("info depth {depth} seldepth 14 multipv {pv} score cp 25 nodes 51234 nps 812000 "
+        "hashfull 12 tbhits 0 time 63 pv e2e4 e7e5 g1f3")
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestInfoRelay(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = []
+        self.clock = FakeClock()
+        self.relay = InfoRelay(emit=self.lines.append, interval=0.1, clock=self.clock)
+
+    def test_throttles_bursts(self):
+        """Test that a burst of MultiPV lines produces a single update"""
+        for pv in range(1, 41):
+            self.relay.feed(LINE.format(depth=12, pv=pv))
+        self.assertEqual(len(self.lines), 1)
+        self.assertEqual(self.relay.dropped, 39)
+
+        self.clock.now = 0.15
+        self.relay.feed(LINE.format(depth=13, pv=1))
+        self.assertEqual(len(self.lines), 2)
+        self.assertTrue(self.lines[-1].startswith("info depth 13 "))
+
+    def test_stats_and_candidate(self):
+        """Test that search stats are relayed with MonkFish's candidate and score"""
+        self.relay.choose("d2d4", -0.04)
+        self.relay.feed(LINE.format(depth=9, pv=3))
+        self.assertEqual(self.lines, [
+            "info depth 9 seldepth 14 nodes 51234 nps 812000 hashfull 12 time 63 currmove d2d4 score cp -4"])
+
+    def test_flush_only_when_changed(self):
+        """Test that flush sends pending state once and ignores non-search lines"""
+        self.relay.feed("info string NNUE evaluation using nn.nnue")
+        self.relay.flush()
+        self.assertEqual(self.lines, [])
+        self.relay.feed(LINE.format(depth=5, pv=1))
+        self.relay.feed(LINE.format(depth=6, pv=1))
+        self.relay.flush()
+        self.relay.flush()
+        self.assertEqual(len(self.lines), 2)
+        self.assertTrue(self.lines[-1].startswith("info depth 6 "))
+
+class TestUCIInfoOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.handler = UCIHandler(write_config(os.path.join(self.temp_dir, "config.json"),
+                                               search={"default_depth": 4, "drawing_threshold": 1.5}))
+
+    def tearDown(self):
+        if self.handler.parser:
+            self.handler.parser.quit()
+        shutil.rmtree(self.temp_dir)
+
+    def test_go_reports_progress_before_bestmove(self):
+        """Test that go prints relayed info lines followed by bestmove"""
+        self.handler.handle_position("position startpos moves e2e4")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.handler.handle_go("go")
+        lines = output.getvalue().splitlines()
+        self.assertTrue(lines[-1].startswith("bestmove "))
+        info = [line for line in lines if line.startswith("info depth")]
+        self.assertTrue(info)
+        self.assertLess(len(info), 4 * 5)
+        self.assertTrue(info[-1].startswith("info depth 4 "))
+        self.assertIn(" currmove ", info[-1])
+
+if __name__ == '__main__':
+    unittest.main()
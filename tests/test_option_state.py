@@ -0,0 +1,79 @@
+import unittest
+import io
+import os
+import shutil
+import tempfile
+import sys
+from contextlib import redirect_stdout
+sys.path.append('..')
+from option_state import EngineOptionState
+from uci import UCIHandler
+from tests.fake_stockfish import write_config
+
+class TestEngineOptionState(unittest.TestCase):
+
+    def test_diff_against_engine_defaults(self):
+        """Test that values matching Stockfish's defaults are never sent"""
+        state = EngineOptionState({
+            "Threads": {"type": "spin", "default": 1},
+            "Hash": {"type": "spin", "default": 16},
+            "SyzygyPath": {"type": "string", "default": ""},
+            "Clear Hash": {"type": "button"},
+        })
+        changes = state.diff({"Threads": 1, "Hash": 128, "SyzygyPath": ""})
+        self.assertEqual(changes, [("Hash", "128")])
+        state.mark_applied(changes)
+        self.assertEqual(state.diff({"Threads": 1, "Hash": 128, "SyzygyPath": ""}), [])
+        self.assertEqual(state.diff({"UCI_Chess960": False}), [("UCI_Chess960", "false")])
+
+class TestOptionReconciliation(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.handler = UCIHandler(write_config(os.path.join(self.temp_dir, "config.json")))
+        self.assertTrue(self.handler._ensure_parser())
+        self.parser = self.handler.parser.parser
+        self.sent = []
+        original = self.parser._send_command
+        def record(cmd):
+            self.sent.append(cmd)
+            original(cmd)
+        self.parser._send_command = record
+
+    def tearDown(self):
+        self.handler.parser.quit()
+        shutil.rmtree(self.temp_dir)
+
+    def _quietly(self, func, *args):
+        with redirect_stdout(io.StringIO()):
+            func(*args)
+
+    def test_no_resend_without_changes(self):
+        """Test that an update with nothing changed sends nothing"""
+        self.assertEqual(self.parser.update_options(), 0)
+        self.assertEqual(self.sent, [])
+
+    def test_burst_is_applied_once_with_single_barrier(self):
+        """Test that a burst of setoptions becomes one diff and one isready"""
+        for cmd in ["setoption name MultiPV value 7",
+                    "setoption name Move Overhead value 300",
+                    "setoption name MultiPV value 8",
+                    "setoption name Hash value " + str(self.handler.uci_options.get_hash())]:
+            self._quietly(self.handler.handle_setoption, cmd)
+        self.assertEqual(self.sent, [])
+
+        self.handler.sync_options()
+        self.assertEqual(self.sent, [
+            "setoption name MultiPV value 8",
+            "setoption name Move Overhead value 300",
+            "isready",
+        ])
+        self.assertFalse(any("Hash" in cmd or "Threads" in cmd for cmd in self.sent))
+
+        self.sent.clear()
+        self._quietly(self.handler.handle_setoption, "setoption name Clear Hash")
+        self.handler.sync_options()
+        self.assertEqual(self.sent, ["setoption name Clear Hash", "isready"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import os
+import shutil
+import tempfile
+import sys
+sys.path.append('..')
+import pgn_index
+from pgn_index import (open_index, index_pgn, analyse_index, occurrence_results, index_report, main, chess)
+from engine_pool import EnginePool
+from tests.fake_stockfish import write_config
+
+# Three games sharing 1.e4 e5 2.Nf3; the third reaches the same position by transposition
+PGN = """[Event "A"]
+[White "One"]
+[Black "Two"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 1-0
+
+[Event "B"]
+[White "Three"]
+[Black "Four"]
+[Result "0-1"]
+
+1. e4 e5 2. Nf3 Nf6 0-1
+
+[Event "C"]
+[White "Five"]
+[Black "Six"]
+[Result "*"]
+
+1. Nf3 e5 2. e4 Nc6 *
+"""
+
+@unittest.skipIf(chess is None, "python-chess is not installed")
+class TestPGNIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.pgn = os.path.join(self.temp_dir, "games.pgn")
+        with open(self.pgn, "w") as f:
+            f.write(PGN)
+        self.conn = open_index(os.path.join(self.temp_dir, "corpus.sqlite"))
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_deduplicates_positions(self):
+        """Shared openings and transpositions are stored once with their occurrence count"""
+        self.assertEqual(index_pgn(self.conn, self.pgn), 3)
+        report = index_report(self.conn)
+        self.assertEqual(report["games"], 3)
+        self.assertEqual(report["plies"], 4 + 4 + 4)
+        # start, 1.e4, 1.e4 e5, 1.e4 e5 2.Nf3 (shared by all three), 1.Nf3, 1.Nf3 e5
+        self.assertEqual(report["unique_positions"], 6)
+        self.assertAlmostEqual(report["dedup_ratio"], 12 / 6)
+        counts = dict(self.conn.execute("SELECT fen, occurrences FROM positions"))
+        self.assertEqual(counts["rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"], 3)
+        self.assertEqual(counts["rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 0 1"], 3)
+
+    def test_reindex_is_skipped(self):
+        """Indexing the same file twice does not double its counts"""
+        index_pgn(self.conn, self.pgn)
+        self.assertEqual(index_pgn(self.conn, self.pgn), 0)
+        self.assertEqual(index_report(self.conn)["plies"], 12)
+
+    def test_interrupted_index_resumes(self):
+        """A run stopped after a commit resumes after the committed games instead of counting them twice"""
+        def interrupt(games):
+            raise KeyboardInterrupt
+
+        saved = pgn_index.COMMIT_EVERY_GAMES
+        pgn_index.COMMIT_EVERY_GAMES = 1
+        try:
+            with self.assertRaises(KeyboardInterrupt):
+                index_pgn(self.conn, self.pgn, progress=interrupt)
+        finally:
+            pgn_index.COMMIT_EVERY_GAMES = saved
+        self.assertEqual(index_report(self.conn)["games"], 1)
+
+        self.assertEqual(index_pgn(self.conn, self.pgn), 2)
+        report = index_report(self.conn)
+        self.assertEqual((report["games"], report["plies"], report["unique_positions"]), (3, 12, 6))
+        self.assertEqual(self.conn.execute("SELECT games, complete FROM sources").fetchone(), (3, 1))
+        self.assertEqual(index_pgn(self.conn, self.pgn), 0)
+
+    def test_analyse_once_and_fan_out(self):
+        """Each unique position is searched once and its result reaches every ply"""
+        index_pgn(self.conn, self.pgn)
+        config = write_config(os.path.join(self.temp_dir, "config.json"))
+        with EnginePool(1, config) as pool:
+            self.assertEqual(analyse_index(self.conn, pool, batch=4), 6)
+            self.assertEqual(analyse_index(self.conn, pool), 0)
+        plies = list(occurrence_results(self.conn))
+        self.assertEqual(len(plies), 12)
+        self.assertTrue(all(p["analysed"] and p["move"] and p["error"] is None for p in plies))
+        shared = [p for p in plies if p["position"].startswith("rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/")]
+        self.assertEqual(len(shared), 3)
+        self.assertEqual(len({p["move"] for p in shared}), 1)
+        self.assertEqual([p["played"] for p in plies[:4]], ["e2e4", "e7e5", "g1f3", "b8c6"])
+
+        report = index_report(self.conn)
+        self.assertEqual(report["analysed"], 6)
+        self.assertGreater(report["saved_seconds"], 0.0)
+
+    def test_testgames_corpus(self):
+        """The bundled TestGames PGNs index without errors"""
+        root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "TestGames")
+        for name in sorted(os.listdir(root)):
+            if name.endswith(".pgn"):
+                self.assertEqual(index_pgn(self.conn, os.path.join(root, name)), 1)
+        self.assertGreater(index_report(self.conn)["plies"], 0)
+
+    def test_cli_report(self):
+        """The CLI indexes and reports from the same database file"""
+        db = os.path.join(self.temp_dir, "cli.sqlite")
+        self.assertEqual(main(["index", self.pgn, "--db", db]), 0)
+        self.assertEqual(main(["report", "--db", db]), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+import unittest
+import os
+import shutil
+import tempfile
+import sys
+sys.path.append('..')
+from phase import material_phase, game_phase, node_budget, MAX_PHASE
+from monkfish import MonkFishParser, STARTPOS_FEN
+from uci_options import UCIOptions
+from config import MonkFishConfig
+from resources import process_cpu_seconds
+from profile_benchmark import compare
+from tests.fake_stockfish import write_config
+
+MIDDLEGAME_FEN = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/P4PPP/R2QKB1R w KQ - 2 14"
+ENDGAME_FEN = "8/5pk1/6p1/8/3R4/6P1/5PK1/3r4 w - - 0 41"
+
+class TestGamePhase(unittest.TestCase):
+
+    def test_material_phase(self):
+        """Test the non-pawn material count"""
+        self.assertEqual(material_phase(STARTPOS_FEN), MAX_PHASE)
+        self.assertEqual(material_phase(ENDGAME_FEN), 4)
+        self.assertEqual(material_phase("8/8/4k3/8/8/4K3/4P3/8 w - - 0 60"), 0)
+
+    def test_game_phase(self):
+        """Test opening/middlegame/endgame classification"""
+        self.assertEqual(game_phase(STARTPOS_FEN), "opening")
+        self.assertEqual(game_phase(MIDDLEGAME_FEN), "middlegame")
+        self.assertEqual(game_phase(ENDGAME_FEN), "endgame")
+
+    def test_legal_moves_refine_phase(self):
+        """Test that the legal-move count shifts borderline positions"""
+        late_full_board = MIDDLEGAME_FEN.replace(" 14", " 20").replace("P4PPP", "PP3PPP")
+        self.assertEqual(game_phase(late_full_board), "middlegame")
+        self.assertEqual(game_phase(late_full_board, legal_moves=38), "opening")
+        narrow = "r5k1/5ppp/8/8/8/8/5PPP/2RQR1K1 w - - 0 30"
+        self.assertEqual(game_phase(narrow), "middlegame")
+        self.assertEqual(game_phase(narrow, legal_moves=10), "endgame")
+
+    def test_node_budget_scaling(self):
+        """Test that budgets scale with MultiPV and phase"""
+        self.assertEqual(node_budget(10000, 1, "middlegame"), 10000)
+        self.assertEqual(node_budget(10000, 4, "middlegame"), 40000)
+        self.assertEqual(node_budget(10000, 4, "opening"), 20000)
+        self.assertEqual(node_budget(10000, 4, "endgame"), 30000)
+        self.assertEqual(node_budget(10000, 0, "middlegame"), 10000)
+
+class TestNodeBudgetedSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = write_config(os.path.join(self.temp_dir, "config.json"),
+                                        search={"search_nodes": 2000, "drawing_threshold": 1.5})
+        self.uci_options = UCIOptions(MonkFishConfig(self.config_file))
+        self.parser = None
+
+    def tearDown(self):
+        if self.parser:
+            self.parser.quit()
+        shutil.rmtree(self.temp_dir)
+
+    def _start(self):
+        self.parser = MonkFishParser(self.config_file, uci_options=self.uci_options)
+        self.sent = []
+        original = self.parser._send_command
+        def record(cmd):
+            self.sent.append(cmd)
+            original(cmd)
+        self.parser._send_command = record
+        return self.parser
+
+    def test_go_nodes_scaled_by_phase_and_multipv(self):
+        """Test that the node budget replaces the depth limit"""
+        parser = self._start()
+        parser.get_drawing_move("position startpos moves e2e4")
+        self.assertIn("go nodes 5000", self.sent)
+        self.assertEqual(parser.last_search_limit, ("nodes", 5000))
+        self.assertGreater(parser.last_search_nodes, 0)
+
+        parser.get_drawing_move(MIDDLEGAME_FEN)
+        self.assertEqual(self.sent[-1], "go nodes 10000")
+
+        parser.get_drawing_move(MIDDLEGAME_FEN, target_depth=3)
+        self.assertEqual(self.sent[-1], "go depth 3")
+
+    def test_deterministic_mode(self):
+        """Test that deterministic mode pins Threads=1 and clears the hash before each search"""
+        self.uci_options.set_option("Threads", "2")
+        self.uci_options.set_option("Deterministic", "true")
+        parser = self._start()
+        self.assertEqual(parser.option_state.applied["Threads"], "1")
+
+        first = parser.get_drawing_move(MIDDLEGAME_FEN)
+        self.assertEqual(self.sent[:3], ["ucinewgame", "isready", f"position fen {MIDDLEGAME_FEN}"])
+        parser.get_drawing_move("position startpos moves d2d4")
+        self.assertEqual(parser.get_drawing_move(MIDDLEGAME_FEN), first)
+        self.assertEqual(self.sent.count("ucinewgame"), 3)
+
+    def test_deterministic_mode_plays_full_strength(self):
+        """Test that deterministic mode overrides a reduced Skill Level and UCI_LimitStrength"""
+        self.uci_options.set_option("MonkFish_Skill", "5")
+        self.uci_options.set_option("Deterministic", "true")
+        parser = self._start()
+        self.uci_options.set_option("UCI_LimitStrength", "true")
+        settings = parser._desired_engine_settings()
+        self.assertEqual((settings["Threads"], settings["Skill Level"]), (1, 20))
+        self.assertIs(settings["UCI_LimitStrength"], False)
+
+        self.uci_options.set_option("Deterministic", "false")
+        settings = parser._desired_engine_settings()
+        self.assertEqual(settings["Skill Level"], 5)
+        self.assertIs(settings["UCI_LimitStrength"], True)
+
+class TestPhaseProfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = write_config(os.path.join(self.temp_dir, "config.json"), profiles={
+            "enabled": True,
+            "opening": {"depth": 1, "multipv": 3, "drawing_threshold": 1.5},
+            "middlegame": {"depth": 2, "multipv": 4},
+            "endgame": {"depth": 4, "multipv": 2, "use_nnue": True},
+        })
+        self.parser = MonkFishParser(self.config_file, uci_options=UCIOptions(MonkFishConfig(self.config_file)))
+        self.sent = []
+        original = self.parser._send_command
+        def record(cmd):
+            self.sent.append(cmd)
+            original(cmd)
+        self.parser._send_command = record
+
+    def tearDown(self):
+        self.parser.quit()
+        shutil.rmtree(self.temp_dir)
+
+    def _setoptions(self):
+        return [cmd for cmd in self.sent if cmd.startswith("setoption")]
+
+    def test_options_sent_only_on_switch(self):
+        """Test that profile options go to Stockfish only when the phase changes"""
+        self.parser.get_drawing_move("position startpos moves e2e4")
+        self.assertEqual(self.parser.active_phase, "opening")
+        self.assertIn("setoption name MultiPV value 3", self._setoptions())
+        self.assertIn("go perft 1", self.sent)
+        self.assertEqual(self.sent[-1], "go depth 1")
+
+        self.sent.clear()
+        self.parser.get_drawing_move("position startpos moves e2e4 e7e5")
+        self.assertEqual(self._setoptions(), [])
+        self.assertEqual(self.sent[-1], "go depth 1")
+
+        self.parser.get_drawing_move(ENDGAME_FEN)
+        self.assertEqual(self.parser.active_phase, "endgame")
+        # FakeFish, like current Stockfish, has no NNUE switch to send
+        self.assertEqual(self._setoptions(), ["setoption name MultiPV value 2"])
+        self.assertEqual(self.sent[-1], "go depth 4")
+
+    def test_disabling_restores_base_settings(self):
+        """Test that turning profiles off goes back to the UCI option values"""
+        self.parser.get_drawing_move(ENDGAME_FEN)
+        self.parser.uci_options.set_option("Phase_Profiles", "false")
+        self.sent.clear()
+        self.parser.get_drawing_move(ENDGAME_FEN)
+        self.assertIsNone(self.parser.active_phase)
+        self.assertIn("setoption name MultiPV value 5", self._setoptions())
+        self.assertNotIn("go perft 1", self.sent)
+        self.assertEqual(self.sent[-1], "go depth 2")
+
+class TestProfileBenchmark(unittest.TestCase):
+
+    def test_process_cpu_seconds(self):
+        """Test reading CPU time from /proc"""
+        if not os.path.exists("/proc/self/stat"):
+            self.skipTest("no /proc on this platform")
+        self.assertIsNotNone(process_cpu_seconds(os.getpid()))
+        self.assertIsNone(process_cpu_seconds(2 ** 22 + 12345))
+
+    def test_compare_report(self):
+        """Test that the benchmark runs both modes over the same positions"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            config_file = write_config(os.path.join(temp_dir, "config.json"))
+            positions = ["position startpos", "position startpos moves e2e4", ENDGAME_FEN]
+            report = compare(config_file, positions)
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertEqual(report["fixed"]["phases"], {"fixed": 3})
+        self.assertEqual(sum(report["profiles"]["phases"].values()), 3)
+        self.assertIn("endgame", report["profiles"]["phases"])
+        self.assertGreaterEqual(report["fixed"]["total_cpu"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
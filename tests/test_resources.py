@@ -0,0 +1,148 @@
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+sys.path.append('..')
+from resources import (HostResources, ENGINE_OVERHEAD_MB, parse_cpulist, format_cpulist, numa_nodes,
+                       plan_affinity, cpu_nodes, allowed_cpus)
+from config import MonkFishConfig
+from engine_pool import EnginePool
+from uci_options import UCIOptions
+from tests.fake_stockfish import write_config
+
+class TestHostResources(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self._write("/proc/meminfo", "MemTotal:       65830204 kB\nMemFree:        1000 kB\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _write(self, path, content):
+        full = os.path.join(self.root, path.lstrip("/"))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write(content)
+
+    def test_cgroup_v2_limits(self):
+        """Test that cgroup v2 cpu.max and memory.max cap the host figures"""
+        self._write("/sys/fs/cgroup/cpu.max", "250000 100000\n")
+        self._write("/sys/fs/cgroup/memory.max", str(4096 * 1024 * 1024) + "\n")
+        resources = HostResources.detect(root=self.root)
+        self.assertEqual(resources.cpus, 3)
+        self.assertEqual(resources.memory_mb, 4096)
+        self.assertEqual(resources.max_hash_mb, 2048 - ENGINE_OVERHEAD_MB)
+
+    def test_cgroup_v1_unlimited(self):
+        """Test that unlimited cgroup v1 values fall back to physical memory"""
+        self._write("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "-1\n")
+        self._write("/sys/fs/cgroup/cpu/cpu.cfs_period_us", "100000\n")
+        self._write("/sys/fs/cgroup/memory/memory.limit_in_bytes", "9223372036854771712\n")
+        resources = HostResources.detect(root=self.root)
+        self.assertEqual(resources.memory_mb, 65830204 // 1024)
+
+    def test_defaults_on_large_host(self):
+        """Test that a 64-core host is not left idle"""
+        resources = HostResources(64, 256 * 1024)
+        self.assertEqual(resources.max_threads, 64)
+        self.assertEqual(resources.default_threads, 63)
+        self.assertGreater(resources.max_hash_mb, 2048)
+        self.assertEqual(resources.default_hash_mb, 2048)
+
+    def test_split_stays_within_budget(self):
+        """Test that pool workers share cores and memory without oversubscribing"""
+        resources = HostResources(64, 32 * 1024)
+        for workers in (1, 3, 8, 64):
+            threads, hash_mb = resources.split(workers)
+            self.assertLessEqual(threads * workers, 64)
+            self.assertLessEqual((hash_mb + ENGINE_OVERHEAD_MB) * workers, resources.memory_budget_mb)
+
+    def test_config_caps(self):
+        """Test that config overrides cap the detected resources"""
+        config_file = os.path.join(self.root, "config.json")
+        config = MonkFishConfig(config_file)
+        config.config["resources"].update({"max_threads": 4, "max_hash_mb": 512})
+        resources = HostResources.detect(config)
+        self.assertLessEqual(resources.max_threads, 4)
+        self.assertLessEqual(resources.max_hash_mb, 512)
+
+    def test_uci_options_advertise_host_ranges(self):
+        """Test that UCI option ranges follow the detected resources"""
+        config = MonkFishConfig(os.path.join(self.root, "config.json"))
+        options = UCIOptions(config, HostResources(64, 256 * 1024))
+        strings = "\n".join(options.get_option_strings())
+        self.assertIn("option name Threads type spin default 63 min 1 max 64", strings)
+        self.assertTrue(options.set_option("Hash", "16384"))
+
+class TestPlacement(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _node(self, node, cpulist):
+        path = os.path.join(self.root, f"sys/devices/system/node/node{node}")
+        os.makedirs(path)
+        with open(os.path.join(path, "cpulist"), "w") as f:
+            f.write(cpulist + "\n")
+
+    def test_cpulists(self):
+        """Test reading and writing sysfs cpulists"""
+        self.assertEqual(parse_cpulist("0-3,8,10-11"), [0, 1, 2, 3, 8, 10, 11])
+        self.assertEqual(parse_cpulist(""), [])
+        self.assertEqual(format_cpulist([11, 0, 1, 2, 3, 8, 10]), "0-3,8,10-11")
+
+    def test_numa_nodes_from_sysfs(self):
+        """Test that nodes come from sysfs, limited to the CPUs we may use"""
+        self._node(0, "0-7")
+        self._node(1, "8-15")
+        self._node(2, "16-23")
+        os.makedirs(os.path.join(self.root, "sys/devices/system/node/power"))
+        nodes = numa_nodes(self.root, allowed=range(4, 12))
+        self.assertEqual(nodes, {0: [4, 5, 6, 7], 1: [8, 9, 10, 11]})
+        self.assertEqual(numa_nodes(self.root + "/missing", allowed=[0, 1]), {0: [0, 1]})
+
+    def test_plan_spreads_over_nodes(self):
+        """Test that workers get disjoint CPU sets, each on a single node, alternating nodes"""
+        nodes = {0: list(range(0, 8)), 1: list(range(8, 16))}
+        plan = plan_affinity(4, 4, nodes)
+        self.assertEqual([cpu_nodes(cpus, nodes) for cpus in plan], [[0], [1], [0], [1]])
+        used = [cpu for cpus in plan for cpu in cpus]
+        self.assertEqual(sorted(used), list(range(16)))
+        # A worker wider than a node takes what it needs from the next one
+        self.assertEqual(cpu_nodes(plan_affinity(1, 12, nodes)[0], nodes), [0, 1])
+        with self.assertRaises(ValueError):
+            plan_affinity(3, 6, nodes)
+
+    def test_pinned_pool(self):
+        """Test that pool workers run on their planned CPUs, also after a restart, and report NPS"""
+        config_file = write_config(os.path.join(self.root, "config.json"))
+        with EnginePool(1, config_file, pin=True) as pool:
+            expected = allowed_cpus()[:pool.threads_per_worker]
+            self.assertEqual(pool.affinity, [expected])
+            with pool.engine() as engine:
+                engine.get_drawing_move("position startpos")
+            placement = pool.placement()
+            self.assertTrue(placement[0]["pinned"])
+            self.assertEqual(placement[0]["cpus"], expected)
+            self.assertGreater(placement[0]["nps"], 0)
+            pool.workers[0].engine.kill()
+            pool.workers[0].engine.wait()
+            with pool.engine():
+                pass
+            self.assertEqual(pool.placement()[0]["cpus"], expected)
+            self.assertNotEqual(pool.placement()[0]["pid"], placement[0]["pid"])
+
+    def test_unpinned_pool(self):
+        """Test that pinning stays off unless asked for"""
+        config_file = write_config(os.path.join(self.root, "config.json"))
+        with EnginePool(1, config_file) as pool:
+            self.assertIsNone(pool.affinity)
+            self.assertFalse(pool.placement()[0]["pinned"])
+
+if __name__ == '__main__':
+    unittest.main()
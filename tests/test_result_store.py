@@ -0,0 +1,118 @@
+import unittest
+import ast
+import json
+import math
+import os
+import shutil
+import struct
+import tempfile
+import sys
+sys.path.append('..')
+from result_store import (ResultStoreWriter, load_columns, read_index, rows_for, summarize, import_ndjson,
+                          position_key, NPY_HEADER_BYTES, np)
+
+START = "position startpos"
+E4 = "position startpos moves e2e4"
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = os.path.join(self.temp_dir, "results.store")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_rows(self, **kwargs):
+        with ResultStoreWriter(self.store, **kwargs) as writer:
+            writer.append(START, "e2e4", 0.1, 10, 20000, 0.02)
+            writer.append(E4, "e7e5", -0.3, 12, 60000, 0.04)
+            writer.append("position fen 7k/8/8/8/8/8/8/K7 w - - 0 1", None)
+
+    def test_round_trip(self):
+        """Every column reads back with missing values as NaN, -1 or an empty move"""
+        self.write_rows()
+        columns = load_columns(self.store)
+        self.assertEqual(list(columns["position_hash"][:2]), [position_key(START), position_key(E4)])
+        moves = [m.decode() if isinstance(m, bytes) else m for m in list(columns["move"])]
+        self.assertEqual(moves, ["e2e4", "e7e5", ""])
+        self.assertAlmostEqual(columns["score"][1], -0.3, places=5)
+        self.assertTrue(math.isnan(columns["score"][2]))
+        self.assertEqual(list(columns["depth"]), [10, 12, -1])
+        self.assertEqual(list(columns["nodes"]), [20000, 60000, -1])
+        self.assertAlmostEqual(columns["latency_ms"][0], 20.0, places=3)
+
+    def test_files_are_npy(self):
+        """Each column is a standard .npy file whose header carries the row count"""
+        self.write_rows()
+        index = read_index(self.store)
+        self.assertEqual(index["rows"], 3)
+        for name, column in index["columns"].items():
+            path = os.path.join(self.store, column["file"])
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(8), b"\x93NUMPY\x01\x00")
+                length = struct.unpack("<H", f.read(2))[0]
+                header = ast.literal_eval(f.read(length).decode("latin-1"))
+            self.assertEqual(10 + length, NPY_HEADER_BYTES)
+            self.assertEqual(header["descr"], column["dtype"])
+            self.assertEqual(header["shape"], (3,))
+            itemsize = struct.calcsize("5s") if name == "move" else int(column["dtype"][2:])
+            self.assertEqual(os.path.getsize(path), NPY_HEADER_BYTES + 3 * itemsize)
+
+    def test_append_to_existing(self):
+        """Reopening a store continues it, and unflushed bytes from an interrupted run are dropped"""
+        self.write_rows(buffer_rows=1)
+        with open(os.path.join(self.store, "score.npy"), "ab") as f:
+            f.write(b"\x00\x00")
+        with ResultStoreWriter(self.store) as writer:
+            writer.append(START, "d2d4", 0.0, 8, 1000, 0.01)
+        columns = load_columns(self.store)
+        self.assertEqual(read_index(self.store)["rows"], 4)
+        self.assertEqual(list(columns["depth"]), [10, 12, -1, 8])
+        self.assertEqual(list(columns["score"])[3], 0.0)
+
+    def test_rows_for(self):
+        """Joins map position hashes to rows, -1 for positions never analysed"""
+        self.write_rows()
+        columns = load_columns(self.store)
+        rows = rows_for(columns, [position_key(E4), position_key("position fen 8/8/8/8/8/8/8/K6k w - - 0 1"),
+                                  position_key(START)])
+        self.assertEqual(list(rows), [1, -1, 0])
+
+    def test_summary(self):
+        """Summaries skip missing values"""
+        self.write_rows()
+        summary = summarize(self.store)
+        self.assertEqual(summary["rows"], 3)
+        self.assertEqual(summary["no_move"], 1)
+        self.assertAlmostEqual(summary["mean_abs_score"], 0.2, places=5)
+        self.assertEqual(summary["nodes"], 80000)
+        self.assertEqual(summary["nps"], round(80000 / 0.06))
+        self.assertEqual(summary["depths"], {10: 1, 12: 1})
+        self.assertAlmostEqual(summary["latency_ms"]["max"], 40.0, places=3)
+
+    def test_empty_store(self):
+        """A store with no rows still loads and summarizes"""
+        ResultStoreWriter(self.store).close()
+        self.assertEqual(summarize(self.store)["rows"], 0)
+
+    def test_import_ndjson(self):
+        """NDJSON results from the distributed coordinator import; failed jobs are skipped"""
+        path = os.path.join(self.temp_dir, "results.ndjson")
+        with open(path, "w") as f:
+            f.write(json.dumps({"id": 0, "position": START, "move": "e2e4", "score": 0.0, "seconds": 0.1,
+                                "depth": 6, "nodes": 500}) + "\n")
+            f.write(json.dumps({"id": 1, "position": E4, "error": "engine crashed"}) + "\n")
+        self.assertEqual(import_ndjson(path, self.store), 1)
+        self.assertEqual(list(load_columns(self.store)["depth"]), [6])
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_numpy_memmap(self):
+        """With numpy the columns are memory-mapped arrays"""
+        self.write_rows()
+        columns = load_columns(self.store)
+        self.assertIsInstance(columns["score"], np.memmap)
+        self.assertEqual(columns["position_hash"].dtype, np.dtype("<u8"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import tempfile
+import shutil
+import time
+import os
+import sys
+sys.path.append('..')
+from engine_pool import EnginePool
+from scheduler import PriorityScheduler, Saturated, LIVE, BATCH
+from tests.fake_stockfish import write_config
+
+class TestPriorityScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = write_config(os.path.join(self.temp_dir, "config.json"))
+        self.pool = None
+
+    def tearDown(self):
+        os.environ.pop("FAKE_SF_DELAY", None)
+        if self.pool:
+            self.pool.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _pool(self, size=1, delay=None):
+        if delay:
+            os.environ["FAKE_SF_DELAY"] = str(delay)
+        self.pool = EnginePool(size, self.config_file).start()
+        return self.pool
+
+    def test_live_jobs_run_before_batch(self):
+        """Test that queued live work is served ahead of earlier batch work"""
+        scheduler = PriorityScheduler(self._pool(), overload_queue=100)
+        order = []
+        futures = []
+        for name, priority in [("batch1", BATCH), ("batch2", BATCH), ("live", LIVE)]:
+            future = scheduler.submit("position startpos", priority, depth=1)
+            future.add_done_callback(lambda f, name=name: order.append(name))
+            futures.append(future)
+        scheduler.start()
+        for future in futures:
+            future.result(timeout=10)
+        scheduler.close()
+        self.assertEqual(order, ["live", "batch1", "batch2"])
+
+    def test_live_job_preempts_batch_search(self):
+        """Test that a live job stops a long batch search instead of waiting for it"""
+        scheduler = PriorityScheduler(self._pool(delay=0.2)).start()
+        batch = scheduler.submit("position startpos", BATCH, depth=10)
+        deadline = time.time() + 5
+        while scheduler.metrics()["running"] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+
+        start = time.time()
+        live = scheduler.submit("position startpos moves e2e4", LIVE, depth=1)
+        live.result(timeout=10)
+        self.assertLess(time.time() - start, 1.5)
+        self.assertFalse(batch.done())
+        self.assertEqual(scheduler.metrics()["preempted"], 1)
+        scheduler.close()
+
+    def test_lost_stop_keeps_completed_result(self):
+        """Test that a batch search the stop never reached finishes and keeps its result"""
+        pool = self._pool(delay=0.05)
+        for worker in pool.workers:
+            # The stop lands between commands and never interrupts the search
+            worker.stop = lambda: None
+        scheduler = PriorityScheduler(pool).start()
+        batch = scheduler.submit("position startpos", BATCH, depth=3)
+        deadline = time.time() + 5
+        while scheduler.metrics()["running"] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        live = scheduler.submit("position startpos moves e2e4", LIVE, depth=1)
+        self.assertTrue(batch.result(timeout=10)[0])
+        live.result(timeout=10)
+        metrics = scheduler.metrics()
+        scheduler.close()
+        self.assertEqual(metrics["preempted"], 0)
+        self.assertEqual(metrics["completed_batch"], 1)
+
+    def test_overload_degrades_batch(self):
+        """Test that batch jobs lose depth and MultiPV while the queue is overloaded"""
+        pool = self._pool()
+        scheduler = PriorityScheduler(pool, overload_queue=2, degraded_multipv=2)
+        futures = [scheduler.submit("position startpos", BATCH, depth=3) for _ in range(3)]
+        scheduler.start()
+        for future in futures:
+            future.result(timeout=10)
+        metrics = scheduler.metrics()
+        scheduler.close()
+        self.assertEqual(metrics["degraded"], 1)
+        self.assertEqual(metrics["completed_batch"], 3)
+        with pool.engine() as engine:
+            self.assertEqual(engine.uci_options.get_multipv(), 5)
+
+    def test_queue_limits_and_metrics(self):
+        """Test per-class queue limits and the exposed metrics"""
+        scheduler = PriorityScheduler(self._pool(), max_batch_queue=1)
+        scheduler.submit("position startpos", BATCH)
+        with self.assertRaises(Saturated):
+            scheduler.submit("position startpos", BATCH)
+        scheduler.submit("position startpos", LIVE)
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics["batch_queue_depth"], 1)
+        self.assertEqual(metrics["live_queue_depth"], 1)
+        self.assertEqual(metrics["rejected"], 1)
+        self.assertIn("live_wait_ms_p95", metrics)
+        scheduler.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import asyncio
+import json
+import tempfile
+import shutil
+import os
+import sys
+sys.path.append('..')
+from engine_pool import EnginePool
+from scheduler import Saturated
+from server import AnalysisService, AnalysisServer, valid_fen
+from tests.fake_stockfish import write_config
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+E4_FEN = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+ENDGAME_FEN = "8/8/4k3/8/8/4K3/8/8 w - - 0 1"
+
+async def http_request(port, method, path, payload=None, headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}"]
+    lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, body = raw.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    if b"Transfer-Encoding: chunked" in head:
+        decoded = b""
+        while body:
+            size_line, _, rest = body.partition(b"\r\n")
+            size = int(size_line, 16)
+            if size == 0:
+                break
+            decoded += rest[:size]
+            body = rest[size + 2:]
+        return status, [json.loads(line) for line in decoded.decode().splitlines()]
+    return status, json.loads(body.decode())
+
+class TestAnalysisService(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = write_config(os.path.join(self.temp_dir, "config.json"))
+        self.pool = EnginePool(1, self.config_file).start()
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_fen_validation(self):
+        """Test the structural FEN check"""
+        self.assertTrue(valid_fen(START_FEN))
+        self.assertTrue(valid_fen(ENDGAME_FEN))
+        self.assertFalse(valid_fen("not a fen"))
+        self.assertFalse(valid_fen("8/8/8/8/8/8/8/8 w - - 0 1"))
+        self.assertFalse(valid_fen(None))
+
+    def test_coalescing_and_backpressure(self):
+        """Test that identical positions share a search and a full queue rejects work"""
+        async def scenario():
+            # Scheduler workers are not started, so submitted jobs stay queued
+            service = AnalysisService(self.pool, max_queue=1)
+            first = service.submit_nowait(START_FEN)
+            again = service.submit_nowait(START_FEN)
+            self.assertIs(first, again)
+            self.assertEqual(service.stats["coalesced"], 1)
+            with self.assertRaises(Saturated):
+                service.submit_nowait(E4_FEN)
+            self.assertEqual(service.stats["rejected"], 1)
+            service.scheduler.close()
+        asyncio.run(scenario())
+
+    def test_http_endpoints(self):
+        """Test single, batch, streaming and error responses over localhost"""
+        async def scenario():
+            server = await AnalysisServer(AnalysisService(self.pool, max_queue=8), port=0).start()
+            try:
+                status, result = await http_request(server.port, "POST", "/drawing-move", {"fen": START_FEN})
+                self.assertEqual(status, 200)
+                self.assertRegex(result["move"], r"^[a-h][1-8][a-h][1-8][nbrq]?$")
+
+                status, result = await http_request(server.port, "POST", "/drawing-move", {"fen": "junk"})
+                self.assertEqual(status, 400)
+
+                fens = [START_FEN, E4_FEN, ENDGAME_FEN, "junk"]
+                status, result = await http_request(server.port, "POST", "/batch", {"fens": fens, "depth": 1})
+                self.assertEqual(status, 200)
+                self.assertEqual([r["index"] for r in result["results"]], [0, 1, 2, 3])
+                self.assertIn("error", result["results"][3])
+
+                status, lines = await http_request(server.port, "POST", "/batch", {"fens": fens[:3]},
+                                                   {"Accept": "application/x-ndjson"})
+                self.assertEqual(status, 200)
+                self.assertEqual(sorted(line["index"] for line in lines), [0, 1, 2])
+
+                status, health = await http_request(server.port, "GET", "/health")
+                self.assertEqual(status, 200)
+                self.assertGreaterEqual(health["completed"], 4)
+
+                status, metrics = await http_request(server.port, "GET", "/metrics")
+                self.assertEqual(status, 200)
+                self.assertEqual(metrics["completed_live"], 1)
+
+                status, _ = await http_request(server.port, "GET", "/nowhere")
+                self.assertEqual(status, 404)
+
+                for length in ("abc", "-5"):
+                    status, result = await http_request(server.port, "POST", "/drawing-move",
+                                                        headers={"Content-Length": length})
+                    self.assertEqual(status, 400)
+                    self.assertEqual(result["error"], "invalid Content-Length")
+                status, _ = await http_request(server.port, "POST", "/drawing-move",
+                                               headers={"Content-Length": str(64 * 1024 * 1024)})
+                self.assertEqual(status, 413)
+            finally:
+                await server.stop()
+        asyncio.run(scenario())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import io
+import os
+import shutil
+import tempfile
+import sys
+from contextlib import redirect_stderr
+sys.path.append('..')
+from monkfish import MonkFishParser
+from resources import open_fd_count, child_processes, process_rss_bytes
+from soak import slope, evaluate, run_soak, format_report
+from tests.fake_stockfish import write_config
+
+class TestLeakMetrics(unittest.TestCase):
+
+    def test_slope(self):
+        """Test the least-squares growth per move"""
+        samples = [{"moves": m, "open_fds": 5 + m // 100} for m in range(0, 1001, 100)]
+        self.assertAlmostEqual(slope(samples, "open_fds"), 0.01)
+        self.assertEqual(slope(samples[:1], "open_fds"), 0.0)
+
+    def test_evaluate_flags_growth(self):
+        """Test that a steady climb fails while warm-up growth is ignored"""
+        samples = [{"moves": m, "open_fds": 6 if m else 3, "children": 1 + m // 200}
+                   for m in range(0, 2001, 100)]
+        results = evaluate(samples)
+        self.assertTrue(results["open_fds"]["ok"])
+        self.assertFalse(results["children"]["ok"])
+        self.assertNotIn("zombies", results)
+
+    def test_proc_readers(self):
+        """Test RSS, descriptor and child readings for this process"""
+        self.assertGreater(process_rss_bytes(os.getpid()), 0)
+        self.assertGreater(open_fd_count(os.getpid()), 0)
+        self.assertIsNone(process_rss_bytes(0, root="/nonexistent"))
+        self.assertEqual(child_processes(os.getpid(), root="/nonexistent"), [])
+
+class TestSoak(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = write_config(os.path.join(self.temp_dir, "config.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_quit_releases_pipes_and_process(self):
+        """Test that quit() reaps Stockfish and closes every pipe, even after a crash"""
+        baseline = open_fd_count(os.getpid())
+        for crash in (False, True):
+            parser = MonkFishParser(self.config)
+            engine = parser.engine
+            if crash:
+                engine.kill()
+            parser.quit()
+            self.assertIsNotNone(engine.returncode)
+            self.assertTrue(engine.stdin.closed and engine.stdout.closed and engine.stderr.closed)
+        self.assertEqual(open_fd_count(os.getpid()), baseline)
+        self.assertFalse([pid for pid, state in child_processes(os.getpid()) if state == "Z"])
+
+    def test_short_soak(self):
+        """Test a short run through restarts and recycles stays flat"""
+        # 120 moves are all warm-up for memory, so only handles and processes are held tight
+        memory = {"python_heap_bytes": 1 << 24, "python_rss_bytes": 1 << 28, "engine_rss_bytes": 1 << 28}
+        with redirect_stderr(io.StringIO()):
+            report = run_soak(self.config, moves=120, sample_every=20, restart_every=50,
+                              recycle_every=80, setoption_every=10, limits=memory)
+        self.assertTrue(report["passed"], format_report(report))
+        self.assertEqual(report["events"]["restarts"], 2)
+        self.assertEqual(report["events"]["recycles"], 1)
+        self.assertEqual(report["events"]["failed_moves"], 0)
+        self.assertEqual(report["metrics"]["open_fds"]["start"], report["metrics"]["open_fds"]["end"])
+        self.assertEqual(len(report["samples"]), 7)
+        self.assertIn("| open_fds |", format_report(report))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+import sys
+sys.path.append('..')
+from supervisor import EngineSupervisor
+from uci_options import UCIOptions
+from config import MonkFishConfig
+from tests.fake_stockfish import write_config
+
+POSITION = "position startpos moves e2e4"
+
+class TestEngineSupervisor(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = write_config(os.path.join(self.temp_dir, "config.json"),
+                                        search={"default_depth": 3})
+        self.supervisor = None
+        self.saved_env = dict(os.environ)
+
+    def tearDown(self):
+        if self.supervisor:
+            self.supervisor.quit()
+        os.environ.clear()
+        os.environ.update(self.saved_env)
+        shutil.rmtree(self.temp_dir)
+
+    def _start(self, **kwargs):
+        kwargs.setdefault("heartbeat_interval", 0)
+        uci_options = UCIOptions(MonkFishConfig(self.config_file))
+        self.supervisor = EngineSupervisor(self.config_file, uci_options=uci_options, **kwargs)
+        return self.supervisor
+
+    def test_crash_mid_search_is_retried(self):
+        """Test that a crashed search is retried on a fresh engine"""
+        os.environ["FAKE_SF_CRASH_AFTER"] = "2"
+        supervisor = self._start(hang_timeout=5)
+        supervisor.get_drawing_move(POSITION)
+        old_pid = supervisor.engine.pid
+
+        move, score = supervisor.get_drawing_move(POSITION)
+        self.assertRegex(move, r"^[a-h][1-8][a-h][1-8]$")
+        self.assertNotEqual(supervisor.engine.pid, old_pid)
+        metrics = supervisor.metrics()
+        self.assertEqual(metrics["crashes"], 1)
+        self.assertEqual(metrics["restarts"], 1)
+        self.assertEqual(metrics["retries"], 1)
+        self.assertGreater(metrics["recovery_ms_last"], 0)
+
+    def test_hang_is_killed_by_watchdog(self):
+        """Test that a search with no output is killed and answered by the retry"""
+        os.environ["FAKE_SF_HANG_AFTER"] = "2"
+        supervisor = self._start(hang_timeout=0.5)
+        supervisor.get_drawing_move(POSITION)
+
+        start = time.monotonic()
+        move, _ = supervisor.get_drawing_move(POSITION)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertTrue(move)
+        self.assertEqual(supervisor.metrics()["hangs"], 1)
+        self.assertEqual(supervisor.metrics()["crashes"], 0)
+
+    def test_node_budget_halved_on_retry(self):
+        """Test that a node-budgeted search is retried with half the nodes"""
+        os.environ["FAKE_SF_CRASH_AFTER"] = "2"
+        supervisor = self._start(hang_timeout=5)
+        supervisor.uci_options.set_option("Search_Nodes", "4000")
+        supervisor.get_drawing_move(POSITION)
+        self.assertEqual(supervisor.parser.last_search_limit, ("nodes", 10000))
+
+        supervisor.get_drawing_move(POSITION)
+        self.assertEqual(supervisor.metrics()["retries"], 1)
+        self.assertEqual(supervisor.parser.last_search_limit, ("nodes", 5000))
+
+    def test_options_replayed_after_restart(self):
+        """Test that the respawned engine gets the options set before the crash"""
+        os.environ["FAKE_SF_CRASH_AFTER"] = "2"
+        supervisor = self._start(hang_timeout=5)
+        supervisor.get_drawing_move(POSITION)
+        supervisor.uci_options.set_option("MultiPV", "7")
+        supervisor.uci_options.set_option("Move Overhead", "250")
+        supervisor.update_options()
+
+        supervisor.get_drawing_move(POSITION)
+        self.assertEqual(supervisor.metrics()["restarts"], 1)
+        self.assertEqual(supervisor.option_state.applied["MultiPV"], "7")
+        self.assertEqual(supervisor.option_state.applied["Move Overhead"], "250")
+
+    def test_heartbeat_restarts_dead_engine(self):
+        """Test that an engine that dies while idle is replaced before the next search"""
+        supervisor = self._start(hang_timeout=1, heartbeat_interval=0.1)
+        supervisor.engine.kill()
+
+        deadline = time.monotonic() + 5
+        while supervisor.metrics()["restarts"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(supervisor.metrics()["restarts"], 1)
+        self.assertGreater(supervisor.metrics()["heartbeats"], 0)
+        self.assertTrue(supervisor.get_drawing_move(POSITION)[0])
+        self.assertEqual(supervisor.metrics()["retries"], 0)
+
+    def test_silent_infinite_analysis_is_not_a_hang(self):
+        """Test that go infinite waiting quietly at its last depth outlives hang_timeout"""
+        os.environ["FAKE_SF_MAX_DEPTH"] = "2"
+        supervisor = self._start(hang_timeout=0.3)
+        stop = threading.Event()
+        result = []
+        thread = threading.Thread(target=lambda: result.append(
+            supervisor.analyse(POSITION, stop_event=stop)))
+        thread.start()
+        time.sleep(1.0)
+        stop.set()
+        supervisor.stop()
+        thread.join(5)
+        self.assertTrue(result and result[0][0])
+        self.assertEqual(supervisor.metrics()["hangs"], 0)
+        self.assertEqual(supervisor.metrics()["restarts"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import os
+import shutil
+import tempfile
+import sys
+sys.path.append('..')
+from tablebase import TablebaseProber, TABLEBASE_WIN_SCORE, chess
+from monkfish import MonkFishParser
+from tests.fake_stockfish import write_config
+
+KQK_FEN = "8/8/8/8/8/2k5/8/K6Q w - - 0 1"
+
+# Directory with real 3-4 piece Syzygy files for the optional end-to-end test
+SYZYGY_TEST_PATH = os.environ.get("MONKFISH_SYZYGY_TEST_PATH",
+                                  os.path.join(os.path.dirname(__file__), "syzygy"))
+
+class TableDouble:
+    """Hand-written WDL/DTZ answers keyed by position, in place of table files"""
+    wdl = {"KQvK": None, "KRvKB": None}
+
+    def __init__(self, root, after_default, after=None):
+        self.root = root
+        self.after_default = after_default
+        self.after = after or {}
+
+    def _key(self, board):
+        return board.board_fen() + (" w" if board.turn else " b")
+
+    def _entry(self, board):
+        if self._key(board) == self._key(chess.Board(KQK_FEN)):
+            return self.root
+        for move, entry in self.after.items():
+            after = chess.Board(KQK_FEN)
+            after.push_uci(move)
+            if self._key(board) == self._key(after):
+                return entry
+        return self.after_default
+
+    def get_wdl(self, board):
+        return self._entry(board)[0]
+
+    def get_dtz(self, board):
+        return self._entry(board)[1]
+
+    def close(self):
+        pass
+
+@unittest.skipIf(chess is None, "python-chess is not installed")
+class TestTablebaseProber(unittest.TestCase):
+
+    def test_win_converts_by_shortest_dtz(self):
+        """Test that a won position plays the winning move closest to zeroing"""
+        double = TableDouble((2, 5), (0, 0), {"h1h8": (-2, -7), "h1c1": (-2, -3)})
+        prober = TablebaseProber("", tablebase=double)
+        self.assertEqual(prober.max_pieces, 4)
+        self.assertEqual(prober.probe(KQK_FEN), ("h1c1", TABLEBASE_WIN_SCORE))
+
+    def test_draw_keeps_the_balance(self):
+        """Test that a drawn position avoids every move that loses"""
+        double = TableDouble((0, 0), (2, 4), {"a1b1": (0, 0)})
+        prober = TablebaseProber("", tablebase=double)
+        self.assertEqual(prober.probe(KQK_FEN), ("a1b1", 0.0))
+        self.assertEqual((prober.probes, prober.hits), (1, 1))
+
+    def test_loss_resists_longest(self):
+        """Test that a lost position picks the longest distance to zeroing"""
+        double = TableDouble((-2, -5), (2, 3), {"h1h2": (2, 9)})
+        prober = TablebaseProber("", tablebase=double)
+        self.assertEqual(prober.probe(KQK_FEN), ("h1h2", -TABLEBASE_WIN_SCORE))
+
+    def test_positions_outside_the_tables(self):
+        """Test that big, castling or unknown positions fall back to search"""
+        prober = TablebaseProber("", tablebase=TableDouble((None, None), (0, 0)))
+        self.assertIsNone(prober.probe("position startpos moves e2e4"))
+        self.assertIsNone(prober.probe("4k3/8/8/8/8/8/8/4K2R w K - 0 1"))
+        self.assertIsNone(prober.probe(KQK_FEN))
+
+    @unittest.skipUnless(os.path.exists(os.path.join(SYZYGY_TEST_PATH, "KQvK.rtbw")),
+                         "no local Syzygy tables")
+    def test_real_tables(self):
+        """Test probing real 3-4 piece tables from disk"""
+        prober = TablebaseProber(SYZYGY_TEST_PATH)
+        try:
+            move, score = prober.probe(KQK_FEN)
+            self.assertEqual(score, TABLEBASE_WIN_SCORE)
+            self.assertEqual(prober.probe("8/8/8/8/8/2k5/8/K7 w - - 0 1"), None)
+        finally:
+            prober.close()
+
+class TestTablebaseInParser(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.syzygy_dir = os.path.join(self.temp_dir, "syzygy")
+        self.config_file = write_config(os.path.join(self.temp_dir, "config.json"),
+                                        tablebase={"syzygy_path": self.syzygy_dir})
+        self.parser = MonkFishParser(self.config_file)
+
+    def tearDown(self):
+        self.parser.quit()
+        shutil.rmtree(self.temp_dir)
+
+    def test_syzygy_path_passed_to_stockfish(self):
+        """Test that the configured directory becomes Stockfish's SyzygyPath"""
+        self.assertIsNone(self.parser.tablebase)
+        self.assertEqual(self.parser.option_state.applied["SyzygyPath"], self.syzygy_dir)
+
+    @unittest.skipIf(chess is None, "python-chess is not installed")
+    def test_probe_skips_search(self):
+        """Test that a tablebase answer is returned without asking Stockfish"""
+        sent = []
+        original = self.parser._send_command
+        self.parser._send_command = lambda cmd: (sent.append(cmd), original(cmd))
+        self.parser.tablebase = TablebaseProber("", tablebase=TableDouble((0, 0), (2, 4), {"a1b1": (0, 0)}))
+        self.assertEqual(self.parser.get_drawing_move(KQK_FEN), ("a1b1", 0.0))
+        self.assertEqual(sent, [])
+        self.assertEqual(self.parser.last_search_limit, ("tablebase", 0))
+
+        move, _ = self.parser.get_drawing_move("position startpos moves e2e4")
+        self.assertTrue(move)
+        self.assertIn("go depth 2", sent)
+
+if __name__ == '__main__':
+    unittest.main()
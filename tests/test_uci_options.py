@@ -1,8 +1,15 @@
 import unittest
+import io
+import os
+import shutil
+import tempfile
 import sys
+from contextlib import redirect_stdout
 sys.path.append('..')
 from config import MonkFishConfig
-from uci_options import UCIOptions
+from uci_options import UCIOptions, parse_option_line
+from uci import UCIHandler
+from tests.fake_stockfish import write_config
 
 class TestUCIOptions(unittest.TestCase):
     
@@ -69,5 +76,83 @@ class TestUCIOptions(unittest.TestCase):
         self.uci_options.set_option("Drawing_Threshold", "10")
         self.assertEqual(self.uci_options.get_drawing_threshold(), 0.10)
 
+    def test_parse_option_lines(self):
+        """Test parsing of Stockfish's advertised option lines"""
+        name, spec = parse_option_line("option name Skill Level type spin default 20 min 0 max 20")
+        self.assertEqual(name, "Skill Level")
+        self.assertEqual((spec["default"], spec["min"], spec["max"]), (20, 0, 20))
+
+        name, spec = parse_option_line("option name SyzygyPath type string default <empty>")
+        self.assertEqual((name, spec["default"]), ("SyzygyPath", ""))
+
+        name, spec = parse_option_line("option name Clear Hash type button")
+        self.assertEqual((name, spec["type"]), ("Clear Hash", "button"))
+
+        name, spec = parse_option_line("option name Style type combo default Normal var Solid var Normal var Risky")
+        self.assertEqual(spec["vars"], ["Solid", "Normal", "Risky"])
+
+        self.assertIsNone(parse_option_line("option name Broken type spin default x min 0 max 1"))
+        self.assertIsNone(parse_option_line("info string hello"))
+
+    def test_merge_engine_options(self):
+        """Test that engine options are merged without replacing MonkFish's own"""
+        self.uci_options.merge_engine_options(dict([
+            parse_option_line("option name Move Overhead type spin default 10 min 0 max 5000"),
+            parse_option_line("option name Skill Level type spin default 20 min 0 max 20"),
+            parse_option_line("option name Hash type spin default 16 min 1 max 33554432"),
+            parse_option_line("option name UCI_LimitStrength type check default false"),
+            parse_option_line("option name SyzygyPath type string default <empty>"),
+            parse_option_line("option name Clear Hash type button"),
+        ]))
+        strings = self.uci_options.get_option_strings()
+        self.assertIn("option name Move Overhead type spin default 10 min 0 max 5000", strings)
+        self.assertIn("option name SyzygyPath type string default <empty>", strings)
+        self.assertIn("option name Clear Hash type button", strings)
+        self.assertFalse(any(opt.startswith("option name Skill Level") for opt in strings))
+        self.assertEqual(sum(opt.startswith("option name Hash ") for opt in strings), 1)
+
+        # Pass-through values are exposed for forwarding; buttons are reported once per press
+        self.assertEqual(self.uci_options.get_engine_settings(), {
+            "Move Overhead": 10, "UCI_LimitStrength": False, "SyzygyPath": ""})
+        self.assertTrue(self.uci_options.set_option("move overhead", "100"))
+        self.assertTrue(self.uci_options.set_option("SyzygyPath", "/tb/3-4-5"))
+        self.assertTrue(self.uci_options.set_option("Clear Hash", None))
+        self.assertEqual(self.uci_options.get_engine_settings()["Move Overhead"], 100)
+        self.assertEqual(self.uci_options.get_engine_settings()["SyzygyPath"], "/tb/3-4-5")
+        self.assertEqual(self.uci_options.pop_pending_buttons(), ["Clear Hash"])
+        self.assertEqual(self.uci_options.pop_pending_buttons(), [])
+        self.assertFalse(self.uci_options.set_option("Move Overhead", "6000"))
+
+class TestUCIPassThrough(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.handler = UCIHandler(write_config(os.path.join(self.temp_dir, "config.json")))
+
+    def tearDown(self):
+        if self.handler.parser:
+            self.handler.parser.quit()
+        shutil.rmtree(self.temp_dir)
+
+    def _output(self, func, *args):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            func(*args)
+        return out.getvalue()
+
+    def test_engine_options_settable_by_multi_word_name(self):
+        """Test that Stockfish's multi-word options can be set through MonkFish"""
+        self.assertTrue(self.handler._ensure_parser())
+        self.assertIn("Move Overhead", self.handler.uci_options.options)
+        output = self._output(self.handler.handle_setoption, "setoption name Move Overhead value 250")
+        self.assertIn("Set Move Overhead to 250", output)
+        self.assertEqual(self.handler.uci_options.get_value("Move Overhead"), 250)
+
+        output = self._output(self.handler.handle_setoption, "setoption name SyzygyPath value /data/syzygy dir")
+        self.assertIn("Set SyzygyPath to /data/syzygy dir", output)
+
+        output = self._output(self.handler.handle_setoption, "setoption name Move Overhead value lots")
+        self.assertIn("Invalid option or value", output)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
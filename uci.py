@@ -1,15 +1,81 @@
-from monkfish import MonkFishParser
+from supervisor import EngineSupervisor
 from config import MonkFishConfig
 from uci_options import UCIOptions
+from resources import HostResources
+from info_relay import InfoRelay
+from debug_hooks import DebugSession
+from config_watcher import ConfigWatcher
+from monkfish import NoLegalMovesError
 import sys
+import threading
+
+# Words that end a `go ... searchmoves` move list
+GO_KEYWORDS = {"searchmoves", "ponder", "wtime", "btime", "winc", "binc", "movestogo",
+               "depth", "nodes", "mate", "movetime", "infinite"}
+
+# How long stop waits for Stockfish's own bestmove before answering with the latest recommendation
+STOP_GRACE_SECONDS = 0.5
+
+def parse_go(cmd):
+    """(infinite, searchmoves) of a go command"""
+    tokens = cmd.split()[1:]
+    searchmoves = []
+    if "searchmoves" in tokens:
+        for token in tokens[tokens.index("searchmoves") + 1:]:
+            if token in GO_KEYWORDS:
+                break
+            searchmoves.append(token)
+    return "infinite" in tokens, searchmoves
+
+class Analysis:
+    """A `go infinite` search running on a background thread until stop"""
+
+    def __init__(self, parser, position, searchmoves, relay):
+        self.parser = parser
+        self.relay = relay
+        self.result = None
+        self.error = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(position, searchmoves),
+                                       name="monkfish-analysis", daemon=True)
+        self.thread.start()
+
+    def _run(self, position, searchmoves):
+        try:
+            self.result = self.parser.analyse(position, searchmoves, self.relay, self.stopped)
+        except Exception as e:
+            self.error = e
+
+    def stop(self, timeout=STOP_GRACE_SECONDS):
+        """Stop the search and return the move to play, or None when there is none"""
+        self.stopped.set()
+        self.parser.stop()
+        self.thread.join(timeout)
+        if isinstance(self.error, NoLegalMovesError):
+            return None
+        if self.error is not None:
+            print(f"info string Error during analysis: {self.error}")
+        if self.result:
+            return self.result[0]
+        # Stockfish is slow to answer or failed: the latest recommendation still stands
+        return self.relay.candidate[0] if self.relay.candidate else None
 
 class UCIHandler:
-    def __init__(self):
+    def __init__(self, config_file="monkfish_config.json"):
         try:
-            self.config = MonkFishConfig()
-            self.uci_options = UCIOptions(self.config)
+            self.config_file = config_file
+            self.config = MonkFishConfig(config_file)
+            self.uci_options = UCIOptions(self.config, HostResources.detect(self.config))
             self.parser = None
             self.current_position = None
+            self.options_dirty = False
+            # The config watcher thread marks options dirty while the main thread may be syncing them
+            self._options_lock = threading.Lock()
+            self.analysis = None
+            self.debug = DebugSession(self.config.get_debug_output_dir())
+            self.watcher = None
+            if self.config.get_hot_reload_enabled():
+                self.watcher = ConfigWatcher(self.config, targets=[self]).start()
         except Exception as e:
             print(f"info string MonkFish initialization error: {e}")
             sys.exit(1)
@@ -18,7 +84,7 @@ class UCIHandler:
         """Lazy initialization of parser to provide better error messages"""
         if self.parser is None:
             try:
-                self.parser = MonkFishParser(uci_options=self.uci_options)
+                self.parser = EngineSupervisor(self.config_file, uci_options=self.uci_options, config=self.config)
             except FileNotFoundError as e:
                 print(f"info string {e}")
                 print("info string Please run 'python3 setup.py' to download Stockfish")
@@ -31,35 +97,83 @@ class UCIHandler:
     def handle_position(self, cmd):
         self.current_position = cmd
     
+    def _parse_setoption(self, cmd):
+        """Split 'setoption name <id> [value <x>]'; names and values may contain spaces"""
+        parts = cmd.split()
+        if len(parts) < 3 or parts[1] != "name":
+            return None, None
+        if "value" in parts[3:]:
+            value_idx = parts.index("value", 3)
+            return " ".join(parts[2:value_idx]), " ".join(parts[value_idx + 1:])
+        return " ".join(parts[2:]), None
+    
     def handle_setoption(self, cmd):
         """Handle UCI setoption commands"""
         try:
-            # Format: setoption name <n> value <value>
-            parts = cmd.split()
-            if len(parts) >= 4 and parts[1] == "name" and "value" in parts:
-                try:
-                    name_idx = parts.index("name") + 1
-                    value_idx = parts.index("value") + 1
-                    if name_idx < len(parts) and value_idx < len(parts):
-                        option_name = parts[name_idx]
-                        option_value = parts[value_idx]
-                        
-                        if self.uci_options.set_option(option_name, option_value):
-                            # Update engine settings if option changed successfully
-                            if self.parser:
-                                self.parser.update_options()
-                            print(f"info string Set {option_name} to {option_value}")
-                        else:
-                            print(f"info string Invalid option or value: {option_name} = {option_value}")
-                except (ValueError, IndexError):
-                    print("info string Invalid setoption format")
+            option_name, option_value = self._parse_setoption(cmd)
+            if not option_name:
+                print("info string Invalid setoption format")
+                return
+            
+            if self.uci_options.set_option(option_name, option_value):
+                # GUIs send options in bursts; apply them together at the next isready/go
+                self.options_dirty = True
+                if option_value is None:
+                    print(f"info string Set {option_name}")
+                else:
+                    print(f"info string Set {option_name} to {option_value}")
+            else:
+                print(f"info string Invalid option or value: {option_name} = {option_value}")
         except Exception as e:
             print(f"info string Error setting option: {e}")
         
+    def apply_config(self, changes):
+        """Pick up hot-reloaded config values; they reach Stockfish at the next isready or go"""
+        keys = {(section, key) for section, key, _, _ in changes}
+        with self._options_lock:
+            applied = self.uci_options.apply_config_changes(keys)
+            if any(section == "resources" for section, _ in keys):
+                # New host limits move the Hash/Threads ranges and clamp their values
+                self.uci_options.set_resources(HostResources.detect(self.config))
+                applied.append("Hash/Threads limits")
+            if applied:
+                self.options_dirty = True
+        if applied:
+            print(f"info string Config reloaded: {', '.join(applied)}", file=sys.stderr)
+    
+    def sync_options(self):
+        """Send the changed options to Stockfish as one batch behind a single isready"""
+        with self._options_lock:
+            if self.options_dirty and self.parser:
+                # Cleared first so a change made during the update is never marked as sent
+                self.options_dirty = False
+                self.parser.update_options()
+    
     def handle_go(self, cmd):
+        # A GUI should stop a running analysis first; finish it properly if it didn't
+        self.handle_stop()
+        infinite, searchmoves = parse_go(cmd)
+        if infinite:
+            self._analyse(searchmoves)
+            return
+        profile, trace = self.uci_options.get_debug_profile(), self.uci_options.get_debug_trace()
+        if not (profile or trace):
+            self._go(cmd)
+            return
+        self.debug.begin(self.current_position, profile=profile, trace=trace)
+        try:
+            self._go(cmd, self.debug.trace)
+        finally:
+            for path in self.debug.end():
+                print(f"info string Debug output written to {path}", file=sys.stderr)
+    
+    def _go(self, cmd, trace=None):
         if not self._ensure_parser():
             print("bestmove (none)")
             return
+        self.sync_options()
+        if trace:
+            trace.mark("options_synced")
             
         if self.current_position is None:
             print("info string No position set")
@@ -67,12 +181,41 @@ class UCIHandler:
             return
         
         try:
-            move, score = self.parser.get_drawing_move(self.current_position)
-            print(f"bestmove {move}")
+            relay = InfoRelay(interval=self.config.get_info_interval_ms() / 1000.0)
+            move, score = self.parser.get_drawing_move(self.current_position, relay=relay, trace=trace)
+            print(f"bestmove {move}", flush=True)
         except Exception as e:
             print(f"info string Error generating move: {e}")
             print("bestmove (none)")
 
+    def _analyse(self, searchmoves):
+        if not self._ensure_parser():
+            print("bestmove (none)")
+            return
+        if self.current_position is None:
+            print("info string No position set")
+            print("bestmove (none)")
+            return
+        self.sync_options()
+        relay = InfoRelay(interval=self.config.get_info_interval_ms() / 1000.0)
+        # bestmove is only printed once the GUI sends stop, as UCI requires for go infinite
+        self.analysis = Analysis(self.parser, self.current_position, searchmoves, relay)
+    
+    def handle_stop(self):
+        """End a go infinite analysis; stop without one running is ignored"""
+        if self.analysis is None:
+            return
+        analysis, self.analysis = self.analysis, None
+        move = analysis.stop()
+        print(f"bestmove {move or '(none)'}", flush=True)
+    
+    def report_capitalize(self):
+        """Search cost saved by capitalize mode so far, when it has played any moves"""
+        saved = self.parser.capitalize.savings()
+        if saved["moves"]:
+            print(f"info string Capitalize mode: {saved['moves']} moves, ~{saved['nodes_saved']} nodes and "
+                  f"{saved['seconds_saved']:.2f}s of search saved", file=sys.stderr)
+    
     def run(self):
         print("info string MonkFish - The Zen of Chess")
         
@@ -83,6 +226,8 @@ class UCIHandler:
                 if cmd == "quit": 
                     break
                 elif cmd == "uci":
+                    # Start Stockfish now so its own options can be advertised too
+                    self._ensure_parser()
                     print(f"id name {self.config.get_engine_name()}")
                     print(f"id author {self.config.get_author()}")
                     
@@ -93,7 +238,11 @@ class UCIHandler:
                     print("uciok")
                 elif cmd == "isready":
                     # Try to initialize parser if not done yet
-                    if self._ensure_parser():
+                    if self.analysis is not None:
+                        # Options wait for the search to end; the GUI still gets its answer now
+                        print("readyok")
+                    elif self._ensure_parser():
+                        self.sync_options()
                         print("readyok")
                     else:
                         print("info string Engine not ready - initialization failed")
@@ -105,8 +254,12 @@ class UCIHandler:
                 elif cmd.startswith("go"):
                     self.handle_go(cmd)
                 elif cmd == "stop":
-                    # Handle stop command gracefully
-                    print("bestmove (none)")
+                    self.handle_stop()
+                elif cmd == "ucinewgame":
+                    # A new game starts out playing for equality again
+                    if self.parser:
+                        self.report_capitalize()
+                        self.parser.capitalize.reset()
                 elif cmd.startswith("ponderhit"):
                     # Handle ponderhit (we don't ponder, but respond anyway)
                     pass
@@ -124,7 +277,14 @@ class UCIHandler:
                 print(f"info string Unexpected error: {e}")
         
         # Cleanup
+        if self.watcher:
+            self.watcher.stop()
+        if self.analysis is not None:
+            self.analysis.stop()
+            self.analysis.thread.join()
+            self.analysis = None
         if self.parser:
+            self.report_capitalize()
             try:
                 self.parser.quit()
             except:
@@ -1,21 +1,103 @@
+# Where each MonkFish option lives in monkfish_config.json
+CONFIG_OPTION_KEYS = {
+    "MonkFish_Skill": ("engine", "skill_level"),
+    "MultiPV": ("engine", "multipv"),
+    "Use_NNUE": ("engine", "use_nnue"),
+    "Search_Depth": ("search", "default_depth"),
+    "Drawing_Threshold": ("search", "drawing_threshold"),
+    "Search_Nodes": ("search", "search_nodes"),
+    "Deterministic": ("search", "deterministic"),
+    "Phase_Profiles": ("profiles", "enabled"),
+    "Capitalize": ("capitalize", "enabled"),
+    "Debug_Profile": ("debug", "profile"),
+    "Debug_Trace": ("debug", "trace"),
+}
+
+def option_to_config(name, value):
+    """Translate an option value to its (section, key, value) in the config file"""
+    section, key = CONFIG_OPTION_KEYS[name]
+    if name == "Drawing_Threshold":
+        value = value / 100.0
+    return section, key, value
+
+def config_to_option(name, value):
+    """The set_option value for a config file value; the inverse of option_to_config"""
+    if name == "Drawing_Threshold":
+        value = round(value * 100)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+# Stockfish options MonkFish drives itself through its own options
+ENGINE_MANAGED_OPTIONS = {"Hash", "Threads", "Ponder", "MultiPV", "Skill Level", "UCI_UseNNUE", "Use NNUE"}
+
+OPTION_KEYWORDS = ("type", "default", "min", "max", "var")
+
+def parse_option_line(line):
+    """Parse an engine's 'option name <id> type <t> ...' line into (name, spec)"""
+    tokens = line.split()
+    if len(tokens) < 5 or tokens[0] != "option" or tokens[1] != "name":
+        return None
+    fields = {"var": []}
+    
+    def store(key, words):
+        if key == "var":
+            fields["var"].append(" ".join(words))
+        else:
+            fields[key] = " ".join(words)
+    
+    key, words = "name", []
+    for token in tokens[2:]:
+        # Names may contain spaces; only "type" ends them
+        if token in OPTION_KEYWORDS and (key != "name" or token == "type"):
+            store(key, words)
+            key, words = token, []
+        else:
+            words.append(token)
+    store(key, words)
+
+    opt_type = fields.get("type")
+    spec = {"type": opt_type}
+    try:
+        if opt_type == "spin":
+            spec.update(default=int(fields["default"]), min=int(fields["min"]), max=int(fields["max"]))
+        elif opt_type == "check":
+            spec["default"] = fields.get("default", "false").lower() == "true"
+        elif opt_type == "combo":
+            spec.update(default=fields.get("default", ""), vars=fields["var"])
+        elif opt_type == "string":
+            default = fields.get("default", "")
+            spec["default"] = "" if default == "<empty>" else default
+        elif opt_type != "button":
+            return None
+    except (KeyError, ValueError):
+        return None
+    spec["value"] = spec.get("default")
+    return fields["name"], spec
+
 class UCIOptions:
-    def __init__(self, config):
+    def __init__(self, config, resources=None):
         self.config = config
+        # Size Hash/Threads to the host when resources are known, else keep the conservative limits
+        hash_default = resources.default_hash_mb if resources else 128
+        hash_max = resources.max_hash_mb if resources else 2048
+        threads_default = resources.default_threads if resources else 1
+        threads_max = resources.max_threads if resources else 8
         self.options = {
             # Standard UCI options
             "Hash": {
                 "type": "spin",
-                "default": 128,
+                "default": hash_default,
                 "min": 1,
-                "max": 2048,
-                "value": 128
+                "max": hash_max,
+                "value": hash_default
             },
             "Threads": {
                 "type": "spin", 
-                "default": 1,
+                "default": threads_default,
                 "min": 1,
-                "max": 8,
-                "value": 1
+                "max": threads_max,
+                "value": threads_default
             },
             "Ponder": {
                 "type": "check",
@@ -45,6 +127,43 @@ class UCIOptions:
                 "max": 10,
                 "value": self.config.get_default_depth()
             },
+            # Nodes per principal variation; 0 searches to Search_Depth instead
+            "Search_Nodes": {
+                "type": "spin",
+                "default": self.config.get_search_nodes() or 0,
+                "min": 0,
+                "max": 100000000,
+                "value": self.config.get_search_nodes() or 0
+            },
+            # Threads=1, full strength and a cleared hash before every search, so results repeat exactly
+            "Deterministic": {
+                "type": "check",
+                "default": bool(self.config.get_deterministic()),
+                "value": bool(self.config.get_deterministic())
+            },
+            # Depth, MultiPV, threshold and NNUE from the config's per-phase profiles
+            "Phase_Profiles": {
+                "type": "check",
+                "default": bool(self.config.get_profiles_enabled()),
+                "value": bool(self.config.get_profiles_enabled())
+            },
+            # One full-strength line once the eval passes capitalize.margin
+            "Capitalize": {
+                "type": "check",
+                "default": bool(self.config.get_capitalize_enabled()),
+                "value": bool(self.config.get_capitalize_enabled())
+            },
+            # Per-move cProfile stats and stage timestamps, written to debug.output_dir
+            "Debug_Profile": {
+                "type": "check",
+                "default": bool(self.config.get_debug_profile()),
+                "value": bool(self.config.get_debug_profile())
+            },
+            "Debug_Trace": {
+                "type": "check",
+                "default": bool(self.config.get_debug_trace()),
+                "value": bool(self.config.get_debug_trace())
+            },
             "MultiPV": {
                 "type": "spin",
                 "default": self.config.get_multipv(),
@@ -58,6 +177,45 @@ class UCIOptions:
                 "value": self.config.get_use_nnue()
             }
         }
+        self.pending_buttons = []
+    
+    def set_resources(self, resources):
+        """Follow new host limits: the Hash and Threads ranges move, values are clamped into them"""
+        for name, maximum in (("Hash", resources.max_hash_mb), ("Threads", resources.max_threads)):
+            option = self.options[name]
+            option["max"] = maximum
+            option["value"] = min(option["value"], maximum)
+    
+    def merge_engine_options(self, engine_options):
+        """Add Stockfish's advertised options that MonkFish doesn't manage itself"""
+        for name, spec in engine_options.items():
+            if name in ENGINE_MANAGED_OPTIONS or name in self.options:
+                continue
+            option = dict(spec, engine=True)
+            if "vars" in option:
+                option["vars"] = list(option["vars"])
+            self.options[name] = option
+    
+    def _resolve(self, name):
+        """UCI option names are case-insensitive"""
+        if name in self.options:
+            return name
+        lowered = name.lower()
+        for known in self.options:
+            if known.lower() == lowered:
+                return known
+        return None
+    
+    def apply_config_changes(self, keys):
+        """Take the config's current value for each option whose (section, key) is in `keys`.
+
+        Returns the names of the options that were set.
+        """
+        applied = []
+        for name, (section, key) in CONFIG_OPTION_KEYS.items():
+            if (section, key) in keys and self.set_option(name, config_to_option(name, self.config.get(section, key))):
+                applied.append(name)
+        return applied
     
     def get_option_strings(self):
         """Return UCI option strings for engine identification"""
@@ -72,11 +230,19 @@ class UCIOptions:
                 option_strings.append(
                     f"option name {name} type {opt['type']} default {default_val}"
                 )
+            elif opt["type"] == "combo":
+                variants = "".join(f" var {var}" for var in opt["vars"])
+                option_strings.append(f"option name {name} type combo default {opt['default']}{variants}")
+            elif opt["type"] == "string":
+                option_strings.append(f"option name {name} type string default {opt['default'] or '<empty>'}")
+            elif opt["type"] == "button":
+                option_strings.append(f"option name {name} type button")
         return option_strings
     
     def set_option(self, name, value):
         """Set an option value"""
-        if name in self.options:
+        name = self._resolve(name)
+        if name is not None:
             opt = self.options[name]
             if opt["type"] == "spin":
                 try:
@@ -84,20 +250,42 @@ class UCIOptions:
                     if opt["min"] <= val <= opt["max"]:
                         opt["value"] = val
                         return True
-                except ValueError:
+                except (TypeError, ValueError):
                     pass
             elif opt["type"] == "check":
-                if value.lower() in ["true", "false"]:
+                if value is not None and value.lower() in ["true", "false"]:
                     opt["value"] = value.lower() == "true"
                     return True
+            elif opt["type"] == "combo":
+                for var in opt["vars"]:
+                    if value is not None and var.lower() == value.lower():
+                        opt["value"] = var
+                        return True
+            elif opt["type"] == "string":
+                opt["value"] = "" if value in (None, "<empty>") else value
+                return True
+            elif opt["type"] == "button":
+                self.pending_buttons.append(name)
+                return True
         return False
     
     def get_value(self, name):
         """Get current value of an option"""
-        if name in self.options:
-            return self.options[name]["value"]
+        name = self._resolve(name)
+        if name is not None:
+            return self.options[name].get("value")
         return None
     
+    def get_engine_settings(self):
+        """Current values of the Stockfish options passed straight through"""
+        return {name: opt["value"] for name, opt in self.options.items()
+                if opt.get("engine") and opt["type"] != "button"}
+    
+    def pop_pending_buttons(self):
+        """Buttons pressed since the last call; each press is sent once"""
+        buttons, self.pending_buttons = self.pending_buttons, []
+        return buttons
+    
     def get_skill_level(self):
         return self.get_value("MonkFish_Skill")
     
@@ -113,6 +301,24 @@ class UCIOptions:
     def get_use_nnue(self):
         return self.get_value("Use_NNUE")
     
+    def get_search_nodes(self):
+        return self.get_value("Search_Nodes")
+    
+    def get_deterministic(self):
+        return self.get_value("Deterministic")
+    
+    def get_phase_profiles(self):
+        return self.get_value("Phase_Profiles")
+    
+    def get_capitalize(self):
+        return self.get_value("Capitalize")
+    
+    def get_debug_profile(self):
+        return self.get_value("Debug_Profile")
+    
+    def get_debug_trace(self):
+        return self.get_value("Debug_Trace")
+    
     def get_hash(self):
         return self.get_value("Hash")
     